@@ -0,0 +1,62 @@
+"""Measure the memory used to load a large tree under a node budget.
+
+Usage: python -m benchmarks.bench_budget [NUMBER_OF_FILES] [MAX_RESIDENT_NODES]
+
+A synthetic tree is loaded whole and with a node budget while `tracemalloc`
+is tracing. The peak covers the parsing as well as the tree, so it shows
+whether the structure file is held whole at any point of the load.
+
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.bench_compressed_load import DEFAULT_NUMBER_OF_FILES, build_structure
+from src.core import FileSystem
+
+DEFAULT_MAX_RESIDENT_NODES: int = 10_000
+
+
+def measure(json_path: Path, max_resident_nodes: int | None) -> None:
+    """Load the tree and print the time, the peak and the retained memory."""
+    gc.collect()
+    tracemalloc.start()
+    start: float = time.perf_counter()
+    file_system = FileSystem(str(json_path), max_resident_nodes=max_resident_nodes)
+    elapsed: float = time.perf_counter() - start
+    file_system.json_data = None
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    label: str = "whole" if max_resident_nodes is None else f"{max_resident_nodes}"
+    print(
+        f"budget {label:>8}: {elapsed:.2f}s, peak {peak / 2**20:.1f} MiB,"
+        f" retained {current / 2**20:.1f} MiB",
+    )
+
+
+def main() -> None:
+    """Run the benchmark and print the measurements."""
+    number_of_files: int = (
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUMBER_OF_FILES
+    )
+    max_resident_nodes: int = (
+        int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_MAX_RESIDENT_NODES  # noqa: PLR2004
+    )
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        json_path: Path = Path(temporary_directory) / "structure.json"
+        json_path.write_text(json.dumps(build_structure(number_of_files)))
+        print(f"{number_of_files} files, {json_path.stat().st_size / 2**20:.1f} MiB")
+        measure(json_path, None)
+        measure(json_path, max_resident_nodes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Time path completion in a very large directory.
+
+Usage: python -m benchmarks.bench_completion [NUMBER_OF_FILES]
+
+All files of a synthetic structure are placed in a single directory. The
+completion of a prefix is timed against the in-memory tree, where the first
+call sorts the names of the directory and later calls only search them,
+and against an SQLite index, which answers from its (parent, name) index
+and is what a shell completion function should call.
+
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_compressed_load import DEFAULT_NUMBER_OF_FILES, build_structure
+from src.core import FileSystem
+from src.core.index import build_index
+
+REPEATS: int = 1_000
+PREFIX: str = "dir0/file1234"
+
+
+def build_flat_structure(number_of_files: int) -> dict:
+    """Return a synthetic structure with every file in one directory."""
+    structure: dict = build_structure(number_of_files)
+    directories: list[dict] = structure["contents"]
+    for directory in directories[1:]:
+        directories[0]["contents"].extend(directory["contents"])
+    del directories[1:]
+    return structure
+
+
+def main() -> None:
+    """Run the benchmark and print one line per backend."""
+    number_of_files: int = (
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUMBER_OF_FILES
+    )
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        json_path: Path = Path(temporary_directory) / "structure.json"
+        json_path.write_text(json.dumps(build_flat_structure(number_of_files)))
+        database_path: Path = Path(temporary_directory) / "structure.sqlite"
+        build_index(json_path, database_path)
+        print(f"{number_of_files} files in one directory, completing {PREFIX!r}")
+        for name, path in (("memory", json_path), ("sqlite", database_path)):
+            start: float = time.perf_counter()
+            file_system = FileSystem(str(path))
+            ready: float = time.perf_counter() - start
+            start = time.perf_counter()
+            matches: int = len(file_system.complete(PREFIX))
+            first: float = time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in range(REPEATS):
+                file_system.complete(PREFIX)
+            later: float = (time.perf_counter() - start) / REPEATS
+            print(
+                f"{name:<7} ready {ready * 1e3:9.1f} ms, first {first * 1e3:8.2f} ms, "
+                f"then {later * 1e6:8.1f} us for {matches} matches",
+            )
+
+
+if __name__ == "__main__":
+    main()
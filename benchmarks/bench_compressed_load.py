@@ -0,0 +1,97 @@
+"""Benchmark cold-load time of compressed structure files.
+
+Usage: python -m benchmarks.bench_compressed_load [NUMBER_OF_FILES]
+
+A synthetic tree is written uncompressed and with each supported codec, then
+loaded into a `FileSystem`. The page cache is dropped for the file before
+each load where the platform supports it, so that reading from storage is
+part of the measurement.
+
+"""
+
+from __future__ import annotations
+
+import bz2
+import gzip
+import json
+import lzma
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.core import FileSystem
+
+DEFAULT_NUMBER_OF_FILES: int = 200_000
+FILES_PER_DIRECTORY: int = 1_000
+CODECS: dict[str, object] = {
+    "json": lambda data: data,
+    "json.gz": gzip.compress,
+    "json.xz": lzma.compress,
+    "json.bz2": bz2.compress,
+}
+
+
+def build_structure(number_of_files: int) -> dict:
+    """Return a synthetic structure with `number_of_files` files."""
+    directories: list[dict] = []
+    for index in range(number_of_files):
+        if index % FILES_PER_DIRECTORY == 0:
+            directories.append(
+                {
+                    "name": f"dir{index // FILES_PER_DIRECTORY}",
+                    "size": 4096,
+                    "time_modified": 1699941437,
+                    "permissions": "drwxr-xr-x",
+                    "contents": [],
+                },
+            )
+        directories[-1]["contents"].append(
+            {
+                "name": f"file{index}.txt",
+                "size": index * 7 % 100_000,
+                "time_modified": 1699941437 + index,
+                "permissions": "-rw-r--r--",
+            },
+        )
+    return {
+        "name": "root",
+        "size": 4096,
+        "time_modified": 1699941437,
+        "permissions": "drwxr-xr-x",
+        "contents": directories,
+    }
+
+
+def drop_page_cache(path: Path) -> None:
+    """Ask the kernel to evict the file from the page cache."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    with path.open(mode="rb") as file:
+        os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def main() -> None:
+    """Run the benchmark and print one line per codec."""
+    number_of_files: int = (
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUMBER_OF_FILES
+    )
+    data: bytes = json.dumps(build_structure(number_of_files)).encode()
+    print(f"{number_of_files} files, {len(data)} bytes uncompressed")
+    with tempfile.TemporaryDirectory() as directory:
+        for suffix, compress in CODECS.items():
+            path: Path = Path(directory) / f"structure.{suffix}"
+            path.write_bytes(compress(data))
+            drop_page_cache(path)
+            start: float = time.perf_counter()
+            FileSystem(str(path))
+            elapsed: float = time.perf_counter() - start
+            print(
+                f"{suffix:<9} {path.stat().st_size:>12} bytes "
+                f"{elapsed:>8.3f}s cold load",
+            )
+
+
+if __name__ == "__main__":
+    main()
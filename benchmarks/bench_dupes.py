@@ -0,0 +1,93 @@
+"""Benchmark finding duplicate candidates in a large tree.
+
+Usage: python -m benchmarks.bench_dupes [NUMBER_OF_FILES]
+
+A synthetic tree where one file in DUPLICATE_EVERY repeats the size of an
+earlier file is loaded, then grouped by size with `DuplicateIndex` and with
+a plain dictionary of lists. The time and the peak memory traced by
+`tracemalloc` while grouping are printed for both.
+
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.bench_compressed_load import DEFAULT_NUMBER_OF_FILES, build_structure
+from src.core import FileSystem
+from src.core.dupes import DuplicateIndex
+from src.core.export import iter_subtree
+
+DUPLICATE_EVERY: int = 10
+# Odd multiplier that spreads the sizes of the other files apart.
+SIZE_MULTIPLIER: int = 2_654_435_761
+MAX_SIZE: int = 2**40
+
+
+def spread_sizes(data: dict) -> dict:
+    """Give most files a unique size and repeat one size in DUPLICATE_EVERY."""
+    index: int = 0
+    sizes: list[int] = []
+    for directory in data["contents"]:
+        for entry in directory["contents"]:
+            size: int = (
+                sizes[index // 2]
+                if index % DUPLICATE_EVERY == DUPLICATE_EVERY - 1
+                else index * SIZE_MULTIPLIER % MAX_SIZE + 1
+            )
+            entry["size"] = size
+            sizes.append(size)
+            index += 1
+    return data
+
+
+def group_naively(file_system: FileSystem) -> int:
+    """Group every file by size in a dictionary of lists."""
+    groups: dict[int, list] = {}
+    for node in iter_subtree(file_system.root):
+        if not node.is_directory and node.size:
+            groups.setdefault(node.size, []).append(node)
+    return sum(len(nodes) > 1 for nodes in groups.values())
+
+
+def group_with_index(file_system: FileSystem) -> int:
+    """Group every file by size with `DuplicateIndex`."""
+    index = DuplicateIndex()
+    index.update(iter_subtree(file_system.root))
+    return len(index.groups)
+
+
+def main() -> None:
+    """Run the benchmark and print one line per strategy."""
+    number_of_files: int = (
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUMBER_OF_FILES
+    )
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        json_path: Path = Path(temporary_directory) / "structure.json"
+        json_path.write_text(json.dumps(spread_sizes(build_structure(number_of_files))))
+        file_system = FileSystem(str(json_path))
+    file_system.json_data = None
+    for name, group in (("dict of lists", group_naively), ("index", group_with_index)):
+        tracemalloc.start()
+        start: float = time.perf_counter()
+        groups: int = group(file_system)
+        elapsed: float = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{name:<14} {groups} groups in {elapsed:.3f}s, "
+            f"peak {peak / 2**20:.1f} MiB",
+        )
+    start = time.perf_counter()
+    first = next(file_system.duplicates(None))
+    elapsed = time.perf_counter() - start
+    print(f"first group after {elapsed:.3f}s, {first.wasted_bytes} bytes wasted")
+
+
+if __name__ == "__main__":
+    main()
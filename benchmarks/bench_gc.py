@@ -0,0 +1,104 @@
+"""Measure the cost of the cyclic garbage collector on a large tree.
+
+Usage: python -m benchmarks.bench_gc [NUMBER_OF_FILES]
+
+A synthetic tree is loaded with and without pausing the collector during the
+build. A full collection is then timed with the tree tracked and frozen, and
+the time to drop a tree is timed with strong and weak parent links: with
+strong links the tree is a web of cycles that only the collector can free,
+while with weak links reference counting frees it on the spot.
+
+"""
+
+from __future__ import annotations
+
+import contextlib
+import gc
+import json
+import sys
+import tempfile
+import time
+import weakref
+from pathlib import Path
+from typing import TYPE_CHECKING
+from unittest import mock
+
+from benchmarks.bench_compressed_load import DEFAULT_NUMBER_OF_FILES, build_structure
+from src.core import FileSystem
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable
+
+    from src.core.node import Node
+
+
+def timed(function: Callable[[], object]) -> float:
+    """Return the time of a call in seconds."""
+    start: float = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def build(json_path: Path, *, paused: bool) -> float:
+    """Time loading a file system, pausing the collector or not."""
+    if paused:
+        return timed(lambda: FileSystem(str(json_path)))
+    with mock.patch(
+        "src.core.file_system.paused_collection",
+        contextlib.nullcontext,
+    ):
+        return timed(lambda: FileSystem(str(json_path)))
+
+
+def collection_pause(json_path: Path, *, frozen: bool) -> float:
+    """Time a full collection with a tree loaded, frozen or not."""
+    file_system = FileSystem(str(json_path), freeze_after_build=frozen)
+    elapsed: float = timed(gc.collect)
+    gc.unfreeze()
+    del file_system
+    gc.collect()
+    return elapsed
+
+
+def release(json_path: Path, *, weak: bool) -> float:
+    """Time dropping a tree until its memory is reclaimed."""
+    root: Node | None = FileSystem(str(json_path), weak_parent_links=weak).root
+    # Frees the file system and the parsed JSON, leaving the tree alone.
+    gc.collect()
+    reference: weakref.ReferenceType[Node] = weakref.ref(root)
+
+    def drop() -> None:
+        nonlocal root
+        root = None
+        if reference() is not None:
+            gc.collect()
+
+    return timed(drop)
+
+
+def main() -> None:
+    """Run the benchmark and print one line per measurement."""
+    number_of_files: int = (
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUMBER_OF_FILES
+    )
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        json_path: Path = Path(temporary_directory) / "structure.json"
+        json_path.write_text(json.dumps(build_structure(number_of_files)))
+        gc.collect()
+        print(f"{number_of_files} files")
+        for paused in (False, True):
+            label: str = "paused" if paused else "enabled"
+            elapsed: float = build(json_path, paused=paused)
+            print(f"build, collector {label:<8} {elapsed:8.3f}s")
+        for frozen in (False, True):
+            label = "frozen" if frozen else "tracked"
+            elapsed = collection_pause(json_path, frozen=frozen)
+            print(f"gc.collect, tree {label:<8} {elapsed:8.3f}s")
+        for weak in (False, True):
+            label = "weak" if weak else "strong"
+            elapsed = release(json_path, weak=weak)
+            print(f"release, {label:<6} links     {elapsed:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
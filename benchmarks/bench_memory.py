@@ -0,0 +1,47 @@
+"""Report the memory held by a large loaded tree.
+
+Usage: python -m benchmarks.bench_memory [NUMBER_OF_FILES]
+
+A synthetic tree is loaded while `tracemalloc` is tracing, the parsed JSON
+is dropped, and `FileSystem.memory_report` breaks down what the tree holds.
+Comparing the bytes per node between revisions catches memory regressions.
+
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.bench_compressed_load import DEFAULT_NUMBER_OF_FILES, build_structure
+from src.core import FileSystem
+
+
+def main() -> None:
+    """Run the benchmark and print the report."""
+    number_of_files: int = (
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUMBER_OF_FILES
+    )
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        json_path: Path = Path(temporary_directory) / "structure.json"
+        json_path.write_text(json.dumps(build_structure(number_of_files)))
+        tracemalloc.start()
+        file_system = FileSystem(str(json_path))
+        # Only the tree itself is of interest here.
+        file_system.json_data = None
+        gc.collect()
+        start: float = time.perf_counter()
+        report = file_system.memory_report(None)
+        elapsed: float = time.perf_counter() - start
+        tracemalloc.stop()
+    print(report.report())
+    print(f"\nwalked in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Compare the SQLite index with the in-memory tree.
+
+Usage: python -m benchmarks.bench_sqlite_index [NUMBER_OF_FILES]
+
+A synthetic tree is loaded into a `FileSystem` and imported into an SQLite
+index. The time to get ready and the memory held are reported for both,
+followed by the time of a few typical queries. With the index, the queries
+only touch the listed directory or page, so their cost stays flat as the
+tree grows, while loading the in-memory tree grows with its size.
+
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from benchmarks.bench_compressed_load import (
+    DEFAULT_NUMBER_OF_FILES,
+    FILES_PER_DIRECTORY,
+    build_structure,
+)
+from src.core import FileSystem
+from src.core.index import build_index
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable
+
+REPEATS: int = 200
+PAGE_SIZE: int = 50
+
+
+def measure(function: Callable[[], object]) -> float:
+    """Return the mean time of a call in microseconds."""
+    start: float = time.perf_counter()
+    for _ in range(REPEATS):
+        function()
+    return (time.perf_counter() - start) / REPEATS * 1e6
+
+
+def load(path: Path) -> tuple[FileSystem, float, int]:
+    """Load a file system, returning it with the time and memory it took."""
+    tracemalloc.start()
+    start: float = time.perf_counter()
+    file_system = FileSystem(str(path))
+    elapsed: float = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return file_system, elapsed, memory
+
+
+def queries(file_system: FileSystem, directory: str) -> dict[str, float]:
+    """Time typical queries against a file system."""
+    options: dict[str, bool | None] = {
+        "include_all_details": True,
+        "show_hidden_files": False,
+        "sort_in_reverse": False,
+        "display_sizes_in_human_readable_format": False,
+        "filter_by_type": None,
+    }
+    # Without memoisation, so that every call runs the query.
+    file_system.result_cache.max_entries = 0
+    file_system.listing_cache.max_entries = 0
+    _, cursor = file_system.ls_page(
+        name_or_path_to_node=directory,
+        page_size=PAGE_SIZE,
+        after=None,
+        sort_by_last_modified_time=True,
+        **options,
+    )
+    return {
+        "fetch_node": measure(
+            lambda: file_system.fetch_node(f"{directory}/file1.txt"),
+        ),
+        "ls -l -t": measure(
+            lambda: file_system.ls(
+                name_or_path_to_node=directory,
+                sort_by_last_modified_time=True,
+                **options,
+            ),
+        ),
+        f"page of {PAGE_SIZE}": measure(
+            lambda: file_system.ls_page(
+                name_or_path_to_node=directory,
+                page_size=PAGE_SIZE,
+                after=cursor,
+                sort_by_last_modified_time=True,
+                **options,
+            ),
+        ),
+    }
+
+
+def main() -> None:
+    """Run the benchmark and print one line per backend and query."""
+    number_of_files: int = (
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUMBER_OF_FILES
+    )
+    directory: str = f"dir{number_of_files // FILES_PER_DIRECTORY // 2}"
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        json_path: Path = Path(temporary_directory) / "structure.json"
+        json_path.write_text(json.dumps(build_structure(number_of_files)))
+        database_path: Path = Path(temporary_directory) / "structure.sqlite"
+        start: float = time.perf_counter()
+        build_index(json_path, database_path)
+        print(
+            f"{number_of_files} files, index built in "
+            f"{time.perf_counter() - start:.3f}s, "
+            f"{database_path.stat().st_size} bytes",
+        )
+        for name, path in (("memory", json_path), ("sqlite", database_path)):
+            file_system, elapsed, memory = load(path)
+            print(f"{name:<7} ready in {elapsed:8.3f}s, {memory / 2**20:8.1f} MiB")
+            for query, microseconds in queries(file_system, directory).items():
+                print(f"{name:<7} {query:<12} {microseconds:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
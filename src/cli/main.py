@@ -1,8 +1,25 @@
 """CLI definitions."""
 
 import argparse
+import locale
+import shutil
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import TYPE_CHECKING
 
 from src.core import FileSystem
+from src.core.dupes import render_duplicates
+from src.core.export import EXPORT_FORMATS, OUTPUT_FORMATS
+from src.core.index import build_index
+from src.core.sorting import SORT_ORDERS
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable
+
+WATCH_INTERVAL: float = 1.0
+CLEAR_SCREEN: str = "\x1b[H\x1b[2J"
 
 
 def create_argument_parser() -> argparse.Namespace:
@@ -41,6 +58,20 @@ def create_argument_parser() -> argparse.Namespace:
         help="use a long listing format",
     )
 
+    parser.add_argument(
+        "-C",
+        dest="columns",
+        action="store_true",
+        help="list entries by columns fitting the terminal width",
+    )
+
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=OUTPUT_FORMATS,
+        help="print the listed entries as 'json' or 'ndjson', overriding -l",
+    )
+
     parser.add_argument(
         "-r",
         dest="reverse",
@@ -55,6 +86,15 @@ def create_argument_parser() -> argparse.Namespace:
         help="sort by time, newest first",
     )
 
+    parser.add_argument(
+        "--sort",
+        dest="sort_by",
+        choices=SORT_ORDERS,
+        help="sort by WORD instead of name, overriding -t;\n"
+        f"WORD is one of {', '.join(SORT_ORDERS)}",
+        metavar="WORD",
+    )
+
     parser.add_argument(
         "-h",
         dest="human_readable",
@@ -70,6 +110,131 @@ def create_argument_parser() -> argparse.Namespace:
         nargs="?",
     )
 
+    parser.add_argument(
+        "--export",
+        dest="export_format",
+        choices=EXPORT_FORMATS,
+        help="stream every entry below PATH as 'ndjson' or 'csv'",
+    )
+
+    parser.add_argument(
+        "--output",
+        dest="output",
+        metavar="FILE",
+        help="with --export, write to FILE instead of stdout",
+    )
+
+    parser.add_argument(
+        "--page-size",
+        dest="page_size",
+        type=positive_integer,
+        metavar="N",
+        help="list at most N entries and print a cursor for the next page",
+    )
+
+    parser.add_argument(
+        "--after",
+        dest="after",
+        metavar="CURSOR",
+        help="with --page-size, continue after the given cursor",
+    )
+
+    parser.add_argument(
+        "--diff",
+        dest="diff",
+        nargs=2,
+        metavar=("OLD", "NEW"),
+        help="list what changed below PATH between two structure files",
+    )
+
+    parser.add_argument(
+        "--stats-report",
+        dest="stats_report",
+        action="store_true",
+        help="print counts, sizes, ages and depths of every entry below PATH",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        dest="jobs",
+        type=positive_integer,
+        default=1,
+        metavar="N",
+        help="with --stats-report, walk the top-level subtrees in N processes",
+    )
+
+    parser.add_argument(
+        "--watch",
+        dest="watch",
+        nargs="?",
+        const=WATCH_INTERVAL,
+        type=positive_number,
+        metavar="SECONDS",
+        help="keep listing PATH, checking structure.json every SECONDS (1)\n"
+        "and printing the listing again when it changes",
+    )
+
+    parser.add_argument(
+        "--index",
+        dest="index",
+        metavar="DATABASE",
+        help="read the tree from an index built with --build-index",
+    )
+
+    parser.add_argument(
+        "--build-index",
+        dest="build_index",
+        metavar="DATABASE",
+        help="import structure.json into an SQLite index and exit",
+    )
+
+    parser.add_argument(
+        "--complete",
+        dest="complete",
+        metavar="PARTIAL_PATH",
+        help="print the paths starting with PARTIAL_PATH, one per line,\n"
+        "for shell completion",
+    )
+
+    parser.add_argument(
+        "--tree",
+        dest="tree",
+        action="store_true",
+        help="print every entry below PATH as an indented tree,\n"
+        "applying -A, -r, -t, --sort and --filter to each directory",
+    )
+
+    parser.add_argument(
+        "-L",
+        dest="max_depth",
+        type=positive_integer,
+        metavar="LEVEL",
+        help="with --tree, descend at most LEVEL directories deep",
+    )
+
+    parser.add_argument(
+        "--memory-report",
+        dest="memory_report",
+        action="store_true",
+        help="print the memory held by the loaded tree below PATH,\n"
+        "by category and node type",
+    )
+
+    parser.add_argument(
+        "--dupes",
+        dest="dupes",
+        action="store_true",
+        help="print groups of files of the same size below PATH,\n"
+        "the most wasted bytes first; -h applies to the sizes",
+    )
+
+    parser.add_argument(
+        "--by-name",
+        dest="dupes_by_name",
+        action="store_true",
+        help="with --dupes, group files by name and size",
+    )
+
     parser.add_argument(
         "path",
         nargs="?",
@@ -83,7 +248,70 @@ def create_argument_parser() -> argparse.Namespace:
         help="Show this help message and exit",
     )
 
-    return parser.parse_args()
+    args: argparse.Namespace = parser.parse_args()
+    if args.after is not None and args.page_size is None:
+        parser.error("--after requires --page-size")
+    return args
+
+
+def positive_integer(value: str) -> int:
+    """Parse a strictly positive integer argument.
+
+    Parameters
+    ----------
+    value : str
+        The raw argument.
+
+    Returns
+    -------
+    int
+        The parsed integer.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the value is not a positive integer.
+
+    """
+    try:
+        number: int = int(value)
+    except ValueError as error:
+        error_message: str = f"invalid positive integer: {value!r}"
+        raise argparse.ArgumentTypeError(error_message) from error
+    if number < 1:
+        error_message = f"invalid positive integer: {value!r}"
+        raise argparse.ArgumentTypeError(error_message)
+    return number
+
+
+def positive_number(value: str) -> float:
+    """Parse a strictly positive number argument.
+
+    Parameters
+    ----------
+    value : str
+        The raw argument.
+
+    Returns
+    -------
+    float
+        The parsed number.
+
+    Raises
+    ------
+    argparse.ArgumentTypeError
+        If the value is not a positive number.
+
+    """
+    try:
+        number: float = float(value)
+    except ValueError as error:
+        error_message: str = f"invalid positive number: {value!r}"
+        raise argparse.ArgumentTypeError(error_message) from error
+    if not number > 0:
+        error_message = f"invalid positive number: {value!r}"
+        raise argparse.ArgumentTypeError(error_message)
+    return number
 
 
 def execute_parser() -> None:
@@ -101,9 +329,70 @@ def execute_parser() -> None:
 
     """
     args: argparse.Namespace = create_argument_parser()
-    file_system = FileSystem()
+    if args.diff is not None:
+        diff(args)
+        return
+
+    if args.build_index is not None:
+        count: int = build_index(Path("structure.json"), Path(args.build_index))
+        print(f"indexed {count} entries into {args.build_index}")
+        return
+
+    if args.sort_by == "locale":
+        try:
+            locale.setlocale(locale.LC_COLLATE, "")
+        except locale.Error:
+            print("warning: unsupported locale, sorting by codepoint", file=sys.stderr)
+
+    if args.memory_report:
+        # Started before loading, so that the whole load is traced.
+        tracemalloc.start()
+
+    # A watched tree lives for the whole session, so it is kept out of the
+    # collector's way, and each reload frees the previous one without it.
+    watching: bool = args.watch is not None
+    file_system = FileSystem(
+        "structure.json" if args.index is None else args.index,
+        weak_parent_links=watching,
+        freeze_after_build=watching,
+    )
+
+    # The first requested mode runs instead of the plain listing.
+    modes: tuple[tuple[bool, Callable[[FileSystem, argparse.Namespace], None]], ...] = (
+        (args.complete is not None, complete),
+        (args.tree, tree),
+        (args.dupes, dupes),
+        (args.export_format is not None, export),
+        (args.stats_report, stats_report),
+        (args.memory_report, memory_report),
+        (args.page_size is not None, list_page),
+        (watching, watch),
+    )
+    for requested, mode in modes:
+        if requested:
+            mode(file_system, args)
+            return
+
+    print(list_directory(file_system, args))
+
 
-    results: str = file_system.ls(
+def list_directory(file_system: FileSystem, args: argparse.Namespace) -> str:
+    """Return the listing of the requested path.
+
+    Parameters
+    ----------
+    file_system : FileSystem
+        The loaded file system.
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    Returns
+    -------
+    str
+        The output of `FileSystem.ls`.
+
+    """
+    return file_system.ls(
         include_all_details=args.long_format,
         name_or_path_to_node=args.path,
         show_hidden_files=args.all_files,
@@ -111,5 +400,242 @@ def execute_parser() -> None:
         sort_by_last_modified_time=args.sort_by_time,
         display_sizes_in_human_readable_format=args.human_readable,
         filter_by_type=args.filter,
+        sort_by=args.sort_by,
+        output_format=args.output_format,
+        width=shutil.get_terminal_size().columns if args.columns else None,
     )
+
+
+def watch(file_system: FileSystem, args: argparse.Namespace) -> None:
+    """Print the listing of the requested path whenever it changes.
+
+    The structure file is polled with `FileSystem.reload`, which only
+    stats the file while it is unchanged. After a reload, the Merkle hash
+    of the path tells whether anything below it changed, and the listing
+    is only printed again if it differs from the previous one. A file that
+    cannot be read, such as one caught in the middle of a rewrite, is
+    reported on stderr and read again on the next poll, while the previous
+    tree keeps being served. Stops on Ctrl-C.
+
+    Parameters
+    ----------
+    file_system : FileSystem
+        The loaded file system.
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    """
+    clear_screen: str = CLEAR_SCREEN if sys.stdout.isatty() else ""
+    content_hash: str | None = file_system.content_hash(args.path)
+    results: str = list_directory(file_system, args)
+    print(f"{clear_screen}{results}", flush=True)
+    # The last reload error printed, so that a file that stays invalid is
+    # only reported once.
+    reload_error: str | None = None
+    try:
+        while True:
+            time.sleep(args.watch)
+            try:
+                if not file_system.reload():
+                    continue
+            except (OSError, EOFError, ValueError) as error:
+                if str(error) != reload_error:
+                    reload_error = str(error)
+                    print(f"error: {reload_error}", file=sys.stderr, flush=True)
+                continue
+            reload_error = None
+            new_content_hash: str | None = file_system.content_hash(args.path)
+            if new_content_hash is not None and new_content_hash == content_hash:
+                continue
+            content_hash = new_content_hash
+            new_results: str = list_directory(file_system, args)
+            if new_results != results:
+                results = new_results
+                print(f"{clear_screen}{results}", flush=True)
+    except KeyboardInterrupt:
+        return
+
+
+def list_page(file_system: FileSystem, args: argparse.Namespace) -> None:
+    """Print one page of the requested directory.
+
+    The cursor of the next page, if any, is printed to stderr.
+
+    Parameters
+    ----------
+    file_system : FileSystem
+        The loaded file system.
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    """
+    try:
+        results, cursor = file_system.ls_page(
+            include_all_details=args.long_format,
+            name_or_path_to_node=args.path,
+            show_hidden_files=args.all_files,
+            sort_in_reverse=args.reverse,
+            sort_by_last_modified_time=args.sort_by_time,
+            display_sizes_in_human_readable_format=args.human_readable,
+            filter_by_type=args.filter,
+            sort_by=args.sort_by,
+            page_size=args.page_size,
+            after=args.after,
+        )
+    except ValueError as error:
+        print(f"error: {error}")
+        return
     print(results)
+    if cursor is not None:
+        print(f"next page: --after {cursor}", file=sys.stderr)
+
+
+def diff(args: argparse.Namespace) -> None:
+    """Print the differences between two structure files.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    """
+    old_path, new_path = args.diff
+    old_file_system = FileSystem(old_path)
+    new_file_system = FileSystem(new_path)
+    for entry in old_file_system.diff(new_file_system, args.path):
+        print(entry)
+
+
+def export(file_system: FileSystem, args: argparse.Namespace) -> None:
+    """Export the tree below the requested path.
+
+    Parameters
+    ----------
+    file_system : FileSystem
+        The loaded file system.
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    """
+    try:
+        if args.output is None:
+            file_system.export(
+                name_or_path_to_node=args.path,
+                output=sys.stdout,
+                export_format=args.export_format,
+            )
+            return
+        with Path(args.output).open(mode="w", newline="") as output:
+            file_system.export(
+                name_or_path_to_node=args.path,
+                output=output,
+                export_format=args.export_format,
+            )
+    except FileNotFoundError as error:
+        print(f"error: {error}")
+
+
+def tree(file_system: FileSystem, args: argparse.Namespace) -> None:
+    """Print the tree below the requested path.
+
+    Parameters
+    ----------
+    file_system : FileSystem
+        The loaded file system.
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    """
+    try:
+        file_system.tree(
+            name_or_path_to_node=args.path,
+            output=sys.stdout,
+            max_depth=args.max_depth,
+            show_hidden_files=args.all_files,
+            sort_in_reverse=args.reverse,
+            sort_by_last_modified_time=args.sort_by_time,
+            filter_by_type=args.filter,
+            sort_by=args.sort_by,
+        )
+    except FileNotFoundError as error:
+        print(f"error: {error}")
+
+
+def dupes(file_system: FileSystem, args: argparse.Namespace) -> None:
+    """Print the groups of candidate duplicates below the requested path.
+
+    Parameters
+    ----------
+    file_system : FileSystem
+        The loaded file system.
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    """
+    try:
+        groups = file_system.duplicates(args.path, match_names=args.dupes_by_name)
+    except FileNotFoundError as error:
+        print(f"error: {error}")
+        return
+    sys.stdout.writelines(
+        f"{line}\n"
+        for line in render_duplicates(
+            groups,
+            display_sizes_in_human_readable_format=args.human_readable,
+        )
+    )
+
+
+def complete(file_system: FileSystem, args: argparse.Namespace) -> None:
+    """Print the completions of a partial path, one per line.
+
+    Parameters
+    ----------
+    file_system : FileSystem
+        The loaded file system.
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    """
+    for path in file_system.complete(args.complete, show_hidden_files=args.all_files):
+        print(path)
+
+
+def memory_report(file_system: FileSystem, args: argparse.Namespace) -> None:
+    """Print the memory held by the tree below the requested path.
+
+    Parameters
+    ----------
+    file_system : FileSystem
+        The loaded file system.
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    """
+    try:
+        report = file_system.memory_report(args.path)
+    except FileNotFoundError as error:
+        print(f"error: {error}")
+        return
+    finally:
+        tracemalloc.stop()
+    print(report.report())
+
+
+def stats_report(file_system: FileSystem, args: argparse.Namespace) -> None:
+    """Print the statistics of the tree below the requested path.
+
+    Parameters
+    ----------
+    file_system : FileSystem
+        The loaded file system.
+    args : argparse.Namespace
+        The parsed command line arguments.
+
+    """
+    try:
+        stats = file_system.stats_report(args.path, workers=args.jobs)
+    except FileNotFoundError as error:
+        print(f"error: {error}")
+        return
+    print(stats.report())
@@ -0,0 +1,111 @@
+"""Bounded caches validated by node revisions."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable, Hashable
+
+
+class RevisionCache[T]:
+    """Least-recently-used cache whose entries are tied to a revision.
+
+    An entry is only reused while the revision it was computed for is
+    current, so bumping the revision of a directory invalidates exactly
+    the entries computed from it.
+
+    Parameters
+    ----------
+    max_entries : int
+        The maximum number of entries kept.
+
+    Attributes
+    ----------
+    hits : int
+        The number of lookups served from the cache.
+    misses : int
+        The number of lookups that had to compute the value.
+    evictions : int
+        The number of entries dropped to respect the bound.
+    invalidations : int
+        The number of entries recomputed because their revision changed.
+
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        """Initialise an empty cache."""
+        self.max_entries: int = max_entries
+        self.entries: OrderedDict[Hashable, tuple[int, T]] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.invalidations: int = 0
+        # Guards the bookkeeping only; values are built outside of it.
+        self.lock: threading.Lock = threading.Lock()
+
+    def get(self, key: Hashable, revision: int, build: Callable[[], T]) -> T:
+        """Return the cached value for `key`, rebuilding it if stale.
+
+        Parameters
+        ----------
+        key : Hashable
+            The cache key.
+        revision : int
+            The current revision of the data the value is computed from.
+        build : Callable[[], T]
+            Function computing the value on a miss.
+
+        Returns
+        -------
+        T
+            The cached or freshly computed value.
+
+        """
+        with self.lock:
+            entry: tuple[int, T] | None = self.entries.get(key)
+            if entry is not None and entry[0] == revision:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return entry[1]
+            self.misses += 1
+            if entry is not None:
+                self.invalidations += 1
+        value: T = build()
+        with self.lock:
+            self.entries[key] = (revision, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def discard(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Drop the entries whose key matches, e.g. once their data is gone.
+
+        Parameters
+        ----------
+        predicate : Callable[[Hashable], bool]
+            Function telling whether the entry of a key must be dropped.
+
+        """
+        with self.lock:
+            for key in [key for key in self.entries if predicate(key)]:
+                del self.entries[key]
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. once the tree they refer to is replaced."""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Return the counters and the current number of entries."""
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
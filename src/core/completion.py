@@ -0,0 +1,74 @@
+"""Prefix completion of paths."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from operator import attrgetter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterable
+
+    from src.core.node import Node
+
+MAX_CACHED_NAME_INDEXES: int = 64
+
+
+def prefix_bound(prefix: str) -> str | None:
+    """Return the smallest string greater than every string with a prefix.
+
+    Parameters
+    ----------
+    prefix : str
+        The prefix, e.g. 'pars'.
+
+    Returns
+    -------
+    str | None
+        The exclusive upper bound, e.g. 'part', None if there is none.
+
+    """
+    stripped: str = prefix.rstrip(chr(0x10FFFF))
+    if not stripped:
+        return None
+    return stripped[:-1] + chr(ord(stripped[-1]) + 1)
+
+
+class NameIndex:
+    """Children of a directory in ascending codepoint order of their names.
+
+    Parameters
+    ----------
+    nodes : Iterable[Node]
+        The nodes to index.
+
+    """
+
+    def __init__(self, nodes: Iterable[Node]) -> None:
+        """Sort the nodes once."""
+        self.nodes: list[Node] = sorted(nodes, key=attrgetter("name"))
+        self.names: list[str] = [node.name for node in self.nodes]
+
+    def matches(self, prefix: str) -> list[Node]:
+        """Return the nodes whose name starts with a prefix.
+
+        Two binary searches delimit the matches, so a lookup costs
+        O(log n + k) for k matches.
+
+        Parameters
+        ----------
+        prefix : str
+            The prefix, '' for every node.
+
+        Returns
+        -------
+        list[Node]
+            The matching nodes, sorted by name.
+
+        """
+        start: int = bisect_left(self.names, prefix)
+        bound: str | None = prefix_bound(prefix)
+        stop: int = (
+            len(self.names) if bound is None else bisect_left(self.names, bound, start)
+        )
+        return self.nodes[start:stop]
@@ -0,0 +1,214 @@
+"""Differences between two snapshots of a tree."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple
+
+from src.core.export import iter_subtree
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Generator, Iterator
+
+    from src.core.node import Node
+
+
+class DiffEntry(NamedTuple):
+    """A single difference between two trees.
+
+    Attributes
+    ----------
+    status : str
+        'added', 'removed' or 'modified' for an entry, or 'total' for the
+        summary of a directory with changes below it.
+    relative_path : str
+        The path of the entry.
+    size_delta : int
+        The change of the total size of the entry and everything below it.
+
+    """
+
+    status: str
+    relative_path: str
+    size_delta: int
+
+    def __str__(self) -> str:
+        """Return the entry as a tab-separated line."""
+        return f"{self.status}\t{self.size_delta:+d}\t{self.relative_path}"
+
+
+def subtree_size(node: Node) -> int:
+    """Return the total size of a node and everything below it.
+
+    Parameters
+    ----------
+    node : Node
+        The node.
+
+    Returns
+    -------
+    int
+        The sum of the sizes.
+
+    """
+    if not node.is_directory:
+        return node.size
+    return node.size + sum(child.size for child in iter_subtree(node))
+
+
+def display_path(node: Node) -> str:
+    """Return the relative path of a node, '.' for the root.
+
+    The root is told by its depth, since nodes read from an index have no
+    parent node.
+    """
+    return "." if node.depth == 0 else node.relative_path
+
+
+def is_identical(old_node: Node, new_node: Node) -> bool:
+    """Check whether two subtrees are identical from their hashes alone.
+
+    Parameters
+    ----------
+    old_node : Node
+        The node in the old tree.
+    new_node : Node
+        The node in the new tree.
+
+    Returns
+    -------
+    bool
+        Whether the hashes match and cover the whole subtrees.
+
+    """
+    return (
+        old_node.content_hash is not None
+        and old_node.content_hash == new_node.content_hash
+        and (not old_node.is_directory or old_node.hashed_children() is not None)
+        and (not new_node.is_directory or new_node.hashed_children() is not None)
+    )
+
+
+def diff_trees(old_node: Node | None, new_node: Node | None) -> Iterator[DiffEntry]:
+    """Stream the differences between two trees.
+
+    Both trees are walked in parallel, and subtrees with equal Merkle
+    hashes are skipped, so the cost grows with the number of changes
+    rather than with the size of the trees. A directory's summary is
+    yielded after the differences below it.
+
+    Parameters
+    ----------
+    old_node : Node | None
+        The root of the old tree, None if it does not exist.
+    new_node : Node | None
+        The root of the new tree, None if it does not exist.
+
+    Yields
+    ------
+    DiffEntry
+        The differences, in depth-first order.
+
+    """
+    if old_node is None:
+        if new_node is not None:
+            yield DiffEntry(
+                status="added",
+                relative_path=display_path(new_node),
+                size_delta=subtree_size(new_node),
+            )
+        return
+    if new_node is None:
+        yield DiffEntry(
+            status="removed",
+            relative_path=display_path(old_node),
+            size_delta=-subtree_size(old_node),
+        )
+        return
+    yield from _diff_nodes(old_node, new_node)
+
+
+def _diff_nodes(
+    old_node: Node,
+    new_node: Node,
+) -> Generator[DiffEntry, None, tuple[int, bool]]:
+    """Yield the differences between two nodes at the same path.
+
+    Unhashed subtrees, such as those read from an index, are compared
+    entry by entry, so a directory only gets a summary when something
+    below it differs.
+
+    Parameters
+    ----------
+    old_node : Node
+        The node in the old tree.
+    new_node : Node
+        The node in the new tree.
+
+    Yields
+    ------
+    DiffEntry
+        The differences.
+
+    Returns
+    -------
+    tuple[int, bool]
+        The change of the total size of the subtree, and whether anything
+        in it differs.
+
+    """
+    if is_identical(old_node, new_node):
+        return 0, False
+    path: str = display_path(new_node)
+    if old_node.is_directory != new_node.is_directory:
+        old_size: int = subtree_size(old_node)
+        new_size: int = subtree_size(new_node)
+        yield DiffEntry(status="removed", relative_path=path, size_delta=-old_size)
+        yield DiffEntry(status="added", relative_path=path, size_delta=new_size)
+        return new_size - old_size, True
+
+    size_delta: int = new_node.size - old_node.size
+    changed: bool = False
+    if (
+        old_node.size,
+        old_node.time_modified_int,
+        old_node.permissions,
+    ) != (
+        new_node.size,
+        new_node.time_modified_int,
+        new_node.permissions,
+    ):
+        changed = True
+        yield DiffEntry(status="modified", relative_path=path, size_delta=size_delta)
+    if not new_node.is_directory:
+        return size_delta, changed
+
+    old_children: dict[str, Node] = old_node.children or {}
+    new_children: dict[str, Node] = new_node.children or {}
+    for name, old_child in old_children.items():
+        new_child: Node | None = new_children.get(name)
+        if new_child is None:
+            removed_size: int = subtree_size(old_child)
+            size_delta -= removed_size
+            changed = True
+            yield DiffEntry(
+                status="removed",
+                relative_path=display_path(old_child),
+                size_delta=-removed_size,
+            )
+        else:
+            child_delta, child_changed = yield from _diff_nodes(old_child, new_child)
+            size_delta += child_delta
+            changed = changed or child_changed
+    for name, added_child in new_children.items():
+        if name not in old_children:
+            added_size: int = subtree_size(added_child)
+            size_delta += added_size
+            changed = True
+            yield DiffEntry(
+                status="added",
+                relative_path=display_path(added_child),
+                size_delta=added_size,
+            )
+    if changed:
+        yield DiffEntry(status="total", relative_path=path, size_delta=size_delta)
+    return size_delta, changed
@@ -0,0 +1,196 @@
+"""Candidate duplicate files, grouped by size or by name and size."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, NamedTuple
+
+from src.core.formatting import format_size
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterable, Iterator
+
+    from src.core.node import Node
+
+
+class DuplicateGroup(NamedTuple):
+    """Files that may be copies of each other.
+
+    Attributes
+    ----------
+    size : int
+        The size of each file in bytes.
+    name : str | None
+        The name shared by the files, None if they were grouped by size only.
+    nodes : list[Node]
+        The files, at least two, ordered by path.
+
+    """
+
+    size: int
+    name: str | None
+    nodes: list[Node]
+
+    @property
+    def wasted_bytes(self) -> int:
+        """Get the bytes freed by keeping a single file of the group."""
+        return self.size * (len(self.nodes) - 1)
+
+
+class DuplicateIndex:
+    """Files grouped by size in a single pass, keeping only repeated sizes.
+
+    A size seen once maps to its file in a plain dictionary, and only moves
+    to a list when a second file of the same size turns up, so the unique
+    sizes that make up most of a large tree never allocate a group. Names
+    are only compared within the groups of repeated sizes, when the groups
+    are read.
+
+    Empty files are skipped: there are no bytes to reclaim.
+
+    Parameters
+    ----------
+    match_names : bool, optional
+        Whether files must also have the same name, by default False.
+
+    Attributes
+    ----------
+    files : int
+        The number of files added.
+    groups : dict[int, list[Node]]
+        The files per size, for sizes shared by at least two files.
+
+    """
+
+    def __init__(self, *, match_names: bool = False) -> None:
+        """Initialise an empty index."""
+        self.match_names: bool = match_names
+        self.files: int = 0
+        self.groups: dict[int, list[Node]] = {}
+        # Sizes seen exactly once so far, and their file; None once the
+        # groups are read.
+        self.__single: dict[int, Node] | None = {}
+
+    def add(self, node: Node) -> None:
+        """Account for one entry; directories and empty files are ignored.
+
+        Parameters
+        ----------
+        node : Node
+            The entry.
+
+        Raises
+        ------
+        ValueError
+            If the groups have already been read.
+
+        """
+        size: int = node.size
+        if node.is_directory or not size:
+            return
+        single: dict[int, Node] | None = self.__single
+        if single is None:
+            error_message: str = "Cannot add files once the groups are read"
+            raise ValueError(error_message)
+        self.files += 1
+        group: list[Node] | None = self.groups.get(size)
+        if group is not None:
+            group.append(node)
+            return
+        first: Node | None = single.pop(size, None)
+        if first is None:
+            single[size] = node
+        else:
+            self.groups[size] = [first, node]
+
+    def update(self, nodes: Iterable[Node]) -> None:
+        """Account for several entries.
+
+        Parameters
+        ----------
+        nodes : Iterable[Node]
+            The entries.
+
+        """
+        for node in nodes:
+            self.add(node)
+
+    def iter_groups(self) -> Iterator[DuplicateGroup]:
+        """Iterate over the groups, the most wasted bytes first.
+
+        The groups are ordered when this is called, and the files seen once
+        are dropped at that point, so that they are not held while the
+        groups are read; no file can be added afterwards. Only the sort
+        keys are ordered up front; the files of a group are sorted by path
+        when the group is yielded.
+
+        Returns
+        -------
+        Iterator[DuplicateGroup]
+            Each group of at least two files, by decreasing wasted bytes,
+            then decreasing size, then name.
+
+        """
+        keys: list[tuple[int, int, str, list[Node]]] = []
+        for size, nodes in self.groups.items():
+            if not self.match_names:
+                keys.append((size * (len(nodes) - 1), size, "", nodes))
+                continue
+            by_name: dict[str, list[Node]] = {}
+            for node in nodes:
+                by_name.setdefault(node.name, []).append(node)
+            keys.extend(
+                (size * (len(named) - 1), size, name, named)
+                for name, named in by_name.items()
+                if len(named) > 1
+            )
+        keys.sort(key=lambda key: (-key[0], -key[1], key[2]))
+        self.__single = None
+        return self.__iter_sorted_groups(keys)
+
+    def __iter_sorted_groups(
+        self,
+        keys: list[tuple[int, int, str, list[Node]]],
+    ) -> Iterator[DuplicateGroup]:
+        """Yield the groups of sorted keys, sorting their files by path."""
+        for _, size, name, nodes in keys:
+            yield DuplicateGroup(
+                size=size,
+                name=name if self.match_names else None,
+                nodes=sorted(nodes, key=lambda node: node.relative_path),
+            )
+
+
+def render_duplicates(
+    groups: Iterable[DuplicateGroup],
+    *,
+    display_sizes_in_human_readable_format: bool = False,
+) -> Iterator[str]:
+    """Render groups of duplicates as text, one line at a time.
+
+    Each group starts with a line of the wasted bytes, the size and the
+    number of files, separated by tabs, followed by one path per line.
+    Groups are separated by an empty line.
+
+    Parameters
+    ----------
+    groups : Iterable[DuplicateGroup]
+        The groups to render.
+    display_sizes_in_human_readable_format : bool, optional
+        Whether to print sizes like 1K 234M 2G, by default False.
+
+    Yields
+    ------
+    str
+        The lines, without line endings.
+
+    """
+    size_formatter = format_size if display_sizes_in_human_readable_format else str
+    for index, group in enumerate(groups):
+        if index:
+            yield ""
+        yield (
+            f"{size_formatter(group.wasted_bytes)}\t{size_formatter(group.size)}"
+            f"\t{len(group.nodes)}"
+        )
+        for node in group.nodes:
+            yield node.relative_path
@@ -0,0 +1,168 @@
+"""Streaming export of the tree."""
+
+from __future__ import annotations
+
+import csv
+import json
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterator, Sequence
+    from typing import TextIO
+
+    from src.core.node import Node
+
+EXPORT_FIELDS: tuple[str, ...] = (
+    "relative_path",
+    "type",
+    "size",
+    "mtime",
+    "permissions",
+    "depth",
+)
+EXPORT_FORMATS: tuple[str, ...] = ("ndjson", "csv")
+OUTPUT_FORMATS: tuple[str, ...] = ("json", "ndjson")
+
+
+def iter_subtree(node: Node) -> Iterator[Node]:
+    """Iterate depth-first over the nodes below a directory.
+
+    The traversal keeps one iterator per level on its stack, so memory use
+    is proportional to the depth of the tree, not its size. A file yields
+    only itself.
+
+    Parameters
+    ----------
+    node : Node
+        The node to start from.
+
+    Yields
+    ------
+    Node
+        The nodes in depth-first pre-order.
+
+    """
+    children: dict[str, Node] | None = node.children
+    if children is None:
+        yield node
+        return
+    stack: list[Iterator[Node]] = [iter(children.values())]
+    while stack:
+        child: Node | None = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+            continue
+        yield child
+        if child.is_directory and (grandchildren := child.children):
+            stack.append(iter(grandchildren.values()))
+
+
+def node_type(node: Node) -> str:
+    """Return 'dir' or 'file', matching the values of '--filter'."""
+    return "dir" if node.is_directory else "file"
+
+
+def json_record(node: Node) -> str:
+    """Serialise one node as a JSON object with the EXPORT_FIELDS.
+
+    The object is written directly rather than built as a dict and passed
+    to `json.dumps`; only the strings need escaping.
+
+    Parameters
+    ----------
+    node : Node
+        The node to serialise.
+
+    Returns
+    -------
+    str
+        The JSON object, on a single line.
+
+    """
+    return (
+        f'{{"relative_path": {json.dumps(node.relative_path)}, '
+        f'"type": "{node_type(node)}", "size": {node.size}, '
+        f'"mtime": {node.time_modified_int}, '
+        f'"permissions": {json.dumps(node.permissions)}, '
+        f'"depth": {node.depth}}}'
+    )
+
+
+def render_records(nodes: Sequence[Node], output_format: str) -> str:
+    """Serialise listed nodes as a JSON array or as NDJSON.
+
+    Parameters
+    ----------
+    nodes : Sequence[Node]
+        The nodes to serialise, in listing order.
+    output_format : str
+        Either 'json' or 'ndjson'.
+
+    Returns
+    -------
+    str
+        The serialised nodes, without a trailing newline.
+
+    Raises
+    ------
+    ValueError
+        If the output format is not supported.
+
+    """
+    if output_format == "ndjson":
+        return "\n".join([json_record(node) for node in nodes])
+    if output_format == "json":
+        if not nodes:
+            return "[]"
+        return "[\n" + ",\n".join([json_record(node) for node in nodes]) + "\n]"
+    error_message: str = f"Unsupported output format: {output_format}"
+    raise ValueError(error_message)
+
+
+def export_tree(node: Node, output: TextIO, export_format: str) -> int:
+    """Stream one record per node below `node` to `output`.
+
+    Parameters
+    ----------
+    node : Node
+        The node to export from.
+    output : TextIO
+        The stream to write to.
+    export_format : str
+        Either 'ndjson' or 'csv'.
+
+    Returns
+    -------
+    int
+        The number of exported records.
+
+    Raises
+    ------
+    ValueError
+        If the export format is not supported.
+
+    """
+    count: int = 0
+    if export_format == "ndjson":
+        for child in iter_subtree(node):
+            output.write(f"{json_record(child)}\n")
+            count += 1
+        return count
+    if export_format == "csv":
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(EXPORT_FIELDS)
+        for child in iter_subtree(node):
+            writer.writerow(
+                (
+                    child.relative_path,
+                    node_type(child),
+                    child.size,
+                    child.time_modified_int,
+                    child.permissions,
+                    child.depth,
+                ),
+            )
+            count += 1
+        return count
+    error_message: str = f"Unsupported export format: {export_format}"
+    raise ValueError(error_message)
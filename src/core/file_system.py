@@ -2,14 +2,80 @@
 
 from __future__ import annotations
 
+import gc
 import json
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from tempfile import NamedTemporaryFile, TemporaryDirectory
 from typing import TYPE_CHECKING
 
+from src.core.cache import RevisionCache
+from src.core.completion import MAX_CACHED_NAME_INDEXES, NameIndex
+from src.core.diff import diff_trees
+from src.core.dupes import DuplicateIndex
+from src.core.export import export_tree, iter_subtree, render_records
+from src.core.formatting import render_columns, render_long_format
+from src.core.gc_tuning import (
+    paused_collection,
+    release_subtree,
+    weaken_parent_links,
+)
+from src.core.index import (
+    INDEXED_SORT_COLUMNS,
+    ROOT_PATH,
+    IndexedNode,
+    SQLiteIndex,
+    is_index_path,
+)
+from src.core.loaders import (
+    complete_records_end,
+    detect_compression,
+    file_signature,
+    is_ndjson_path,
+    iter_records,
+    open_structure_file,
+    read_appended_records,
+    read_prefix_marker,
+)
+from src.core.memory import collect_memory
+from src.core.merkle import compute_subtree_hashes
+from src.core.mount import MountNode, ShardCache, SpilledNode
 from src.core.node import Node
+from src.core.pagination import (
+    MAX_CACHED_LISTINGS,
+    SortedListing,
+    decode_cursor,
+    encode_cursor,
+)
+from src.core.snapshot import SnapshotWriter
+from src.core.sorting import SORT_KEYS
+from src.core.stats import collect_stats_parallel
+from src.core.streaming import (
+    ENTER_DIRECTORY,
+    EXIT_DIRECTORY,
+    iter_structure_events,
+)
+from src.core.tree import render_tree
 
 if TYPE_CHECKING:  # pragma: no cover
-    from collections.abc import Callable
+    from collections.abc import Callable, Iterable, Iterator
+    from typing import TextIO
+
+    from src.core.diff import DiffEntry
+    from src.core.dupes import DuplicateGroup
+    from src.core.memory import MemoryReport
+    from src.core.pagination import SortPosition
+    from src.core.sorting import SortKey
+    from src.core.stats import TreeStats
+
+SHARD_REFERENCE_KEY: str = "$ref"
+SPILL_REFERENCE_KEY: str = "$spill"
+SPILL_DIGEST_KEY: str = "$digest"
+SPILL_UNITS_PER_BUDGET: int = 16
+IMPLICIT_DIRECTORY_SIZE: int = 4096
+IMPLICIT_DIRECTORY_PERMISSIONS: str = "drwxr-xr-x"
+MAX_CACHED_RESULTS: int = 256
 
 
 class FileSystem:
@@ -21,55 +87,397 @@ class FileSystem:
     Parameters
     ----------
     json_path : str
-        The path to the JSON file containing the file system data.
+        The path to the JSON file containing the file system data, optionally
+        compressed with gzip, xz or bzip2. Files with an '.ndjson' or
+        '.jsonl' suffix hold one flat record per path instead, and files with
+        a '.db', '.sqlite' or '.sqlite3' suffix are indexes created by
+        `build_index`, queried on demand.
+    max_resident_shards : int | None, optional
+        The maximum number of `$ref` shards kept loaded at once, by default
+        None (unbounded).
+    max_cached_results : int, optional
+        The maximum number of `ls` results kept, by default
+        MAX_CACHED_RESULTS.
+    max_resident_nodes : int | None, optional
+        The maximum number of nodes kept in memory, by default None
+        (unbounded). When set, large directories of a JSON structure file
+        are spilled to temporary files while the tree is built, and are
+        loaded again on access and evicted least recently used first.
+        NDJSON trees are always kept whole.
+    weak_parent_links : bool, optional
+        Whether nodes hold their parent through a weak reference, so that
+        the tree has no reference cycles, by default False.
+    freeze_after_build : bool, optional
+        Whether to move the tree out of the garbage collector's generations
+        with `gc.freeze` once it is built, by default False. This suits a
+        tree loaded once for the life of the process.
 
     Attributes
     ----------
     json_path : Path
         The path to the JSON file.
-    json_data : dict
-        The parsed JSON data.
+    json_data : dict | None
+        The parsed JSON data, None for NDJSON input.
+    weak_parent_links : bool
+        Whether nodes hold their parent through a weak reference.
+    freeze_after_build : bool
+        Whether the tree is frozen with `gc.freeze` once built.
+    loaded_signature : tuple[int, int]
+        The modification time and size of the file when it was last read.
+    record_offset : int | None
+        The end of the NDJSON records applied so far, None if appended
+        records cannot be read incrementally.
+    record_marker : tuple[int, int, bytes, bytes] | None
+        The device, inode, first bytes and bytes preceding `record_offset`
+        of the file, to detect rewrites.
     root : Node
-        The root node of the file system.
+        The root node of the current version of the tree. The nodes of a
+        published version are never modified, see `edit`.
+    shard_cache : ShardCache
+        The registry of mounted `$ref` shards and spilled directories.
+    spill_directory : TemporaryDirectory | None
+        The directory holding the spill files, None without a node budget.
+    index : SQLiteIndex | None
+        The SQLite index the tree is read from, None for structure files.
+    listing_cache : RevisionCache[SortedListing]
+        The sorted directory listings used for pagination.
+    result_cache : RevisionCache[str]
+        The memoised results of `ls`.
+    completion_cache : RevisionCache[NameIndex]
+        The name-sorted directory indexes used for completion.
 
     Methods
     -------
-    __load_json()
-        Load the JSON file.
+    __load_json(json_path)
+        Load a JSON file.
     __build_tree(data)
         Build the tree from the JSON data.
+    __mount_shard(mount_node)
+        Load the contents of a `$ref` mount point.
+    __build_spilled_tree(events)
+        Build the tree from parsing events, spilling large directories.
+    __spill(node, spill_directory)
+        Move the contents of a directory to a spill file.
+    __save_spill(mount_node)
+        Write the modified contents of a spilled directory back.
+    __build_tree_from_records(records)
+        Build the tree from flat NDJSON records.
+    __apply_records(root, records)
+        Add or update the nodes described by NDJSON records.
+    __fetch_or_raise(name_or_path_to_node)
+        Fetch a node, raising FileNotFoundError if the path does not exist.
+    reload()
+        Reload the structure file if it changed, incrementally if possible.
+    snapshot()
+        Get the root of the current version of the tree.
+    edit()
+        Build and publish a new version of the tree, copying on write.
     ls(directory=None)
         List the contents of the file system.
+    ls_page(name_or_path_to_node, page_size, after)
+        List one page of a directory, continuing after a cursor.
+    export(name_or_path_to_node, output, export_format)
+        Stream the tree below a path as NDJSON or CSV.
+    diff(other, name_or_path_to_node)
+        Stream the differences to another snapshot.
+    content_hash(name_or_path_to_node)
+        Get the Merkle hash of the subtree at a path.
+    stats_report(name_or_path_to_node, workers)
+        Compute aggregate statistics of the tree below a path.
+    complete(partial_path, show_hidden_files)
+        Complete a partial path from the names in its directory.
+    tree(name_or_path_to_node, output, max_depth)
+        Stream a `tree`-style view of the tree below a path.
+    memory_report(name_or_path_to_node)
+        Break down the memory held by the loaded tree below a path.
 
     """
 
-    def __init__(self, json_path: str = "structure.json") -> None:
+    def __init__(
+        self,
+        json_path: str = "structure.json",
+        *,
+        max_resident_shards: int | None = None,
+        max_cached_results: int = MAX_CACHED_RESULTS,
+        max_resident_nodes: int | None = None,
+        weak_parent_links: bool = False,
+        freeze_after_build: bool = False,
+    ) -> None:
         """Initialize the file system."""
         self.json_path: Path = Path(json_path)
-        self.json_data = self.__load_json()
-        self.root: Node = self.__build_tree(self.json_data)
+        self.weak_parent_links: bool = weak_parent_links
+        self.freeze_after_build: bool = freeze_after_build
+        self.shard_cache: ShardCache = ShardCache(
+            loader=self.__mount_shard,
+            max_resident_shards=max_resident_shards,
+            max_resident_nodes=max_resident_nodes,
+            on_evict=self.__forget_nodes,
+            saver=self.__save_spill,
+        )
+        self.spill_directory: TemporaryDirectory | None = None
+        self.index: SQLiteIndex | None = None
+        # Nodes built and not spilled so far while loading the tree.
+        self.__built_nodes: int = 0
+        self.listing_cache: RevisionCache[SortedListing] = RevisionCache(
+            max_entries=MAX_CACHED_LISTINGS,
+        )
+        self.result_cache: RevisionCache[str] = RevisionCache(
+            max_entries=max_cached_results,
+        )
+        self.completion_cache: RevisionCache[NameIndex] = RevisionCache(
+            max_entries=MAX_CACHED_NAME_INDEXES,
+        )
+        self.json_data: dict | None = None
+        self.root: Node
+        self.loaded_signature: tuple[int, int]
+        # Serialises writers; readers never take it.
+        self.__write_lock: threading.RLock = threading.RLock()
+        self.record_offset: int | None = None
+        self.record_marker: tuple[int, int, bytes, bytes] | None = None
+        self.__load()
+        if self.freeze_after_build:
+            gc.freeze()
+
+    def __load(self) -> None:
+        """Load the whole structure file and hash the tree.
+
+        For an uncompressed NDJSON file, the end of the last complete record
+        is remembered so that `reload` can apply appended records only; a
+        trailing line that does not parse is taken as still being written
+        and left for `reload`. An SQLite index is opened instead, and only
+        its root is read. The new tree and its state are only installed
+        once it is complete, so a failed load leaves the previous tree, its
+        index and its shard cache in place.
+        """
+        # Taken first, so that a change during the load triggers a reload.
+        loaded_signature: tuple[int, int] = file_signature(self.json_path)
+        record_offset: int | None = None
+        record_marker: tuple[int, int, bytes, bytes] | None = None
+        json_data: dict | None = None
+        index: SQLiteIndex | None = None
+        spill_directory: TemporaryDirectory | None = None
+        if is_index_path(self.json_path):
+            index = SQLiteIndex(self.json_path)
+            index_root: Node | None = index.fetch_node(ROOT_PATH)
+            if index_root is None:
+                index.close()
+                error_message: str = f"Empty index: {self.json_path}"
+                raise ValueError(error_message)
+            root: Node = index_root
+        else:
+            # Nearly every object allocated here survives, so collections
+            # would only rescan the growing tree.
+            with paused_collection():
+                if is_ndjson_path(self.json_path):
+                    if detect_compression(self.json_path) is None:
+                        _, size = loaded_signature
+                        record_offset = complete_records_end(self.json_path, size)
+                        record_marker = read_prefix_marker(
+                            self.json_path,
+                            record_offset,
+                        )
+                    root = self.__build_tree_from_records(
+                        iter_records(self.json_path, end=record_offset),
+                    )
+                elif self.shard_cache.max_resident_nodes is None:
+                    json_data = self.__load_json(self.json_path)
+                    root = self.__build_tree(
+                        json_data,
+                        base_path=self.json_path.parent,
+                    )
+                else:
+                    # Parsed as a stream, so the document is never held whole.
+                    spill_directory = TemporaryDirectory(prefix="pyls-spill-")
+                    self.__built_nodes = 0
+                    try:
+                        with open_structure_file(self.json_path) as json_file:
+                            root = self.__build_spilled_tree(
+                                iter_structure_events(json_file),
+                                base_path=self.json_path.parent,
+                                spill_directory=Path(spill_directory.name),
+                            )
+                    except BaseException:
+                        spill_directory.cleanup()
+                        raise
+                compute_subtree_hashes(root)
+            if self.weak_parent_links:
+                weaken_parent_links(root)
+        # Published once complete, so that readers never see a partial tree.
+        if self.index is not None:
+            self.index.close()
+        self.shard_cache.clear()
+        if spill_directory is not None:
+            self.spill_directory = spill_directory
+            self.shard_cache.pinned_nodes = self.__built_nodes
+        self.loaded_signature = loaded_signature
+        self.record_offset = record_offset
+        self.record_marker = record_marker
+        self.json_data = json_data
+        self.index = index
+        self.root = root
+
+    def reload(self) -> bool:
+        """Reload the structure file if it changed since it was loaded.
+
+        Checking costs a single `stat` call. When complete records were only
+        appended to an uncompressed NDJSON file, they are applied to the
+        loaded tree, which updates the revisions and Merkle hashes of the
+        affected directories only. The file is taken as appended to if it
+        grew, is the same file, and its start and the bytes before the
+        applied records are unchanged. Any other change, including a new
+        modification time without growth, reloads the whole file.
+
+        If the file cannot be read or parsed, for instance because it is
+        caught in the middle of being rewritten, the error is raised and
+        the loaded tree, caches and signature are kept, so that the next
+        call reads the file again.
+
+        Returns
+        -------
+        bool
+            Whether the file changed.
+
+        Raises
+        ------
+        OSError
+            If the file cannot be read.
+        ValueError
+            If the file is not a valid structure file.
+
+        """
+        with self.__write_lock:
+            signature: tuple[int, int] = file_signature(self.json_path)
+            if signature == self.loaded_signature:
+                return False
+            _, size = signature
+            if (
+                self.record_offset is not None
+                and size > self.record_offset
+                and read_prefix_marker(self.json_path, self.record_offset)
+                == self.record_marker
+            ):
+                records, offset = read_appended_records(
+                    self.json_path,
+                    self.record_offset,
+                )
+                if offset > self.record_offset:
+                    record_marker: tuple[int, int, bytes, bytes] = read_prefix_marker(
+                        self.json_path,
+                        offset,
+                    )
+                    with self.edit() as writer:
+                        self.__apply_records(writer.writable_root(), records, writer)
+                    self.loaded_signature = signature
+                    self.record_offset = offset
+                    self.record_marker = record_marker
+                    return True
+            self.__load()
+            self.listing_cache.clear()
+            self.result_cache.clear()
+            self.completion_cache.clear()
+            if self.freeze_after_build:
+                # Collected before freezing the new tree, so that whatever
+                # the old tree leaves behind is not frozen along with it.
+                gc.unfreeze()
+                gc.collect()
+                gc.freeze()
+            return True
+
+    def snapshot(self) -> Node:
+        """Get the root of the current version of the tree.
+
+        The nodes of a published version are never modified, so it can be
+        read without locking while writers publish newer versions through
+        `edit`, as long as it is navigated down from this root.
 
-    def __load_json(self) -> dict:
+        Returns
+        -------
+        Node
+            The root of the current version.
+
+        """
+        return self.root
+
+    @contextmanager
+    def edit(self) -> Iterator[SnapshotWriter]:
+        """Build a new version of the tree and publish it on success.
+
+        Writers are serialised, while readers keep using the version they
+        started from. Only the nodes on the paths from the root to the
+        modified nodes are copied; the rest is shared between versions.
+        On publication, shared nodes are linked to the parents of the new
+        version, so that older versions are freed once no longer read. If
+        the block raises, nothing is published.
+
+        The nodes of older versions are not modified, but their parent
+        links are: going up from a shared node of an older version leads
+        into the new version. An older version must be navigated down from
+        its root to be read consistently.
+
+        Yields
+        ------
+        SnapshotWriter
+            The writer to modify the new version through.
+
+        Raises
+        ------
+        ValueError
+            If the tree is read from an SQLite index, or, from the writer,
+            if a path behind a mount point or spilled directory is edited.
+
+        """
+        if self.index is not None:
+            error_message: str = f"Cannot edit the index {self.json_path}"
+            raise ValueError(error_message)
+        with self.__write_lock:
+            writer = SnapshotWriter(
+                self.root,
+                weak_parent_links=self.weak_parent_links,
+            )
+            yield writer
+            if writer.changed:
+                self.root = writer.publish()
+
+    def __load_json(self, json_path: Path) -> dict:
         """Load json file.
 
+        Compressed files are decompressed as a stream while being parsed.
+
+        Parameters
+        ----------
+        json_path : Path
+            The path to the JSON file.
+
         Returns
         -------
         dict
             The parsed JSON data.
 
         """
-        with self.json_path.open(mode="r+") as json_file:
+        with open_structure_file(json_path) as json_file:
             return json.load(json_file)
 
-    def __build_tree(self, data: dict, parent_node: Node | None = None) -> Node:
+    def __build_tree(
+        self,
+        data: dict,
+        parent_node: Node | None = None,
+        *,
+        base_path: Path,
+    ) -> Node:
         """Build the tree from the JSON data.
 
+        Directory entries carrying a `$ref` instead of `contents` become
+        mount points, whose contents are loaded from the referenced file
+        on first access.
+
         Parameters
         ----------
         data : dict
             The JSON data to build the tree from.
         parent_node : Node, optional
             The parent node of the current node, by default None
+        base_path : Path
+            The directory that `$ref` paths are relative to.
 
         Returns
         -------
@@ -77,6 +485,28 @@ class FileSystem:
             The root node of the tree.
 
         """
+        self.__built_nodes += 1
+        if SHARD_REFERENCE_KEY in data:
+            return MountNode(
+                name=data["name"],
+                size=data["size"],
+                time_modified_int=data["time_modified"],
+                permissions=data["permissions"],
+                ref=base_path / data[SHARD_REFERENCE_KEY],
+                shard_cache=self.shard_cache,
+                parent_node=parent_node,
+            )
+        if SPILL_REFERENCE_KEY in data:
+            return SpilledNode(
+                name=data["name"],
+                size=data["size"],
+                time_modified_int=data["time_modified"],
+                permissions=data["permissions"],
+                ref=Path(data[SPILL_REFERENCE_KEY]),
+                shard_cache=self.shard_cache,
+                children_digest=data[SPILL_DIGEST_KEY],
+                parent_node=parent_node,
+            )
         node = Node(
             name=data["name"],
             size=data["size"],
@@ -87,7 +517,394 @@ class FileSystem:
         )
         if node.is_directory:
             for child in data["contents"]:
-                node.add_child(self.__build_tree(child, parent_node=node))
+                node.add_child(
+                    self.__build_tree(child, parent_node=node, base_path=base_path),
+                )
+        return node
+
+    def __build_spilled_tree(
+        self,
+        events: Iterable[tuple[str, dict]],
+        *,
+        base_path: Path,
+        spill_directory: Path,
+    ) -> Node:
+        """Build the tree from parsing events, spilling large directories.
+
+        A directory is added to its parent when its contents start, so that
+        the order of the entries is kept, and is replaced by a spilled
+        directory once its contents end if more than a share of the node
+        budget was built below it. Only the nodes kept and the directories
+        being read are held at any time.
+
+        Parameters
+        ----------
+        events : Iterable[tuple[str, dict]]
+            The events of `iter_structure_events`.
+        base_path : Path
+            The directory that `$ref` paths are relative to.
+        spill_directory : Path
+            The directory to write the spill files to.
+
+        Returns
+        -------
+        Node
+            The root node of the tree.
+
+        """
+        root: Node | None = None
+        # The directories being read, and the nodes built before their
+        # contents.
+        stack: list[tuple[Node, int]] = []
+        for event, data in events:
+            if event == EXIT_DIRECTORY:
+                node, built_nodes = stack.pop()
+                if (
+                    stack
+                    and self.__built_nodes - built_nodes >= self.__spill_threshold()
+                ):
+                    self.__built_nodes = built_nodes
+                    stack[-1][0].add_child(self.__spill(node, spill_directory))
+                    release_subtree(node)
+                continue
+            parent_node: Node | None = stack[-1][0] if stack else None
+            if event == ENTER_DIRECTORY:
+                self.__built_nodes += 1
+                node = Node(
+                    name=data["name"],
+                    size=data["size"],
+                    time_modified_int=data["time_modified"],
+                    permissions=data["permissions"],
+                    is_directory=True,
+                    parent_node=parent_node,
+                )
+                stack.append((node, self.__built_nodes))
+            else:
+                node = self.__build_tree(data, parent_node, base_path=base_path)
+            if parent_node is None:
+                root = node
+            else:
+                parent_node.add_child(node)
+        if root is None:
+            error_message: str = f"Empty structure file: {self.json_path}"
+            raise ValueError(error_message)
+        return root
+
+    def __spill_threshold(self) -> int:
+        """Return the number of nodes below a directory that spills it."""
+        max_resident_nodes: int = self.shard_cache.max_resident_nodes or 0
+        return max(max_resident_nodes // SPILL_UNITS_PER_BUDGET, 1)
+
+    def __spill(self, node: Node, spill_directory: Path) -> SpilledNode:
+        """Move the contents of a directory to a spill file.
+
+        Spilled directories and mount points below it are written as
+        references, so that a spill file does not repeat the contents of
+        another one.
+
+        Parameters
+        ----------
+        node : Node
+            The directory, whose children have been built.
+        spill_directory : Path
+            The directory to write the spill file to.
+
+        Returns
+        -------
+        SpilledNode
+            The unmounted node replacing the directory.
+
+        """
+        compute_subtree_hashes(node)
+        with NamedTemporaryFile(
+            mode="w",
+            suffix=".json",
+            dir=spill_directory,
+            delete=False,
+        ) as spill_file:
+            # Encoded in one call, by the C encoder that `json.dump` skips.
+            spill_file.write(json.dumps(self.__spill_data(node)))
+        return SpilledNode(
+            name=node.name,
+            size=node.size,
+            time_modified_int=node.time_modified_int,
+            permissions=node.permissions,
+            ref=Path(spill_file.name),
+            shard_cache=self.shard_cache,
+            children_digest=node.children_digest,
+            parent_node=node.parent_node,
+        )
+
+    def __save_spill(self, mount_node: MountNode) -> bool:
+        """Write the modified contents of a spilled directory back.
+
+        Called before a spilled directory is evicted, so that the nodes
+        added or updated below it since it was loaded are read again on
+        the next access. Shards are not written to.
+
+        Parameters
+        ----------
+        mount_node : MountNode
+            The mount point being evicted.
+
+        Returns
+        -------
+        bool
+            Whether the contents were written, False for a shard.
+
+        """
+        if not isinstance(mount_node, SpilledNode):
+            return False
+        children: dict[str, Node] = mount_node.loaded_children or {}
+        with mount_node.ref.open("w") as spill_file:
+            # Only the contents are read back, see `__mount_shard`.
+            spill_file.write(
+                json.dumps(
+                    {
+                        "name": mount_node.name,
+                        "contents": [
+                            self.__spill_data(child) for child in children.values()
+                        ],
+                    },
+                ),
+            )
+        return True
+
+    def __forget_nodes(self, nodes: set[Node]) -> None:
+        """Drop the cached results computed from unmounted nodes.
+
+        Cached listings and name indexes hold the nodes they were built
+        from, which would otherwise stay in memory outside of the budget.
+
+        Parameters
+        ----------
+        nodes : set[Node]
+            The unmounted mount point and the nodes it held.
+
+        """
+        self.listing_cache.discard(lambda key: key[0] in nodes)
+        self.result_cache.discard(lambda key: key[0] in nodes)
+        self.completion_cache.discard(lambda key: key in nodes)
+
+    def __spill_data(self, node: Node) -> dict:
+        """Serialise a node and the nodes below it for a spill file.
+
+        Parameters
+        ----------
+        node : Node
+            The node to serialise.
+
+        Returns
+        -------
+        dict
+            The JSON data of the node, with absolute references.
+
+        """
+        data: dict = {
+            "name": node.name,
+            "size": node.size,
+            "time_modified": node.time_modified_int,
+            "permissions": node.permissions,
+        }
+        if isinstance(node, SpilledNode):
+            data[SPILL_REFERENCE_KEY] = str(node.ref)
+            data[SPILL_DIGEST_KEY] = node.children_digest
+        elif isinstance(node, MountNode):
+            # Spill files are read from another directory than the shards.
+            data[SHARD_REFERENCE_KEY] = str(node.ref.absolute())
+        elif node.children is not None:
+            data["contents"] = [
+                self.__spill_data(child) for child in node.children.values()
+            ]
+        return data
+
+    def __mount_shard(self, mount_node: MountNode) -> None:
+        """Populate a mount point from its structure file.
+
+        The shard file holds a directory entry whose `contents` are mounted
+        under `mount_node`; its other fields are ignored.
+
+        Parameters
+        ----------
+        mount_node : MountNode
+            The mount point to populate.
+
+        """
+        shard_data: dict = self.__load_json(mount_node.ref)
+        # Filled before being set, so that building the contents does not
+        # go through the shard cache and count as accesses.
+        children: dict[str, Node] = {}
+        for child in shard_data["contents"]:
+            child_node: Node = self.__build_tree(
+                child,
+                parent_node=mount_node,
+                base_path=mount_node.ref.parent,
+            )
+            compute_subtree_hashes(child_node)
+            if self.weak_parent_links:
+                weaken_parent_links(child_node)
+            children[child_node.name] = child_node
+        mount_node.children = children
+        mount_node.revision += 1
+
+    def __build_tree_from_records(self, records: Iterable[dict]) -> Node:
+        """Build the tree from flat NDJSON records.
+
+        Each record carries `path`, `size`, `time_modified`, `permissions`
+        and optionally `type` ('dir' or 'file'). Missing intermediate
+        directories are created with default metadata, and a later record
+        for an existing path updates it in place.
+
+        Parameters
+        ----------
+        records : Iterable[dict]
+            The records, in any order.
+
+        Returns
+        -------
+        Node
+            The root node of the tree.
+
+        """
+        root = Node(
+            name=".",
+            size=IMPLICIT_DIRECTORY_SIZE,
+            time_modified_int=0,
+            permissions=IMPLICIT_DIRECTORY_PERMISSIONS,
+            is_directory=True,
+        )
+        self.__apply_records(root, records)
+        return root
+
+    def __apply_records(
+        self,
+        root: Node,
+        records: Iterable[dict],
+        writer: SnapshotWriter | None = None,
+    ) -> None:
+        """Add or update the nodes described by NDJSON records.
+
+        Parameters
+        ----------
+        root : Node
+            The root node of the tree.
+        records : Iterable[dict]
+            The records, in any order.
+        writer : SnapshotWriter | None, optional
+            The writer copying the nodes of a published tree before they are
+            modified, by default None to modify the tree in place.
+
+        """
+
+        def get_child(directory: Node, name: str) -> Node | None:
+            if writer is None:
+                return directory.get_child(name)
+            return writer.writable_child(directory, name)
+
+        for record in records:
+            parts: list[str] = [
+                part for part in record["path"].split("/") if part not in {"", "."}
+            ]
+            is_directory: bool = record.get("type") == "dir"
+            if not parts:
+                node = root
+            else:
+                parent_node: Node = root
+                for part in parts[:-1]:
+                    parent_node = self.__ensure_directory(
+                        parent_node,
+                        part,
+                        get_child(parent_node, part),
+                    )
+                existing_node: Node | None = get_child(parent_node, parts[-1])
+                node = (
+                    self.__ensure_directory(parent_node, parts[-1], existing_node)
+                    if is_directory
+                    else self.__ensure_file(parent_node, parts[-1], existing_node)
+                )
+            node.update_metadata(
+                size=record["size"],
+                time_modified_int=record["time_modified"],
+                permissions=record["permissions"],
+            )
+
+    def __ensure_directory(
+        self,
+        parent_node: Node,
+        name: str,
+        node: Node | None,
+    ) -> Node:
+        """Return the named child directory, creating it if missing.
+
+        A file in the way is turned into a directory, since something is
+        being placed under it.
+
+        Parameters
+        ----------
+        parent_node : Node
+            The directory to look in.
+        name : str
+            The name of the child directory.
+        node : Node | None
+            The existing child with that name, None if there is none.
+
+        Returns
+        -------
+        Node
+            The child directory.
+
+        """
+        if node is None:
+            node = Node(
+                name=name,
+                size=IMPLICIT_DIRECTORY_SIZE,
+                time_modified_int=0,
+                permissions=IMPLICIT_DIRECTORY_PERMISSIONS,
+                is_directory=True,
+                parent_node=parent_node,
+            )
+            if self.weak_parent_links:
+                node.weaken_parent_link()
+            parent_node.add_child(node)
+        elif not node.is_directory:
+            node.is_directory = True
+            node.children = {}
+        return node
+
+    def __ensure_file(
+        self,
+        parent_node: Node,
+        name: str,
+        node: Node | None,
+    ) -> Node:
+        """Return the named child, creating it as a file if missing.
+
+        Parameters
+        ----------
+        parent_node : Node
+            The directory to look in.
+        name : str
+            The name of the child.
+        node : Node | None
+            The existing child with that name, None if there is none.
+
+        Returns
+        -------
+        Node
+            The child node.
+
+        """
+        if node is None:
+            node = Node(
+                name=name,
+                size=0,
+                time_modified_int=0,
+                permissions="",
+                parent_node=parent_node,
+            )
+            if self.weak_parent_links:
+                node.weaken_parent_link()
+            parent_node.add_child(node)
         return node
 
     def ls(
@@ -100,6 +917,9 @@ class FileSystem:
         display_sizes_in_human_readable_format: bool | None,
         filter_by_type: str | None,
         name_or_path_to_node: str | None,
+        sort_by: str | None = None,
+        output_format: str | None = None,
+        width: int | None = None,
     ) -> str:
         """List the contents of the file system.
 
@@ -119,6 +939,17 @@ class FileSystem:
             Whether to filter by directory or file, by default None
         name_or_path_to_node : Node, optional
             Name or tath to the directory to list or file, by default None
+        sort_by : str, optional
+            One of SORT_ORDERS, taking precedence over
+            `sort_by_last_modified_time`, by default None
+        output_format : str, optional
+            One of OUTPUT_FORMATS to serialise the listed nodes instead of
+            rendering text, taking precedence over `include_all_details`,
+            by default None
+        width : int, optional
+            The terminal width to lay the names out in columns for, like
+            'ls -C', by default None for a single tab-separated line.
+            Ignored in long format.
 
         Returns
         -------
@@ -126,43 +957,638 @@ class FileSystem:
             The list of contents of the directory
 
         """
-        child_nodes: list[Node] = []
-        nodes: list[Node] = []
         node_: Node | None = self.fetch_node(name_or_path_to_node)
 
         if node_ is None:
             return f"error: cannot access {name_or_path_to_node}: \
                 No such file or directory"
 
-        if node_.is_directory:
-            child_nodes = self.get_child_nodes(node_)
-            sort_key: Callable[..., int] | Callable[..., str] = self.get_sort_key(
+        long_format: bool = bool(include_all_details) and output_format is None
+        columns_width: int | None = (
+            None if long_format or output_format is not None else width
+        )
+        show_hidden: bool = bool(show_hidden_files) and node_.is_directory
+        reverse: bool = bool(sort_in_reverse) and node_.is_directory
+        sort_order: str = (
+            self.resolve_sort_order(
+                sort_by=sort_by,
                 sort_by_time=bool(sort_by_last_modified_time),
             )
-            nodes = self.sort_nodes(
-                nodes=child_nodes,
-                sort_key=sort_key,
-                reverse=bool(sort_in_reverse),
+            if node_.is_directory
+            else "name"
+        )
+        human_readable: bool = bool(display_sizes_in_human_readable_format) and (
+            long_format
+        )
+        filter_by: str | None = (
+            filter_by_type if filter_by_type in {"dir", "file"} else None
+        )
+        # A directory listing changes with the directory's revision, a file
+        # listing with the revision of the directory holding the file.
+        listed_node: Node = (
+            node_
+            if node_.is_directory or node_.parent_node is None
+            else node_.parent_node
+        )
+        return self.result_cache.get(
+            key=(
+                node_,
+                long_format,
+                show_hidden,
+                reverse,
+                sort_order,
+                human_readable,
+                filter_by,
+                output_format,
+                columns_width,
+            ),
+            revision=listed_node.revision,
+            build=lambda: self.__list_node(
+                node_,
+                include_all_details=long_format,
+                show_hidden_files=show_hidden,
+                sort_in_reverse=reverse,
+                sort_by=sort_order,
+                display_sizes_in_human_readable_format=human_readable,
+                filter_by_type=filter_by,
+                output_format=output_format,
+                width=columns_width,
+            ),
+        )
+
+    def __list_node(
+        self,
+        node_: Node,
+        *,
+        include_all_details: bool,
+        show_hidden_files: bool,
+        sort_in_reverse: bool,
+        sort_by: str,
+        display_sizes_in_human_readable_format: bool,
+        filter_by_type: str | None,
+        output_format: str | None,
+        width: int | None,
+    ) -> str:
+        """Render the listing of a node for normalised options.
+
+        Parameters
+        ----------
+        node_ : Node
+            The directory or file to list.
+        include_all_details : bool
+            Whether to list in long format.
+        show_hidden_files : bool
+            Whether to list all files.
+        sort_in_reverse : bool
+            Whether to list in reverse order.
+        sort_by : str
+            One of SORT_ORDERS.
+        display_sizes_in_human_readable_format : bool
+            Whether to print the size in human-readable format.
+        filter_by_type : str | None
+            Whether to filter by directory or file.
+        output_format : str | None
+            One of OUTPUT_FORMATS, or None for text.
+        width : int | None
+            The width to lay the names out in columns for, or None.
+
+        Returns
+        -------
+        str
+            The listing.
+
+        """
+        nodes: list[Node] = [node_]
+        if node_.is_directory:
+            nodes = self.__list_children(
+                node_,
+                show_hidden_files=show_hidden_files,
+                sort_in_reverse=sort_in_reverse,
+                sort_by=sort_by,
+                filter_by_type=filter_by_type,
             )
-            if not show_hidden_files:
-                nodes = [child for child in nodes if not child.is_hidden]
-        else:
-            nodes = [node_]
+        elif filter_by_type is not None:
+            nodes = self.filter_nodes(nodes=nodes, filter_by=filter_by_type)
+        return self.build_output(
+            nodes=nodes,
+            include_all_details=include_all_details,
+            display_sizes_in_human_readable_format=display_sizes_in_human_readable_format,
+            output_format=output_format,
+            width=width,
+        )
+
+    def __list_children(
+        self,
+        node_: Node,
+        *,
+        show_hidden_files: bool,
+        sort_in_reverse: bool,
+        sort_by: str,
+        filter_by_type: str | None,
+    ) -> list[Node]:
+        """Return the listed children of a directory, in listing order.
+
+        Parameters
+        ----------
+        node_ : Node
+            The directory.
+        show_hidden_files : bool
+            Whether to list all files.
+        sort_in_reverse : bool
+            Whether to list in reverse order.
+        sort_by : str
+            One of SORT_ORDERS.
+        filter_by_type : str | None
+            Whether to filter by directory or file.
 
+        Returns
+        -------
+        list[Node]
+            The children to list.
+
+        """
+        if isinstance(node_, IndexedNode) and sort_by in INDEXED_SORT_COLUMNS:
+            return node_.index.list_children(
+                node_,
+                sort_by=sort_by,
+                reverse=sort_in_reverse,
+                show_hidden_files=show_hidden_files,
+                filter_by_type=filter_by_type,
+            )
+        sort_key: Callable[..., SortKey] = self.get_sort_key(
+            sort_by_time=False,
+            sort_by=sort_by,
+        )
+        nodes: list[Node] = self.sort_nodes(
+            nodes=self.get_child_nodes(node_),
+            sort_key=sort_key,
+            reverse=sort_in_reverse,
+        )
+        if not show_hidden_files:
+            nodes = [child for child in nodes if not child.is_hidden]
         if filter_by_type is not None:
-            nodes = self.filter_nodes(
-                nodes=nodes,
-                filter_by=filter_by_type,
+            nodes = self.filter_nodes(nodes=nodes, filter_by=filter_by_type)
+        return nodes
+
+    def ls_page(
+        self,
+        *,
+        name_or_path_to_node: str | None,
+        page_size: int,
+        after: str | None,
+        include_all_details: bool | None,
+        show_hidden_files: bool | None,
+        sort_in_reverse: bool | None,
+        sort_by_last_modified_time: bool | None,
+        display_sizes_in_human_readable_format: bool | None,
+        filter_by_type: str | None,
+        sort_by: str | None = None,
+    ) -> tuple[str, str | None]:
+        """List one page of the contents of a directory.
+
+        The sorted order of the directory is cached, so later pages are
+        served by bisecting into it with the cursor instead of sorting
+        again. Entries with equal sort keys are ordered by name.
+
+        Parameters
+        ----------
+        name_or_path_to_node : str | None
+            Name or path to the directory to list or file.
+        page_size : int
+            The maximum number of entries in the page.
+        after : str | None
+            The cursor returned with the previous page, None for the first.
+        include_all_details : bool, optional
+            Whether to list in long format.
+        show_hidden_files : bool, optional
+            Whether to list all files.
+        sort_in_reverse : bool, optional
+            Whether to list in reverse order.
+        sort_by_last_modified_time : bool, optional
+            Whether to sort by time.
+        display_sizes_in_human_readable_format : bool, optional
+            Whether to print the size in human-readable format.
+        filter_by_type : str, optional
+            Whether to filter by directory or file.
+        sort_by : str, optional
+            One of SORT_ORDERS, taking precedence over
+            `sort_by_last_modified_time`, by default None
+
+        Returns
+        -------
+        tuple[str, str | None]
+            The page and the cursor of the next page, None on the last page.
+
+        Raises
+        ------
+        ValueError
+            If the page size or the cursor is invalid.
+
+        """
+        if page_size < 1:
+            error_message: str = "Page size must be at least 1."
+            raise ValueError(error_message)
+        node_: Node | None = self.fetch_node(name_or_path_to_node)
+        if node_ is None:
+            return (
+                f"error: cannot access {name_or_path_to_node}: \
+                No such file or directory",
+                None,
+            )
+        nodes: list[Node] = [node_]
+        cursor: str | None = None
+        if node_.is_directory:
+            sort_order: str = self.resolve_sort_order(
+                sort_by=sort_by,
+                sort_by_time=bool(sort_by_last_modified_time),
             )
+            position: SortPosition | None = None
+            if after is not None:
+                cursor_sort_order, position = decode_cursor(after)
+                if cursor_sort_order != sort_order:
+                    error_message = f"Invalid cursor for sort order {sort_order}"
+                    raise ValueError(error_message)
+            if isinstance(node_, IndexedNode) and sort_order in INDEXED_SORT_COLUMNS:
+                nodes, next_position = node_.index.page_children(
+                    node_,
+                    sort_by=sort_order,
+                    reverse=bool(sort_in_reverse),
+                    show_hidden_files=bool(show_hidden_files),
+                    filter_by_type=filter_by_type,
+                    after=position,
+                    page_size=page_size,
+                )
+            else:
+                listing: SortedListing = self.listing_cache.get(
+                    key=(node_, sort_order, bool(show_hidden_files), filter_by_type),
+                    revision=node_.revision,
+                    build=lambda: self.__build_sorted_listing(
+                        node_,
+                        sort_by=sort_order,
+                        show_hidden_files=bool(show_hidden_files),
+                        filter_by_type=filter_by_type,
+                    ),
+                )
+                try:
+                    nodes, next_position = listing.page(
+                        position,
+                        page_size,
+                        reverse=bool(sort_in_reverse),
+                    )
+                except TypeError as error:
+                    error_message = f"Invalid cursor: {after}"
+                    raise ValueError(error_message) from error
+            cursor = (
+                None
+                if next_position is None
+                else encode_cursor(sort_order, next_position)
+            )
+        elif filter_by_type is not None:
+            nodes = self.filter_nodes(nodes=nodes, filter_by=filter_by_type)
 
-        return self.build_output(
-            nodes=nodes,
-            include_all_details=bool(include_all_details),
-            display_sizes_in_human_readable_format=bool(
-                display_sizes_in_human_readable_format,
+        return (
+            self.build_output(
+                nodes=nodes,
+                include_all_details=bool(include_all_details),
+                display_sizes_in_human_readable_format=bool(
+                    display_sizes_in_human_readable_format,
+                ),
             ),
+            cursor,
+        )
+
+    def __build_sorted_listing(
+        self,
+        node: Node,
+        *,
+        sort_by: str,
+        show_hidden_files: bool,
+        filter_by_type: str | None,
+    ) -> SortedListing:
+        """Sort the filtered children of a directory for pagination.
+
+        Parameters
+        ----------
+        node : Node
+            The directory.
+        sort_by : str
+            One of SORT_ORDERS.
+        show_hidden_files : bool
+            Whether to include hidden entries.
+        filter_by_type : str | None
+            Whether to filter by directory or file.
+
+        Returns
+        -------
+        SortedListing
+            The sorted listing.
+
+        """
+        nodes: list[Node] = self.get_child_nodes(node)
+        if not show_hidden_files:
+            nodes = [child for child in nodes if not child.is_hidden]
+        if filter_by_type is not None:
+            nodes = self.filter_nodes(nodes=nodes, filter_by=filter_by_type)
+        return SortedListing(
+            nodes,
+            sort_key=self.get_sort_key(sort_by_time=False, sort_by=sort_by),
+        )
+
+    def export(
+        self,
+        *,
+        name_or_path_to_node: str | None,
+        output: TextIO,
+        export_format: str,
+    ) -> int:
+        """Stream one record per node below a path to `output`.
+
+        Parameters
+        ----------
+        name_or_path_to_node : str | None
+            Name or path to the directory or file to export.
+        output : TextIO
+            The stream to write to.
+        export_format : str
+            Either 'ndjson' or 'csv'.
+
+        Returns
+        -------
+        int
+            The number of exported records.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the path does not exist.
+
+        """
+        node_: Node = self.__fetch_or_raise(name_or_path_to_node)
+        return export_tree(node_, output, export_format)
+
+    def tree(
+        self,
+        *,
+        name_or_path_to_node: str | None,
+        output: TextIO,
+        max_depth: int | None = None,
+        show_hidden_files: bool | None = False,
+        sort_in_reverse: bool | None = False,
+        sort_by_last_modified_time: bool | None = False,
+        filter_by_type: str | None = None,
+        sort_by: str | None = None,
+    ) -> None:
+        """Stream a `tree`-style view of the tree below a path to `output`.
+
+        Each directory is listed as `ls` would list it with the same
+        options, and lines are written as the tree is walked.
+
+        Parameters
+        ----------
+        name_or_path_to_node : str | None
+            Name or path to the directory or file to render.
+        output : TextIO
+            The stream to write to.
+        max_depth : int | None, optional
+            The deepest level rendered, by default None for no limit.
+        show_hidden_files : bool | None, optional
+            Whether to render hidden entries, by default False.
+        sort_in_reverse : bool | None, optional
+            Whether to sort each directory in reverse order, by default False.
+        sort_by_last_modified_time : bool | None, optional
+            Whether to sort by time, by default False.
+        filter_by_type : str | None, optional
+            Whether to keep only directories ('dir') or files ('file') at
+            each level, by default None.
+        sort_by : str | None, optional
+            One of SORT_ORDERS, taking precedence over
+            `sort_by_last_modified_time`, by default None.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the path does not exist.
+
+        """
+        node_: Node = self.__fetch_or_raise(name_or_path_to_node)
+        sort_order: str = self.resolve_sort_order(
+            sort_by=sort_by,
+            sort_by_time=bool(sort_by_last_modified_time),
+        )
+        output.writelines(
+            f"{line}\n"
+            for line in render_tree(
+                node_,
+                lambda directory: self.__list_children(
+                    directory,
+                    show_hidden_files=bool(show_hidden_files),
+                    sort_in_reverse=bool(sort_in_reverse),
+                    sort_by=sort_order,
+                    filter_by_type=filter_by_type,
+                ),
+                root_name=name_or_path_to_node or ".",
+                max_depth=max_depth,
+            )
+        )
+
+    def duplicates(
+        self,
+        name_or_path_to_node: str | None,
+        *,
+        match_names: bool = False,
+    ) -> Iterator[DuplicateGroup]:
+        """Find the files below a path that may be copies of each other.
+
+        Files are grouped by size, or by name and size, in a single walk
+        that keeps no group for sizes seen only once. The groups are then
+        yielded one at a time, the most wasted bytes first.
+
+        Parameters
+        ----------
+        name_or_path_to_node : str | None
+            Name or path to the directory to search.
+        match_names : bool, optional
+            Whether files must also have the same name, by default False.
+
+        Returns
+        -------
+        Iterator[DuplicateGroup]
+            The groups of at least two non-empty files.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the path does not exist.
+
+        """
+        node_: Node = self.__fetch_or_raise(name_or_path_to_node)
+        index = DuplicateIndex(match_names=match_names)
+        index.update(iter_subtree(node_))
+        return index.iter_groups()
+
+    def stats_report(
+        self,
+        name_or_path_to_node: str | None,
+        *,
+        workers: int = 1,
+    ) -> TreeStats:
+        """Compute aggregate statistics of the tree below a path.
+
+        Counts and bytes by extension, the size histogram, the oldest and
+        newest files, the deepest paths and the hidden entries are all
+        gathered in a single walk. With more than one worker, the top-level
+        subtrees are walked in parallel and the partial results merged.
+
+        Parameters
+        ----------
+        name_or_path_to_node : str | None
+            Name or path to the directory or file to report on.
+        workers : int, optional
+            The maximum number of worker processes, by default 1.
+
+        Returns
+        -------
+        TreeStats
+            The statistics.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the path does not exist.
+
+        """
+        node_: Node = self.__fetch_or_raise(name_or_path_to_node)
+        return collect_stats_parallel(node_, workers)
+
+    def memory_report(self, name_or_path_to_node: str | None) -> MemoryReport:
+        """Break down the memory held by the loaded tree below a path.
+
+        Every loaded node is measured with `sys.getsizeof`, together with the
+        objects its attributes refer to: `children` dicts, names,
+        `relative_path` strings, datetime objects and the other attributes.
+        Objects shared by several nodes are counted once. Unloaded mount
+        points and spilled directories are not loaded. If `tracemalloc` is
+        tracing, its current and peak figures are included, so starting it
+        before creating the file system measures the whole load.
+
+        Parameters
+        ----------
+        name_or_path_to_node : str | None
+            Name or path to the directory or file to measure.
+
+        Returns
+        -------
+        MemoryReport
+            The memory by category and node type.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the path does not exist.
+
+        """
+        node_: Node = self.__fetch_or_raise(name_or_path_to_node)
+        return collect_memory(node_)
+
+    def complete(
+        self,
+        partial_path: str,
+        *,
+        show_hidden_files: bool = False,
+    ) -> list[str]:
+        """Complete a partial path from the names in its directory.
+
+        The part after the last '/' is looked up as a prefix among the names
+        of the directory before it. The names of each directory are sorted
+        once and kept until the directory changes, and an SQLite index is
+        queried through its (parent, name) index, so a completion costs
+        O(log n + k) for k matches.
+
+        Parameters
+        ----------
+        partial_path : str
+            The path typed so far, e.g. 'parser/pars'.
+        show_hidden_files : bool, optional
+            Whether to offer hidden entries even when the prefix does not
+            start with '.', by default False.
+
+        Returns
+        -------
+        list[str]
+            The completed paths sorted by name, directories ending with '/'.
+            Empty if the directory does not exist.
+
+        """
+        directory, separator, prefix = partial_path.rpartition("/")
+        node_: Node | None = self.fetch_node(directory or None)
+        if node_ is None or not node_.is_directory:
+            return []
+        if isinstance(node_, IndexedNode):
+            matches: list[Node] = node_.index.complete_children(node_, prefix)
+        else:
+            directory_node: Node = node_
+            matches = self.completion_cache.get(
+                key=directory_node,
+                revision=directory_node.revision,
+                build=lambda: NameIndex(self.get_child_nodes(directory_node)),
+            ).matches(prefix)
+        if not show_hidden_files and not prefix.startswith("."):
+            matches = [node for node in matches if not node.is_hidden]
+        return [
+            f"{directory}{separator}{node.name}{'/' if node.is_directory else ''}"
+            for node in matches
+        ]
+
+    def diff(
+        self,
+        other: FileSystem,
+        name_or_path_to_node: str | None = None,
+    ) -> Iterator[DiffEntry]:
+        """Stream the differences from this file system to another one.
+
+        Parameters
+        ----------
+        other : FileSystem
+            The newer snapshot.
+        name_or_path_to_node : str | None, optional
+            The path to compare below, by default the root.
+
+        Returns
+        -------
+        Iterator[DiffEntry]
+            The added, removed and modified entries, and the size delta of
+            every directory with changes below it.
+
+        """
+        return diff_trees(
+            self.fetch_node(name_or_path_to_node),
+            other.fetch_node(name_or_path_to_node),
         )
 
+    def content_hash(self, name_or_path_to_node: str | None) -> str | None:
+        """Get the Merkle hash of a node.
+
+        The hash covers the name, size, modification time and permissions of
+        the node and, for directories, of everything below it. Two subtrees
+        with the same hash are identical, so comparing hashes tells in O(1)
+        whether anything under a path changed.
+
+        Parameters
+        ----------
+        name_or_path_to_node : str | None
+            The path to the node.
+
+        Returns
+        -------
+        str | None
+            The hexadecimal hash, None if the path does not exist.
+
+        """
+        node_: Node | None = self.fetch_node(name_or_path_to_node)
+        if node_ is None or node_.content_hash is None:
+            return None
+        return node_.content_hash.hex()
+
     def fetch_node(self, name_or_path_to_node: str | None) -> Node | None:
         """Fetch a node from the file system.
 
@@ -183,6 +1609,33 @@ class FileSystem:
             else self.root.get_child(name_or_path_to_node)
         )
 
+    def __fetch_or_raise(self, name_or_path_to_node: str | None) -> Node:
+        """Fetch a node, raising if the path does not exist.
+
+        Parameters
+        ----------
+        name_or_path_to_node : str | None
+            The path to the node.
+
+        Returns
+        -------
+        Node
+            The node at the specified path.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the path does not exist.
+
+        """
+        node_: Node | None = self.fetch_node(name_or_path_to_node)
+        if node_ is None:
+            error_message: str = (
+                f"cannot access {name_or_path_to_node}: No such file or directory"
+            )
+            raise FileNotFoundError(error_message)
+        return node_
+
     def get_child_nodes(self, node: Node) -> list[Node]:
         """Get the child nodes of a node.
 
@@ -202,7 +1655,7 @@ class FileSystem:
     def sort_nodes(
         self,
         nodes: list[Node],
-        sort_key: Callable[..., int] | Callable[..., str],
+        sort_key: Callable[..., SortKey],
         *,
         reverse: bool,
     ) -> list[Node]:
@@ -212,7 +1665,7 @@ class FileSystem:
         ----------
         nodes : list[Node]
             The list of nodes to sort.
-        sort_key : Callable[..., int] | Callable[..., str]
+        sort_key : Callable[..., SortKey]
             The sort key function.
         reverse : bool
             Whether to sort in reverse order.
@@ -229,28 +1682,61 @@ class FileSystem:
         self,
         *,
         sort_by_time: bool,
-    ) -> Callable[..., int] | Callable[..., str]:
+        sort_by: str | None = None,
+    ) -> Callable[..., SortKey]:
         """Get the sort key function.
 
+        Keys that are expensive to compute, such as natural and locale
+        keys, are cached on the nodes, so repeated sorts reuse them.
+
         Parameters
         ----------
         sort_by_time : bool
             Whether to sort by time.
+        sort_by : str | None, optional
+            One of SORT_ORDERS, taking precedence over `sort_by_time`, by
+            default None
 
         Returns
         -------
-        Callable[..., int] | Callable[..., str]
+        Callable[..., SortKey]
             The sort key function.
 
+        Raises
+        ------
+        ValueError
+            If the sort order is not supported.
+
         """
+        sort_order: str = self.resolve_sort_order(
+            sort_by=sort_by,
+            sort_by_time=sort_by_time,
+        )
+        if sort_order not in SORT_KEYS:
+            error_message: str = f"Unsupported sort order: {sort_order}"
+            raise ValueError(error_message)
+        return SORT_KEYS[sort_order]
 
-        def sort_key_by_time(child: Node) -> int:
-            return child.time_modified_int
+    @staticmethod
+    def resolve_sort_order(*, sort_by: str | None, sort_by_time: bool) -> str:
+        """Get the sort order selected by the listing options.
 
-        def sort_key_by_name(child: Node) -> str:
-            return child.name
+        Parameters
+        ----------
+        sort_by : str | None
+            The explicitly requested sort order, if any.
+        sort_by_time : bool
+            Whether to sort by time.
+
+        Returns
+        -------
+        str
+            One of SORT_ORDERS.
 
-        return sort_key_by_time if sort_by_time else sort_key_by_name
+        """
+        if sort_by is not None:
+            return sort_by
+        return "time" if sort_by_time else "name"
 
     def filter_nodes(
         self,
@@ -284,6 +1770,8 @@ class FileSystem:
         *,
         include_all_details: bool,
         display_sizes_in_human_readable_format: bool,
+        output_format: str | None = None,
+        width: int | None = None,
     ) -> str:
         """Build the output of the file system.
 
@@ -295,6 +1783,12 @@ class FileSystem:
             Whether to use long format.
         display_sizes_in_human_readable_format : bool
             Whether to use human readable format.
+        output_format : str | None, optional
+            One of OUTPUT_FORMATS to serialise the nodes directly, by default
+            None.
+        width : int | None, optional
+            The width to lay the names out in columns for, by default None
+            for a single tab-separated line.
 
         Returns
         -------
@@ -302,26 +1796,18 @@ class FileSystem:
             The output of the file system.
 
         """
+        if output_format is not None:
+            return render_records(nodes, output_format)
         node_length = len(nodes)
         if include_all_details:
-            return "\n".join(
-                [
-                    "\t".join(
-                        [
-                            child.permissions,
-                            child.human_readable_size
-                            if display_sizes_in_human_readable_format
-                            else str(child.size),
-                            child.time_modified,
-                            child.relative_path if node_length == 1 else child.name,
-                        ],
-                    )
-                    for child in nodes
-                ],
+            return render_long_format(
+                nodes,
+                display_sizes_in_human_readable_format=display_sizes_in_human_readable_format,
+                use_relative_path=node_length == 1,
             )
-        return "\t".join(
-            [
-                child.relative_path if node_length == 1 else child.name
-                for child in nodes
-            ],
-        )
+        names: list[str] = [
+            child.relative_path if node_length == 1 else child.name for child in nodes
+        ]
+        if width is not None:
+            return render_columns(names, width)
+        return "\t".join(names)
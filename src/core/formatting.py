@@ -0,0 +1,230 @@
+"""Formatting helpers for listing output."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from functools import lru_cache
+from itertools import repeat
+from operator import attrgetter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterable, Sequence
+
+    from src.core.node import Node
+
+BYTE_LENGTH: int = 1024
+SECONDS_PER_MINUTE: int = 60
+SECONDS_PER_HOUR: int = 3_600
+SECONDS_PER_DAY: int = 86_400
+# Distinct days whose formatted date is kept, about 300 KiB at most.
+MAX_CACHED_DAYS: int = 4_096
+DATE_FORMAT: str = "%b %d"
+BITS_PER_UNIT: int = 10
+# Spaces between the columns of 'ls -C', and the narrowest possible column.
+COLUMN_SEPARATION: int = 2
+MINIMUM_COLUMN_WIDTH: int = 1 + COLUMN_SEPARATION
+SIZE_UNITS: tuple[tuple[int, str], ...] = tuple(
+    (BYTE_LENGTH**exponent, unit) for exponent, unit in enumerate(" KMGTPEZ")
+)
+
+
+def format_size(size: int) -> str:
+    """Format a size in bytes like 'ls -h' does.
+
+    The unit is looked up from the bit length of the size instead of
+    repeatedly dividing by 1024.
+
+    Parameters
+    ----------
+    size : int
+        The size in bytes.
+
+    Returns
+    -------
+    str
+        The human-readable size, e.g. '1.3K'.
+
+    """
+    if size < BYTE_LENGTH:
+        return str(size)
+    exponent: int = (size.bit_length() - 1) // BITS_PER_UNIT
+    if exponent >= len(SIZE_UNITS):
+        return f"{size}B"
+    divisor, unit = SIZE_UNITS[exponent]
+    return f"{size / divisor:.1f}{unit}"
+
+
+def format_time(time_modified_int: int) -> str:
+    """Format a modification time, caching the date part per day.
+
+    The hours and minutes are formatted on every call, so that each node
+    holds its own string, allocated next to it. Sharing one string per
+    minute between nodes made long listings of large trees slower, as
+    their rows then read strings scattered over the whole heap.
+
+    Parameters
+    ----------
+    time_modified_int : int
+        The time in seconds from epoch.
+
+    Returns
+    -------
+    str
+        The formatted time, e.g. 'Nov 14 05:57'.
+
+    """
+    day, seconds = divmod(time_modified_int, SECONDS_PER_DAY)
+    hours, seconds = divmod(seconds, SECONDS_PER_HOUR)
+    return f"{format_day(day)} {hours:02}:{seconds // SECONDS_PER_MINUTE:02}"
+
+
+@lru_cache(maxsize=MAX_CACHED_DAYS)
+def format_day(day: int) -> str:
+    """Format a date given in days from epoch.
+
+    The most recently used MAX_CACHED_DAYS results are cached, so the
+    cache stays bounded across reloads and file systems.
+
+    Parameters
+    ----------
+    day : int
+        The date in days from epoch.
+
+    Returns
+    -------
+    str
+        The formatted date, e.g. 'Nov 14'.
+
+    """
+    return datetime.fromtimestamp(day * SECONDS_PER_DAY, tz=UTC).strftime(
+        DATE_FORMAT,
+    )
+
+
+def render_long_format(
+    nodes: Sequence[Node],
+    *,
+    display_sizes_in_human_readable_format: bool,
+    use_relative_path: bool,
+) -> str:
+    """Render nodes in the long listing format with aligned columns.
+
+    Each node is formatted once. Human-readable sizes are formatted up
+    front to find the widest one; plain sizes take their width from the
+    largest size and are converted while the rows are built. Columns are
+    padded with C-level maps, and permissions are only padded when they
+    differ in width, which they rarely do.
+
+    Parameters
+    ----------
+    nodes : Sequence[Node]
+        The nodes to render.
+    display_sizes_in_human_readable_format : bool
+        Whether to print sizes like 1K 234M 2G.
+    use_relative_path : bool
+        Whether to print the relative path instead of the name.
+
+    Returns
+    -------
+    str
+        The rendered listing.
+
+    """
+    if not nodes:
+        return ""
+    sizes: Iterable[str]
+    if display_sizes_in_human_readable_format:
+        sizes = [format_size(node.size) for node in nodes]
+        size_width: int = max(map(len, sizes))
+    else:
+        # The largest size is the widest, so sizes are converted once, per row.
+        size_width = len(str(max(map(attrgetter("size"), nodes))))
+        sizes = map(str, map(attrgetter("size"), nodes))
+    permissions: Iterable[str] = map(attrgetter("permissions"), nodes)
+    permission_widths: set[int] = set(map(len, map(attrgetter("permissions"), nodes)))
+    if len(permission_widths) > 1:
+        permissions = map(str.ljust, permissions, repeat(max(permission_widths)))
+    names: Iterable[str] = map(
+        attrgetter("relative_path" if use_relative_path else "name"),
+        nodes,
+    )
+    return "\n".join(
+        [
+            f"{permission} {size} {node.time_modified} {name}"
+            for node, permission, size, name in zip(
+                nodes,
+                permissions,
+                map(str.rjust, sizes, repeat(size_width)),
+                names,
+                strict=True,
+            )
+        ],
+    )
+
+
+def render_columns(names: Sequence[str], width: int) -> str:
+    """Render names in columns narrower than a width, like 'ls -C' does.
+
+    Names are laid out down the columns, then across. Every column count
+    that could fit is tried in a single pass over the names: for each one,
+    the widest name per column and the resulting line width are updated
+    incrementally, and a count is dropped as soon as its lines get too
+    wide. Columns are at least MINIMUM_COLUMN_WIDTH wide, so at most
+    `width // MINIMUM_COLUMN_WIDTH` counts are tried and the pass takes
+    time linear in the number of names.
+
+    Parameters
+    ----------
+    names : Sequence[str]
+        The names to render, in listing order.
+    width : int
+        The width of the terminal in characters.
+
+    Returns
+    -------
+    str
+        The rendered listing, one line per row.
+
+    """
+    number_of_names: int = len(names)
+    if not number_of_names:
+        return ""
+    max_columns: int = max(1, min(number_of_names, width // MINIMUM_COLUMN_WIDTH))
+    # Per candidate count of columns, indexed by count - 1: the rows, whether
+    # it still fits, the width of each column and the width of a line.
+    candidate_rows: list[int] = [
+        -(-number_of_names // columns) for columns in range(1, 1 + max_columns)
+    ]
+    fits: list[bool] = [True] * max_columns
+    column_widths: list[list[int]] = [
+        [0] * columns for columns in range(1, 1 + max_columns)
+    ]
+    line_widths: list[int] = [0] * max_columns
+    for index, name in enumerate(names):
+        length: int = len(name)
+        for candidate in range(max_columns):
+            if not fits[candidate]:
+                continue
+            column: int = index // candidate_rows[candidate]
+            cell_width: int = length + (COLUMN_SEPARATION if column < candidate else 0)
+            widths: list[int] = column_widths[candidate]
+            if cell_width > widths[column]:
+                line_widths[candidate] += cell_width - widths[column]
+                widths[column] = cell_width
+                fits[candidate] = line_widths[candidate] < width
+    # A single column is used even if a name is wider than the terminal.
+    best: int = next(
+        (candidate for candidate in reversed(range(max_columns)) if fits[candidate]),
+        0,
+    )
+    rows: int = candidate_rows[best]
+    widths = column_widths[best]
+    lines: list[str] = []
+    for row in range(rows):
+        cells: list[int] = list(range(row, number_of_names, rows))
+        lines.append(
+            "".join(names[index].ljust(widths[index // rows]) for index in cells[:-1])
+            + names[cells[-1]],
+        )
+    return "\n".join(lines)
@@ -0,0 +1,80 @@
+"""Cooperation with the cyclic garbage collector for large trees."""
+
+from __future__ import annotations
+
+import gc
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterator
+
+    from src.core.node import Node
+
+
+@contextmanager
+def paused_collection() -> Iterator[None]:
+    """Pause the cyclic garbage collector while building a tree.
+
+    Nearly every object allocated by a bulk build survives, so collections
+    triggered by the allocations would scan the growing tree over and over
+    without freeing anything. Reference counting keeps working meanwhile.
+
+    Yields
+    ------
+    None
+        Control, with automatic collection disabled.
+
+    """
+    was_enabled: bool = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def weaken_parent_links(node: Node) -> None:
+    """Make the parent links of a node and of the nodes below it weak.
+
+    Mount points are not entered, so nothing is loaded; their contents are
+    handled when they are mounted.
+
+    Parameters
+    ----------
+    node : Node
+        The root of the subtree.
+
+    """
+    stack: list[Node] = [node]
+    while stack:
+        current: Node = stack.pop()
+        current.weaken_parent_link()
+        children: dict[str, Node] | None = current.hashed_children()
+        if children:
+            stack.extend(children.values())
+
+
+def release_subtree(node: Node) -> None:
+    """Empty the directories below a node that is no longer used.
+
+    With strong parent links, a dropped subtree is a reference cycle that
+    only the cyclic garbage collector frees, which a paused collection
+    delays until the end of the build. Emptying the directories lets
+    reference counting free the nodes right away. Mount points are not
+    entered.
+
+    Parameters
+    ----------
+    node : Node
+        The root of the subtree, which is emptied too.
+
+    """
+    stack: list[Node] = [node]
+    while stack:
+        current: Node = stack.pop()
+        children: dict[str, Node] | None = current.hashed_children()
+        if children:
+            stack.extend(children.values())
+            children.clear()
@@ -0,0 +1,511 @@
+"""SQLite index of a tree, for trees too large to hold in memory."""
+
+from __future__ import annotations
+
+import itertools
+import os
+import sqlite3
+from typing import TYPE_CHECKING
+
+from src.core.completion import prefix_bound
+from src.core.loaders import open_structure_file
+from src.core.node import Node
+from src.core.streaming import (
+    ENTER_DIRECTORY,
+    EXIT_DIRECTORY,
+    iter_structure_events,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterator
+    from pathlib import Path
+
+    from src.core.pagination import SortPosition
+
+INDEX_SUFFIXES: frozenset[str] = frozenset({".db", ".sqlite", ".sqlite3"})
+ROOT_PATH: str = ""
+NODE_COLUMNS: str = "id, path, name, size, time_modified, permissions, is_directory"
+SCHEMA: tuple[str, ...] = (
+    """
+    CREATE TABLE nodes (
+        id INTEGER PRIMARY KEY,
+        parent_id INTEGER,
+        path TEXT NOT NULL,
+        name TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        time_modified INTEGER NOT NULL,
+        permissions TEXT NOT NULL,
+        is_directory INTEGER NOT NULL
+    )
+    """,
+)
+# Created after the bulk insert, which is much faster than maintaining them
+# row by row.
+INDEXES: tuple[str, ...] = (
+    "CREATE INDEX nodes_parent_name ON nodes (parent_id, name)",
+    "CREATE INDEX nodes_parent_time ON nodes (parent_id, time_modified)",
+    "CREATE UNIQUE INDEX nodes_path ON nodes (path)",
+)
+# Sort orders answered from an index; the others are sorted in Python.
+INDEXED_SORT_COLUMNS: dict[str, str] = {
+    "name": "name",
+    "time": "time_modified",
+}
+SHARD_REFERENCE_KEY: str = "$ref"
+
+type NodeRow = tuple[int, str, str, int, int, str, int]
+
+
+def is_index_path(json_path: Path) -> bool:
+    """Check whether a path names an SQLite index rather than a JSON file.
+
+    Parameters
+    ----------
+    json_path : Path
+        The path to the structure file, e.g. 'structure.sqlite'.
+
+    Returns
+    -------
+    bool
+        Whether the suffix is '.db', '.sqlite' or '.sqlite3'.
+
+    """
+    return json_path.suffix in INDEX_SUFFIXES
+
+
+def build_index(json_path: Path, database_path: Path) -> int:
+    """Import a nested JSON structure file into a new SQLite index.
+
+    The structure file is parsed as a stream, and its rows are inserted in
+    depth-first order as they are read, with ids assigned on the way so
+    that no lookups are needed. `$ref` shards are imported inline. Memory
+    use depends on the depth of the tree, not on the size of the file.
+    The indexes are created once all rows are in.
+
+    Parameters
+    ----------
+    json_path : Path
+        The structure file, optionally compressed. The fields of each
+        directory must come before its contents.
+    database_path : Path
+        The database to create; an existing file is replaced.
+
+    Returns
+    -------
+    int
+        The number of imported entries.
+
+    """
+    database_path.unlink(missing_ok=True)
+    connection = sqlite3.connect(database_path)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        for statement in SCHEMA:
+            connection.execute(statement)
+        rows: Iterator[tuple[int, int | None, str, str, int, int, str, int]] = (
+            iter_rows(json_path)
+        )
+        connection.executemany(
+            "INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        for statement in INDEXES:
+            connection.execute(statement)
+        connection.commit()
+        (count,) = connection.execute("SELECT count(*) FROM nodes").fetchone()
+    finally:
+        connection.close()
+    return count
+
+
+def iter_rows(
+    json_path: Path,
+    mount_point: tuple[int, str] | None = None,
+    ids: Iterator[int] | None = None,
+) -> Iterator[tuple[int, int | None, str, str, int, int, str, int]]:
+    """Iterate over the rows of a structure file, depth-first.
+
+    Only the directories on the path to the current entry are held. A
+    `$ref` shard is read where it is referenced, its entries taking the
+    place of the contents of the mount point.
+
+    Parameters
+    ----------
+    json_path : Path
+        The structure file, optionally compressed.
+    mount_point : tuple[int, str] | None, optional
+        The id and path of the directory the file is a shard of, by default
+        None for the root structure file.
+    ids : Iterator[int] | None, optional
+        The ids to assign, by default counting from 1.
+
+    Yields
+    ------
+    tuple[int, int | None, str, str, int, int, str, int]
+        The id, parent id, path, name, size, modification time, permissions
+        and directory flag of each entry.
+
+    """
+    if ids is None:
+        ids = itertools.count(1)
+    # The ids and paths of the directories being read.
+    stack: list[tuple[int, str]] = []
+    with open_structure_file(json_path) as json_file:
+        for event, entry in iter_structure_events(json_file):
+            if event == EXIT_DIRECTORY:
+                stack.pop()
+                continue
+            if mount_point is not None and not stack:
+                # The root entry of a shard stands for its mount point.
+                if event == ENTER_DIRECTORY:
+                    stack.append(mount_point)
+                continue
+            parent_id: int | None = None
+            path: str = ROOT_PATH
+            if stack:
+                parent_id, parent_path = stack[-1]
+                prefix: str = f"{parent_path}/" if parent_path else ""
+                path = f"{prefix}{entry['name']}"
+            node_id: int = next(ids)
+            is_shard: bool = SHARD_REFERENCE_KEY in entry
+            yield (
+                node_id,
+                parent_id,
+                path,
+                entry["name"],
+                entry["size"],
+                entry["time_modified"],
+                entry["permissions"],
+                event == ENTER_DIRECTORY or is_shard,
+            )
+            if event == ENTER_DIRECTORY:
+                stack.append((node_id, path))
+            elif is_shard:
+                yield from iter_rows(
+                    json_path.parent / entry[SHARD_REFERENCE_KEY],
+                    (node_id, path),
+                    ids,
+                )
+
+
+class SQLiteIndex:
+    """Read-only access to a tree stored by `build_index`.
+
+    Every query goes through an index, so its cost depends on the size of
+    the listed directory or page, not on the size of the tree.
+
+    Parameters
+    ----------
+    database_path : Path
+        The database file.
+
+    Attributes
+    ----------
+    database_path : Path
+        The database file.
+
+    """
+
+    def __init__(self, database_path: Path) -> None:
+        """Open the index."""
+        self.database_path: Path = database_path
+        self.__connection: sqlite3.Connection | None = None
+        self.__process_id: int = 0
+        # Fail early on a missing or invalid database.
+        self.connection.execute("SELECT 1 FROM nodes LIMIT 1")
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Get the connection, reopened in forked worker processes."""
+        if self.__connection is None or self.__process_id != os.getpid():
+            if not self.database_path.is_file():
+                error_message: str = f"No such index: {self.database_path}"
+                raise FileNotFoundError(error_message)
+            self.__connection = sqlite3.connect(
+                f"{self.database_path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+            )
+            self.__process_id = os.getpid()
+        return self.__connection
+
+    def fetch_node(self, path: str) -> IndexedNode | None:
+        """Fetch a node by path through the path index.
+
+        Parameters
+        ----------
+        path : str
+            The path to the node relative to the root, '' for the root.
+
+        Returns
+        -------
+        IndexedNode | None
+            The node, None if the path does not exist.
+
+        """
+        row: NodeRow | None = self.connection.execute(
+            f"SELECT {NODE_COLUMNS} FROM nodes WHERE path = ?",  # noqa: S608
+            (path,),
+        ).fetchone()
+        return None if row is None else IndexedNode(self, row)
+
+    def list_children(
+        self,
+        node: IndexedNode,
+        *,
+        sort_by: str,
+        reverse: bool,
+        show_hidden_files: bool,
+        filter_by_type: str | None,
+    ) -> list[Node]:
+        """List a directory in the order of `FileSystem.ls`.
+
+        As with a stable sort, entries with equal sort keys keep the order
+        of the structure file, even in reverse.
+
+        Parameters
+        ----------
+        node : IndexedNode
+            The directory.
+        sort_by : str
+            One of INDEXED_SORT_COLUMNS.
+        reverse : bool
+            Whether to list in descending order.
+        show_hidden_files : bool
+            Whether to include hidden entries.
+        filter_by_type : str | None
+            Whether to keep only directories ('dir') or files ('file').
+
+        Returns
+        -------
+        list[Node]
+            The sorted children.
+
+        """
+        conditions, parameters = self.__child_conditions(
+            node,
+            show_hidden_files=show_hidden_files,
+            filter_by_type=filter_by_type,
+        )
+        direction: str = "DESC" if reverse else "ASC"
+        rows: list[NodeRow] = self.connection.execute(
+            f"SELECT {NODE_COLUMNS} FROM nodes WHERE {' AND '.join(conditions)} "  # noqa: S608
+            f"ORDER BY {INDEXED_SORT_COLUMNS[sort_by]} {direction}, id",
+            parameters,
+        ).fetchall()
+        return [IndexedNode(self, row) for row in rows]
+
+    def page_children(
+        self,
+        node: IndexedNode,
+        *,
+        sort_by: str,
+        reverse: bool,
+        show_hidden_files: bool,
+        filter_by_type: str | None,
+        after: SortPosition | None,
+        page_size: int,
+    ) -> tuple[list[Node], SortPosition | None]:
+        """Return one page of a directory with a keyset query.
+
+        The page starts right after the (sort key, name) position of the
+        cursor, so the database seeks to it through the index instead of
+        skipping the previous pages.
+
+        Parameters
+        ----------
+        node : IndexedNode
+            The directory.
+        sort_by : str
+            One of INDEXED_SORT_COLUMNS.
+        reverse : bool
+            Whether to list in descending order.
+        show_hidden_files : bool
+            Whether to include hidden entries.
+        filter_by_type : str | None
+            Whether to keep only directories ('dir') or files ('file').
+        after : SortPosition | None
+            The position to continue after, None for the first page.
+        page_size : int
+            The maximum number of nodes in the page.
+
+        Returns
+        -------
+        tuple[list[Node], SortPosition | None]
+            The nodes of the page and the position to continue after, None
+            if this is the last page.
+
+        """
+        column: str = INDEXED_SORT_COLUMNS[sort_by]
+        conditions, parameters = self.__child_conditions(
+            node,
+            show_hidden_files=show_hidden_files,
+            filter_by_type=filter_by_type,
+        )
+        if after is not None:
+            conditions.append(f"({column}, name) {'<' if reverse else '>'} (?, ?)")
+            parameters.extend(after)
+        direction: str = "DESC" if reverse else "ASC"
+        rows: list[NodeRow] = self.connection.execute(
+            f"SELECT {NODE_COLUMNS} FROM nodes WHERE {' AND '.join(conditions)} "  # noqa: S608
+            f"ORDER BY {column} {direction}, name {direction} LIMIT ?",
+            [*parameters, page_size + 1],
+        ).fetchall()
+        nodes: list[Node] = [IndexedNode(self, row) for row in rows[:page_size]]
+        if len(rows) <= page_size:
+            return nodes, None
+        last: Node = nodes[-1]
+        return nodes, (
+            last.time_modified_int if sort_by == "time" else last.name,
+            last.name,
+        )
+
+    def complete_children(self, node: IndexedNode, prefix: str) -> list[Node]:
+        """Return the children whose name starts with a prefix.
+
+        The range of names is read through the (parent, name) index, so
+        the cost does not depend on the size of the directory.
+
+        Parameters
+        ----------
+        node : IndexedNode
+            The directory.
+        prefix : str
+            The prefix, '' for every child.
+
+        Returns
+        -------
+        list[Node]
+            The matching children, sorted by name.
+
+        """
+        conditions: list[str] = ["parent_id = ?", "name >= ?"]
+        parameters: list[object] = [node.row_id, prefix]
+        bound: str | None = prefix_bound(prefix)
+        if bound is not None:
+            conditions.append("name < ?")
+            parameters.append(bound)
+        rows: list[NodeRow] = self.connection.execute(
+            f"SELECT {NODE_COLUMNS} FROM nodes WHERE {' AND '.join(conditions)} "  # noqa: S608
+            "ORDER BY name",
+            parameters,
+        ).fetchall()
+        return [IndexedNode(self, row) for row in rows]
+
+    def children_of(self, node: IndexedNode) -> dict[str, Node]:
+        """Return the children of a directory in the order of the file.
+
+        Parameters
+        ----------
+        node : IndexedNode
+            The directory.
+
+        Returns
+        -------
+        dict[str, Node]
+            The children by name.
+
+        """
+        rows: list[NodeRow] = self.connection.execute(
+            f"SELECT {NODE_COLUMNS} FROM nodes WHERE parent_id = ? ORDER BY id",  # noqa: S608
+            (node.row_id,),
+        ).fetchall()
+        return {row[2]: IndexedNode(self, row) for row in rows}
+
+    def close(self) -> None:
+        """Close the connection of this process."""
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    @staticmethod
+    def __child_conditions(
+        node: IndexedNode,
+        *,
+        show_hidden_files: bool,
+        filter_by_type: str | None,
+    ) -> tuple[list[str], list[object]]:
+        """Return the WHERE conditions selecting the listed children."""
+        conditions: list[str] = ["parent_id = ?"]
+        parameters: list[object] = [node.row_id]
+        if not show_hidden_files:
+            conditions.append("substr(name, 1, 1) != '.'")
+        if filter_by_type in {"dir", "file"}:
+            conditions.append("is_directory = ?")
+            parameters.append(filter_by_type == "dir")
+        return conditions, parameters
+
+
+class IndexedNode(Node):
+    """Node read from an `SQLiteIndex`.
+
+    Only the node itself is held in memory: its children are queried on
+    every access, and it has no parent node. Two instances for the same row
+    compare equal, so that results cached for one are reused for the other.
+
+    Parameters
+    ----------
+    index : SQLiteIndex
+        The index the node was read from.
+    row : NodeRow
+        The id, path, name, size, modification time, permissions and
+        directory flag of the node.
+
+    """
+
+    def __init__(self, index: SQLiteIndex, row: NodeRow) -> None:
+        """Initialise a node from a row of the index."""
+        row_id, path, name, size, time_modified_int, permissions, is_directory = row
+        self.index: SQLiteIndex = index
+        self.row_id: int = row_id
+        self.path: str = path
+        super().__init__(
+            name=name,
+            size=size,
+            time_modified_int=time_modified_int,
+            permissions=permissions,
+            is_directory=bool(is_directory),
+        )
+        self.depth = path.count("/") + 1 if path else 0
+        self.relative_path = f"./{path}"
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the rows of two indexed nodes."""
+        if not isinstance(other, IndexedNode):
+            return NotImplemented
+        return self.index is other.index and self.row_id == other.row_id
+
+    def __hash__(self) -> int:
+        """Hash the row of the node."""
+        return hash(self.row_id)
+
+    @property
+    def children(self) -> dict[str, Node] | None:
+        """Get the children, queried from the index."""
+        return self.index.children_of(self) if self.is_directory else None
+
+    @children.setter
+    def children(self, children: dict[str, Node] | None) -> None:
+        # The index is read-only, so only the initial value is accepted.
+        pass
+
+    def get_child(self, name_or_path: str) -> Node | None:
+        """Get a descendant by path through the path index.
+
+        Parameters
+        ----------
+        name_or_path : str
+            The name or path of the descendant.
+
+        Returns
+        -------
+        Node | None
+            The descendant, None if it does not exist.
+
+        """
+        if not self.is_directory:
+            return None
+        return self.index.fetch_node(
+            f"{self.path}/{name_or_path}" if self.path else name_or_path,
+        )
@@ -0,0 +1,234 @@
+"""Readers for structure files."""
+
+from __future__ import annotations
+
+import bz2
+import gzip
+import json
+import lzma
+import os
+from typing import IO, TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+
+MAGIC_BYTES: dict[bytes, Callable[..., IO[bytes]]] = {
+    b"\x1f\x8b": gzip.open,
+    b"\xfd7zXZ\x00": lzma.open,
+    b"BZh": bz2.open,
+}
+MAGIC_LENGTH: int = max(len(magic) for magic in MAGIC_BYTES)
+NDJSON_SUFFIXES: frozenset[str] = frozenset({".ndjson", ".jsonl"})
+HEAD_LENGTH: int = 4096
+TAIL_LENGTH: int = 256
+
+
+def open_structure_file(json_path: Path) -> IO[bytes]:
+    """Open a structure file, decompressing it on the fly if needed.
+
+    gzip, xz and bzip2 files are detected by their magic bytes, whatever
+    their extension, and are decompressed as a stream while being read.
+
+    Parameters
+    ----------
+    json_path : Path
+        The path to the structure file.
+
+    Returns
+    -------
+    IO[bytes]
+        A binary file object yielding the uncompressed content.
+
+    """
+    opener: Callable[..., IO[bytes]] | None = detect_compression(json_path)
+    if opener is not None:
+        return opener(json_path, mode="rb")
+    return json_path.open(mode="rb")
+
+
+def detect_compression(json_path: Path) -> Callable[..., IO[bytes]] | None:
+    """Return the opener matching the magic bytes of a file.
+
+    Parameters
+    ----------
+    json_path : Path
+        The path to the structure file.
+
+    Returns
+    -------
+    Callable[..., IO[bytes]] | None
+        The opener of the codec, None if the file is not compressed.
+
+    """
+    with json_path.open(mode="rb") as raw_file:
+        header: bytes = raw_file.read(MAGIC_LENGTH)
+    for magic, opener in MAGIC_BYTES.items():
+        if header.startswith(magic):
+            return opener
+    return None
+
+
+def is_ndjson_path(json_path: Path) -> bool:
+    """Check whether a structure file uses the flat NDJSON format.
+
+    Parameters
+    ----------
+    json_path : Path
+        The path to the structure file, e.g. 'structure.ndjson.gz'.
+
+    Returns
+    -------
+    bool
+        Whether any suffix of the path is '.ndjson' or '.jsonl'.
+
+    """
+    return any(suffix in NDJSON_SUFFIXES for suffix in json_path.suffixes)
+
+
+def iter_records(json_path: Path, end: int | None = None) -> Iterator[dict]:
+    """Iterate over the records of an NDJSON structure file.
+
+    The file is read one line at a time, so memory use does not depend on
+    the size of the file. Blank lines are skipped.
+
+    Parameters
+    ----------
+    json_path : Path
+        The path to the structure file.
+    end : int | None, optional
+        The offset to stop reading at, at the start of a line, by default
+        None to read the whole file.
+
+    Yields
+    ------
+    dict
+        One record per line.
+
+    """
+    offset: int = 0
+    with open_structure_file(json_path) as json_file:
+        for line in json_file:
+            if end is not None and offset >= end:
+                return
+            offset += len(line)
+            if line.strip():
+                yield json.loads(line)
+
+
+def complete_records_end(json_path: Path, size: int) -> int:
+    """Return the offset following the last complete line of a file.
+
+    A trailing line without a newline may still be being written. It is
+    complete if it parses as a record.
+
+    Parameters
+    ----------
+    json_path : Path
+        The path to an uncompressed NDJSON structure file.
+    size : int
+        The size of the file to consider.
+
+    Returns
+    -------
+    int
+        The offset of the incomplete trailing line, or `size` if there is
+        none.
+
+    """
+    with json_path.open(mode="rb") as raw_file:
+        end: int = size
+        while end > 0:
+            start: int = max(end - TAIL_LENGTH, 0)
+            raw_file.seek(start)
+            newline: int = raw_file.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        raw_file.seek(end)
+        trailing_line: bytes = raw_file.read(size - end)
+    if not trailing_line.strip():
+        return size
+    try:
+        json.loads(trailing_line)
+    except ValueError:
+        return end
+    return size
+
+
+def file_signature(json_path: Path) -> tuple[int, int]:
+    """Return the modification time in nanoseconds and the size of a file.
+
+    Parameters
+    ----------
+    json_path : Path
+        The path to the file.
+
+    Returns
+    -------
+    tuple[int, int]
+        A signature that changes whenever the file is rewritten or grows.
+
+    """
+    status = json_path.stat()
+    return status.st_mtime_ns, status.st_size
+
+
+def read_prefix_marker(json_path: Path, offset: int) -> tuple[int, int, bytes, bytes]:
+    """Return what identifies the content of a file before an offset.
+
+    Parameters
+    ----------
+    json_path : Path
+        The path to the file.
+    offset : int
+        The end of the content.
+
+    Returns
+    -------
+    tuple[int, int, bytes, bytes]
+        The device and inode of the file, its first `HEAD_LENGTH` bytes and
+        the `TAIL_LENGTH` bytes preceding `offset`. A file replaced by a new
+        one, or rewritten at its start or near `offset`, gives a different
+        marker, so that later reads can check that data was only appended.
+
+    """
+    with json_path.open(mode="rb") as raw_file:
+        status = os.fstat(raw_file.fileno())
+        head: bytes = raw_file.read(min(HEAD_LENGTH, offset))
+        start: int = max(offset - TAIL_LENGTH, 0)
+        raw_file.seek(start)
+        tail: bytes = raw_file.read(offset - start)
+    return status.st_dev, status.st_ino, head, tail
+
+
+def read_appended_records(json_path: Path, offset: int) -> tuple[list[dict], int]:
+    """Read the complete NDJSON records written after an offset.
+
+    A trailing line without a newline may still be being written, so it is
+    left for the next read.
+
+    Parameters
+    ----------
+    json_path : Path
+        The path to an uncompressed NDJSON structure file.
+    offset : int
+        The position to read from, at the start of a line.
+
+    Returns
+    -------
+    tuple[list[dict], int]
+        The records and the offset following the last complete line.
+
+    """
+    records: list[dict] = []
+    with json_path.open(mode="rb") as raw_file:
+        raw_file.seek(offset)
+        for line in raw_file:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            if line.strip():
+                records.append(json.loads(line))
+    return records, offset
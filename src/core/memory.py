@@ -0,0 +1,235 @@
+"""Memory accounting of a loaded tree."""
+
+from __future__ import annotations
+
+import gc
+import struct
+import sys
+import tracemalloc
+from typing import TYPE_CHECKING
+
+from src.core.export import node_type
+from src.core.index import IndexedNode
+from src.core.mount import MountNode
+from src.core.node import Node
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Iterator
+
+NODE_INSTANCES: str = "Node instances"
+OTHER_ATTRIBUTES: str = "other attributes"
+POINTER_SIZE: int = struct.calcsize("P")
+# Attributes reported in a category of their own. `children` is read only
+# where it is a plain attribute: it would mount a mount point, whose loaded
+# children are in `_children`, and query the database for an indexed node.
+ATTRIBUTE_CATEGORIES: dict[str, str] = {
+    "children": "children dicts",
+    "_children": "children dicts",
+    "name": "names",
+    "relative_path": "relative_path strings",
+    "time_modified_datetime": "datetime objects",
+}
+MEMORY_CATEGORIES: tuple[str, ...] = (
+    NODE_INSTANCES,
+    *dict.fromkeys(ATTRIBUTE_CATEGORIES.values()),
+    OTHER_ATTRIBUTES,
+)
+
+
+def iter_loaded_nodes(node: Node) -> Iterator[Node]:
+    """Iterate over a node and the loaded nodes below it.
+
+    Mount points that are not loaded are yielded but not entered, and
+    neither are nodes read from an SQLite index, whose children are not
+    held in memory, so that the walk measures the tree as it is without
+    loading anything.
+
+    Parameters
+    ----------
+    node : Node
+        The node to start from.
+
+    Yields
+    ------
+    Node
+        Every loaded node once, in no particular order.
+
+    """
+    stack: list[Node] = [node]
+    while stack:
+        current: Node = stack.pop()
+        yield current
+        if isinstance(current, MountNode):
+            for loaded in current.iter_loaded():
+                if isinstance(loaded, MountNode):
+                    stack.append(loaded)
+                else:
+                    yield loaded
+        elif not isinstance(current, IndexedNode) and current.children:
+            stack.extend(current.children.values())
+
+
+def sizeof(value: object, seen: set[int]) -> int:
+    """Return the size of an attribute value not counted yet.
+
+    Tuples and lists are measured with their items, since sort keys are
+    cached as tuples. Nodes are measured on their own and count as 0 here.
+
+    Parameters
+    ----------
+    value : object
+        The attribute value.
+    seen : set[int]
+        The ids of the objects counted so far, updated in place. Objects
+        shared between nodes, such as interned strings, are counted once.
+
+    Returns
+    -------
+    int
+        The size in bytes.
+
+    """
+    if isinstance(value, Node) or id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size: int = sys.getsizeof(value)
+    if isinstance(value, tuple | list):
+        size += sum(sizeof(item, seen) for item in value)
+    return size
+
+
+class MemoryReport:
+    """Memory held by the nodes of a tree, by category and node type.
+
+    Attributes
+    ----------
+    nodes : int
+        The number of nodes measured.
+    categories : dict[str, int]
+        The bytes per category of MEMORY_CATEGORIES.
+    node_types : dict[str, list[int]]
+        The node count and bytes per class and type, e.g. 'Node dir'.
+    traced_bytes : int | None
+        The memory traced by `tracemalloc` when the report was made, None if
+        it was not tracing.
+    traced_peak_bytes : int | None
+        The peak memory traced by `tracemalloc`, None if it was not tracing.
+
+    """
+
+    def __init__(self) -> None:
+        """Initialise an empty report."""
+        self.nodes: int = 0
+        self.categories: dict[str, int] = dict.fromkeys(MEMORY_CATEGORIES, 0)
+        self.node_types: dict[str, list[int]] = {}
+        self.traced_bytes: int | None = None
+        self.traced_peak_bytes: int | None = None
+
+    @property
+    def total_bytes(self) -> int:
+        """Get the bytes held by the measured nodes."""
+        return sum(self.categories.values())
+
+    @property
+    def bytes_per_node(self) -> float:
+        """Get the mean bytes held per node."""
+        return self.total_bytes / self.nodes if self.nodes else 0.0
+
+    def add(self, node: Node, seen: set[int]) -> None:
+        """Account for one node and the objects it holds.
+
+        Parameters
+        ----------
+        node : Node
+            The node.
+        seen : set[int]
+            The ids of the objects counted so far, updated in place.
+
+        """
+        # The attribute values are stored inline, one pointer each, and
+        # are found through the references of the node: `vars` would create
+        # an instance dictionary that the node does not otherwise have.
+        values: list[object] = [
+            value for value in gc.get_referents(node) if not isinstance(value, type)
+        ]
+        node_bytes: int = sys.getsizeof(node) + POINTER_SIZE * len(values)
+        self.categories[NODE_INSTANCES] += node_bytes
+        for attribute, category in ATTRIBUTE_CATEGORIES.items():
+            if isinstance(getattr(type(node), attribute, None), property):
+                continue
+            value: object = getattr(node, attribute, None)
+            if value is not None:
+                size: int = sizeof(value, seen)
+                self.categories[category] += size
+                node_bytes += size
+        # Cached sort keys and the other attributes, not counted yet.
+        size = sum(sizeof(other, seen) for other in values)
+        self.categories[OTHER_ATTRIBUTES] += size
+        node_bytes += size
+        self.nodes += 1
+        counts: list[int] = self.node_types.setdefault(
+            f"{type(node).__name__} {node_type(node)}",
+            [0, 0],
+        )
+        counts[0] += 1
+        counts[1] += node_bytes
+
+    def report(self) -> str:
+        """Render the report as plain text.
+
+        Returns
+        -------
+        str
+            The report, one section per breakdown.
+
+        """
+        total_bytes: int = self.total_bytes
+        lines: list[str] = [
+            f"nodes\t{self.nodes}",
+            f"bytes\t{total_bytes}",
+            f"bytes per node\t{self.bytes_per_node:.1f}",
+        ]
+        if self.traced_bytes is not None:
+            lines.extend(
+                [
+                    f"traced bytes\t{self.traced_bytes}",
+                    f"traced peak bytes\t{self.traced_peak_bytes}",
+                ],
+            )
+        lines.extend(["", "by category\tbytes\tshare"])
+        lines.extend(
+            f"{category}\t{size}\t{size / total_bytes if total_bytes else 0.0:.1%}"
+            for category, size in self.categories.items()
+        )
+        lines.extend(["", "by node type\tnodes\tbytes\tbytes per node"])
+        lines.extend(
+            f"{name}\t{count}\t{size}\t{size / count:.1f}"
+            for name, (count, size) in sorted(self.node_types.items())
+        )
+        return "\n".join(lines)
+
+
+def collect_memory(node: Node) -> MemoryReport:
+    """Measure the memory held by a node and the loaded nodes below it.
+
+    The `tracemalloc` figures are read first, so that they are not affected
+    by the objects allocated by the walk.
+
+    Parameters
+    ----------
+    node : Node
+        The node to start from.
+
+    Returns
+    -------
+    MemoryReport
+        The report.
+
+    """
+    report = MemoryReport()
+    if tracemalloc.is_tracing():
+        report.traced_bytes, report.traced_peak_bytes = tracemalloc.get_traced_memory()
+    seen: set[int] = set()
+    for current in iter_loaded_nodes(node):
+        report.add(current, seen)
+    return report
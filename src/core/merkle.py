@@ -0,0 +1,124 @@
+"""Merkle hashes of subtrees."""
+
+from __future__ import annotations
+
+from hashlib import blake2b
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from src.core.node import Node
+
+DIGEST_SIZE: int = 16
+DIGEST_MODULUS: int = 1 << (DIGEST_SIZE * 8)
+
+
+def node_digest(node: Node) -> bytes:
+    """Hash the metadata of a node together with its children.
+
+    The children are folded in through `node.children_digest`, the sum of
+    their digests, so that the result does not depend on insertion order
+    and can be updated without rehashing every sibling.
+
+    Parameters
+    ----------
+    node : Node
+        The node to hash.
+
+    Returns
+    -------
+    bytes
+        The digest of the node.
+
+    """
+    digest = blake2b(
+        node.hashed_metadata().encode(errors="surrogatepass"),
+        digest_size=DIGEST_SIZE,
+    )
+    if node.is_directory:
+        digest.update(node.children_digest.to_bytes(DIGEST_SIZE))
+    return digest.digest()
+
+
+def compute_subtree_hashes(node: Node) -> None:
+    """Hash every node of a subtree in a single post-order pass.
+
+    Parameters
+    ----------
+    node : Node
+        The root of the subtree.
+
+    """
+    stack: list[tuple[Node, bool]] = [(node, False)]
+    while stack:
+        current, children_done = stack.pop()
+        children: dict[str, Node] | None = current.hashed_children()
+        if children and not children_done:
+            stack.append((current, True))
+            stack.extend((child, False) for child in children.values())
+            continue
+        # Left alone for nodes without hashed children, such as mount points.
+        if children is not None:
+            current.children_digest = (
+                sum(
+                    int.from_bytes(child.content_hash)
+                    for child in children.values()
+                    if child.content_hash is not None
+                )
+                % DIGEST_MODULUS
+            )
+        current.content_hash = node_digest(current)
+
+
+def replace_child_digest(
+    node: Node,
+    old_child_hash: bytes | None,
+    new_child_hash: bytes | None,
+) -> None:
+    """Swap one child digest of a directory and rehash up to the root.
+
+    Parameters
+    ----------
+    node : Node
+        The directory whose child changed.
+    old_child_hash : bytes | None
+        The digest of the replaced child, None if it is a new child.
+    new_child_hash : bytes | None
+        The digest of the new child, None if it was removed.
+
+    """
+    node.children_digest = (
+        node.children_digest
+        - int.from_bytes(old_child_hash or b"")
+        + int.from_bytes(new_child_hash or b"")
+    ) % DIGEST_MODULUS
+    rehash_ancestors(node)
+
+
+def rehash_ancestors(node: Node) -> None:
+    """Recompute the digest of a node and propagate it to its ancestors.
+
+    Propagation stops at ancestors that are not hashed yet, and at those
+    whose hash does not cover the node, such as mount points.
+
+    Parameters
+    ----------
+    node : Node
+        The node whose own metadata or children changed.
+
+    """
+    current: Node | None = node
+    while current is not None and current.content_hash is not None:
+        old_hash: bytes = current.content_hash
+        current.content_hash = node_digest(current)
+        parent: Node | None = current.parent_node
+        if parent is None or parent.content_hash is None:
+            return
+        siblings: dict[str, Node] | None = parent.hashed_children()
+        if siblings is None or siblings.get(current.name) is not current:
+            return
+        parent.children_digest = (
+            parent.children_digest
+            - int.from_bytes(old_hash)
+            + int.from_bytes(current.content_hash)
+        ) % DIGEST_MODULUS
+        current = parent
@@ -0,0 +1,418 @@
+"""Mount points for sharded structure files."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from src.core.merkle import DIGEST_MODULUS
+from src.core.node import Node
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+
+
+class ShardCache:
+    """Least-recently-used registry of mounted shards.
+
+    The cache can be bounded by the number of mounted shards, by the number
+    of nodes they hold, or both. Unmounting a shard also unmounts the shards
+    nested below it, and the shards on the path to the one being mounted
+    are never unmounted to make room for it. A shard whose loaded contents
+    were modified is written back through `saver` before it is unmounted,
+    or pinned in memory if it cannot be, so that the changes are not lost.
+
+    Parameters
+    ----------
+    loader : Callable[[MountNode], None]
+        Function that sets the children of a mount point from its shard.
+        Only accesses from outside the loader are counted as hits.
+    max_resident_shards : int | None, optional
+        The maximum number of shards kept in memory, by default None
+        (unbounded).
+    max_resident_nodes : int | None, optional
+        The maximum number of nodes kept in memory, counting the pinned
+        nodes outside any shard, by default None (unbounded).
+    on_evict : Callable[[set[Node]], None] | None, optional
+        Function called with each unmounted mount point and the nodes it
+        held, so that references to them elsewhere can be dropped, by
+        default None.
+    saver : Callable[[MountNode], bool] | None, optional
+        Function that writes the modified contents of a mount point back
+        to its file, returning False if they cannot be, by default None
+        (never written back).
+
+    Attributes
+    ----------
+    resident : OrderedDict[MountNode, int]
+        The mounted shards and the number of nodes each holds, least recently
+        used first.
+    resident_nodes : int
+        The number of nodes held by the mounted shards.
+    pinned : set[MountNode]
+        The mount points kept mounted because their modified contents
+        could not be written back.
+    pinned_nodes : int
+        The number of nodes outside any shard or in a pinned one, which
+        are never unmounted.
+    hits : int
+        The number of accesses to shards that were already mounted.
+    loads : int
+        The number of shard loads performed.
+    evictions : int
+        The number of shards unmounted to respect the bounds.
+
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[MountNode], None],
+        max_resident_shards: int | None = None,
+        max_resident_nodes: int | None = None,
+        on_evict: Callable[[set[Node]], None] | None = None,
+        saver: Callable[[MountNode], bool] | None = None,
+    ) -> None:
+        """Initialise the shard cache."""
+        self.loader: Callable[[MountNode], None] = loader
+        self.max_resident_shards: int | None = max_resident_shards
+        self.max_resident_nodes: int | None = max_resident_nodes
+        self.on_evict: Callable[[set[Node]], None] | None = on_evict
+        self.saver: Callable[[MountNode], bool] | None = saver
+        self.resident: OrderedDict[MountNode, int] = OrderedDict()
+        self.pinned: set[MountNode] = set()
+        self.lock: threading.RLock = threading.RLock()
+        self.resident_nodes: int = 0
+        self.pinned_nodes: int = 0
+        self.hits: int = 0
+        self.loads: int = 0
+        self.evictions: int = 0
+
+    def touch(self, mount_node: MountNode) -> dict[str, Node] | None:
+        """Mark a mount point as used, mounting it if necessary.
+
+        Parameters
+        ----------
+        mount_node : MountNode
+            The mount point being traversed.
+
+        Returns
+        -------
+        dict[str, Node] | None
+            The children of the mount point, read while the lock is held so
+            that a concurrent eviction cannot drop them in between.
+
+        """
+        # Loading and evicting modify the tree, so concurrent readers
+        # take turns.
+        with self.lock:
+            if mount_node in self.resident:
+                self.hits += 1
+                self.resident.move_to_end(mount_node)
+                return mount_node.loaded_children
+            if mount_node in self.pinned:
+                self.hits += 1
+                return mount_node.loaded_children
+            # Registered before loading, so that a loader reading `children`
+            # does not mount recursively.
+            self.resident[mount_node] = 0
+            try:
+                self.loader(mount_node)
+            except Exception:
+                del self.resident[mount_node]
+                mount_node.unmount()
+                raise
+            mount_node.mark_mounted()
+            node_count: int = sum(1 for _ in mount_node.iter_loaded())
+            self.resident[mount_node] = node_count
+            self.resident_nodes += node_count
+            self.loads += 1
+            if self.is_over_budget():
+                self.evict_cold(mount_node)
+            return mount_node.loaded_children
+
+    def is_over_budget(self) -> bool:
+        """Check whether more shards or nodes are resident than allowed."""
+        return (
+            self.max_resident_shards is not None
+            and len(self.resident) > max(self.max_resident_shards, 1)
+        ) or (
+            self.max_resident_nodes is not None
+            and self.pinned_nodes + self.resident_nodes > self.max_resident_nodes
+        )
+
+    def evict_cold(self, mount_node: MountNode) -> None:
+        """Unmount the least recently used shards until within the bounds.
+
+        Parameters
+        ----------
+        mount_node : MountNode
+            The mount point just used, which stays mounted along with the
+            mount points above it.
+
+        """
+        protected: set[Node] = set()
+        node: Node | None = mount_node
+        while node is not None:
+            protected.add(node)
+            node = node.parent_node
+        for candidate in list(self.resident):
+            if not self.is_over_budget():
+                return
+            if candidate not in protected and candidate in self.resident:
+                self.evict(candidate)
+
+    def evict(self, mount_node: MountNode) -> bool:
+        """Unmount a shard and the shards mounted below it.
+
+        Modified contents are written back first. A shard that cannot be
+        written back, or holds a pinned shard, is pinned instead.
+
+        Parameters
+        ----------
+        mount_node : MountNode
+            The mount point to unmount.
+
+        Returns
+        -------
+        bool
+            Whether the shard was unmounted rather than pinned.
+
+        """
+        unmounted: set[Node] = {mount_node}
+        holds_pinned: bool = False
+        for node in mount_node.iter_loaded():
+            unmounted.add(node)
+            if isinstance(node, MountNode) and (
+                node in self.pinned or (node in self.resident and not self.evict(node))
+            ):
+                holds_pinned = True
+        node_count: int = self.resident.pop(mount_node)
+        self.resident_nodes -= node_count
+        if holds_pinned or (
+            mount_node.is_modified
+            and (self.saver is None or not self.saver(mount_node))
+        ):
+            self.pinned.add(mount_node)
+            self.pinned_nodes += node_count
+            return False
+        mount_node.unmount()
+        self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(unmounted)
+        return True
+
+    def clear(self) -> None:
+        """Forget every shard, e.g. once the tree holding them is replaced."""
+        with self.lock:
+            self.resident.clear()
+            self.pinned.clear()
+            self.resident_nodes = 0
+            self.pinned_nodes = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return the counters and the current number of resident nodes."""
+        return {
+            "resident_shards": len(self.resident),
+            "pinned_shards": len(self.pinned),
+            "resident_nodes": self.resident_nodes,
+            "pinned_nodes": self.pinned_nodes,
+            "hits": self.hits,
+            "loads": self.loads,
+            "evictions": self.evictions,
+        }
+
+
+class MountNode(Node):
+    """Directory node whose contents live in a separate structure file.
+
+    The contents are loaded the first time `children` is accessed, and may
+    be dropped again by the owning `ShardCache`. Its Merkle hash covers the
+    reference, not the contents of the shard, but the hashes of the loaded
+    children are kept so that modifications of them can be detected.
+
+    Parameters
+    ----------
+    name : str
+        The name of the node.
+    size : int
+        The size of the node in bytes.
+    time_modified_int : int
+        The time the node was last modified in seconds from epoch.
+    permissions : str
+        The permissions of the node.
+    ref : Path
+        The path to the structure file holding the contents.
+    shard_cache : ShardCache
+        The cache responsible for mounting this node.
+    parent_node : Node | None, optional
+        The parent node of the current node (default is None).
+
+    """
+
+    def __init__(
+        self,
+        name: str,
+        size: int,
+        time_modified_int: int,
+        permissions: str,
+        *,
+        ref: Path,
+        shard_cache: ShardCache,
+        parent_node: Node | None = None,
+    ) -> None:
+        """Initialise a mount point."""
+        self.ref: Path = ref
+        self.shard_cache: ShardCache = shard_cache
+        super().__init__(
+            name=name,
+            size=size,
+            time_modified_int=time_modified_int,
+            permissions=permissions,
+            is_directory=True,
+            parent_node=parent_node,
+        )
+        self._children: dict[str, Node] | None = None
+        # The state of the contents when they were mounted.
+        self.__mounted_state: tuple[int, int] | None = None
+
+    @property
+    def is_mounted(self) -> bool:
+        """Whether the contents are currently loaded."""
+        return self._children is not None
+
+    @property
+    def loaded_children(self) -> dict[str, Node] | None:
+        """The children if the contents are loaded, without mounting them."""
+        return self._children
+
+    @property
+    def children(self) -> dict[str, Node] | None:
+        """Get the children, mounting the shard on first access."""
+        return self.shard_cache.touch(self)
+
+    @children.setter
+    def children(self, children: dict[str, Node] | None) -> None:
+        self._children = children
+
+    @property
+    def is_modified(self) -> bool:
+        """Whether the loaded contents changed since they were mounted."""
+        return (
+            self._children is not None
+            and self.__contents_state() != self.__mounted_state
+        )
+
+    def mark_mounted(self) -> None:
+        """Remember the state of the contents just loaded from the file."""
+        self.__mounted_state = self.__contents_state()
+
+    def __contents_state(self) -> tuple[int, int]:
+        """Return the revision and the sum of the digests of the children.
+
+        Adding or replacing a child bumps the revision, and a modification
+        further down changes the digest of a child through its hash.
+        """
+        return self.revision, sum(
+            int.from_bytes(child.content_hash or b"")
+            for child in (self._children or {}).values()
+        ) % DIGEST_MODULUS
+
+    def hashed_metadata(self) -> str:
+        """Return the metadata covered by the Merkle hash of the node.
+
+        A mount point is hashed by its reference rather than its contents,
+        so that hashing the tree does not load every shard.
+        """
+        return f"{super().hashed_metadata()}\0{self.ref}"
+
+    def hashed_children(self) -> dict[str, Node] | None:
+        """Return None, since the contents are not covered by the hash."""
+        return None
+
+    def iter_loaded(self) -> Iterator[Node]:
+        """Iterate over the loaded nodes below the mount point.
+
+        Nested mount points are yielded but not entered, and nothing is
+        loaded, so every node is attributed to exactly one mount point.
+
+        Yields
+        ------
+        Node
+            The nodes held by this mount point.
+
+        """
+        stack: list[Node] = list((self._children or {}).values())
+        while stack:
+            node: Node = stack.pop()
+            yield node
+            if not isinstance(node, MountNode) and node.children:
+                stack.extend(node.children.values())
+
+    def unmount(self) -> None:
+        """Drop the loaded contents so they are reloaded on next access."""
+        self._children = None
+        self.__mounted_state = None
+
+
+class SpilledNode(MountNode):
+    """Mount point for a directory evicted to a spill file.
+
+    Unlike a shard, a spilled directory belongs to the original tree, so
+    its Merkle hash is the one the directory had before it was spilled, and
+    covers the contents once they are loaded again. Modified contents are
+    written back to the spill file before they are evicted.
+
+    Parameters
+    ----------
+    name : str
+        The name of the node.
+    size : int
+        The size of the node in bytes.
+    time_modified_int : int
+        The time the node was last modified in seconds from epoch.
+    permissions : str
+        The permissions of the node.
+    ref : Path
+        The path to the spill file holding the contents.
+    shard_cache : ShardCache
+        The cache responsible for mounting this node.
+    children_digest : int
+        The sum of the digests of the children, see `merkle.node_digest`.
+    parent_node : Node | None, optional
+        The parent node of the current node (default is None).
+
+    """
+
+    def __init__(
+        self,
+        name: str,
+        size: int,
+        time_modified_int: int,
+        permissions: str,
+        *,
+        ref: Path,
+        shard_cache: ShardCache,
+        children_digest: int,
+        parent_node: Node | None = None,
+    ) -> None:
+        """Initialise a spilled directory."""
+        super().__init__(
+            name=name,
+            size=size,
+            time_modified_int=time_modified_int,
+            permissions=permissions,
+            ref=ref,
+            shard_cache=shard_cache,
+            parent_node=parent_node,
+        )
+        self.children_digest = children_digest
+
+    def hashed_metadata(self) -> str:
+        """Return the metadata of the directory, ignoring the spill file."""
+        return Node.hashed_metadata(self)
+
+    def hashed_children(self) -> dict[str, Node] | None:
+        """Return the loaded children, without loading them."""
+        return self.loaded_children
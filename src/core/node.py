@@ -2,9 +2,19 @@
 
 from __future__ import annotations
 
+import copy
+import locale
+import weakref
 from datetime import UTC, datetime
+from functools import cached_property
 
-BYTE_LENGTH: int = 1024
+from src.core.formatting import format_size, format_time
+from src.core.merkle import (
+    compute_subtree_hashes,
+    rehash_ancestors,
+    replace_child_digest,
+)
+from src.core.sorting import NaturalKey, extension_key, natural_key
 
 
 class Node:
@@ -48,15 +58,19 @@ class Node:
             self.time_modified_int,
             tz=UTC,
         )
-        self.time_modified: str = self.time_modified_datetime.strftime(
-            format="%b %d %H:%M",
-        )
+        self.time_modified: str = format_time(self.time_modified_int)
         self.permissions: str = permissions
         self.is_directory: bool = is_directory
         self.depth: int = 0 if parent_node is None else parent_node.depth + 1
-        self.parent_node: Node | None = parent_node
+        # A strong reference, or a weak one once `weaken_parent_link` is called.
+        self._parent_link: Node | weakref.ReferenceType[Node] | None = parent_node
         self.is_hidden: bool = self.name.startswith(".")
         self.children: dict[str, Node] | None = {} if is_directory else None
+        # Bumped whenever the listing of this directory may have changed.
+        self.revision: int = 0
+        # Merkle hash of the subtree, set once the tree has been hashed.
+        self.content_hash: bytes | None = None
+        self.children_digest: int = 0
         self.relative_path: str = f"{parent_node.relative_path if parent_node and \
                                      parent_node.depth > 0 else '.'}/{name}"
 
@@ -68,6 +82,89 @@ class Node:
         """Return a string representation of the node."""
         return self.name
 
+    @property
+    def parent_node(self) -> Node | None:
+        """Get the parent node, None for the root."""
+        parent_link: Node | weakref.ReferenceType[Node] | None = self._parent_link
+        if isinstance(parent_link, weakref.ReferenceType):
+            return parent_link()
+        return parent_link
+
+    @parent_node.setter
+    def parent_node(self, parent_node: Node | None) -> None:
+        self._parent_link = parent_node
+
+    def weaken_parent_link(self) -> None:
+        """Hold the parent node through a weak reference.
+
+        Without the reference from child to parent, a tree has no reference
+        cycles, so it is freed by reference counting as soon as it is
+        dropped. The parent must then be kept alive by the tree itself.
+        """
+        if isinstance(self._parent_link, Node):
+            self._parent_link = weakref.ref(self._parent_link)
+
+    def relink_parent(self, parent_node: Node | None) -> None:
+        """Point the node to another parent, keeping the link strong or weak.
+
+        Parameters
+        ----------
+        parent_node : Node | None
+            The new parent node.
+
+        """
+        is_weak: bool = isinstance(self._parent_link, weakref.ReferenceType)
+        self._parent_link = parent_node
+        if is_weak:
+            self.weaken_parent_link()
+
+    def update_location(self) -> None:
+        """Recompute the depth and relative path of a subtree from its parent.
+
+        Called once a node is placed under another parent. Mount points are
+        not entered: their contents are located when they are loaded.
+        """
+        stack: list[Node] = [self]
+        while stack:
+            node: Node = stack.pop()
+            parent_node: Node | None = node.parent_node
+            if parent_node is None:
+                node.depth = 0
+                node.relative_path = f"./{node.name}"
+            else:
+                node.depth = parent_node.depth + 1
+                parent_path: str = (
+                    parent_node.relative_path if parent_node.depth > 0 else "."
+                )
+                node.relative_path = f"{parent_path}/{node.name}"
+            children: dict[str, Node] | None = node.hashed_children()
+            if children:
+                stack.extend(children.values())
+
+    def clone(self, parent_node: Node | None) -> Node:
+        """Return a shallow copy of the node, to be modified in its place.
+
+        The copy shares the child nodes but not the dict holding them, so
+        that children can be added to it without affecting the original.
+        Its parent link is as strong or weak as the one of the original.
+
+        Parameters
+        ----------
+        parent_node : Node | None
+            The parent of the copy, itself usually a copy.
+
+        Returns
+        -------
+        Node
+            The copy.
+
+        """
+        copied: Node = copy.copy(self)
+        copied.relink_parent(parent_node)
+        if self.children is not None:
+            copied.children = dict(self.children)
+        return copied
+
     def add_child(self, node: Node) -> None:
         """Add a child node to the current node.
 
@@ -76,6 +173,9 @@ class Node:
 
         If the current node is not a directory, it raises a ValueError.
 
+        Once the tree has been hashed, the Merkle hashes of this node and its
+        ancestors are updated to cover the new child.
+
         Parameters
         ----------
         node : Node
@@ -87,12 +187,63 @@ class Node:
             If the current node is not a directory.
 
         """
-        if self.is_directory and self.children is not None:
-            self.children[node.name] = node
+        # Read once, since reading the children of a mount point counts as
+        # an access to its shard.
+        children: dict[str, Node] | None = self.children
+        if self.is_directory and children is not None:
+            replaced_node: Node | None = children.get(node.name)
+            children[node.name] = node
+            self.revision += 1
+            if self.content_hash is not None and self.hashed_children() is not None:
+                if node.content_hash is None:
+                    compute_subtree_hashes(node)
+                replace_child_digest(
+                    self,
+                    None if replaced_node is None else replaced_node.content_hash,
+                    node.content_hash,
+                )
         else:
             error_message: str = "Cannot add child to a non-directory node."
             raise ValueError(error_message)
 
+    def update_metadata(
+        self,
+        size: int,
+        time_modified_int: int,
+        permissions: str,
+    ) -> None:
+        """Replace the size, modification time and permissions of the node.
+
+        Parameters
+        ----------
+        size : int
+            The size of the node in bytes.
+        time_modified_int : int
+            The time the node was last modified in seconds from epoch.
+        permissions : str
+            The permissions of the node.
+
+        """
+        self.size = size
+        self.time_modified_int = time_modified_int
+        self.time_modified_datetime = datetime.fromtimestamp(
+            self.time_modified_int,
+            tz=UTC,
+        )
+        self.time_modified = format_time(self.time_modified_int)
+        self.permissions = permissions
+        if self.parent_node is not None:
+            self.parent_node.revision += 1
+        rehash_ancestors(self)
+
+    def hashed_metadata(self) -> str:
+        """Return the metadata covered by the Merkle hash of the node."""
+        return f"{self.name}\0{self.size}\0{self.time_modified_int}\0{self.permissions}"
+
+    def hashed_children(self) -> dict[str, Node] | None:
+        """Return the children covered by the Merkle hash of the node."""
+        return self.children
+
     def get_child(self, name_or_path: str) -> Node | None:
         """Get a child node from the current node.
 
@@ -114,8 +265,9 @@ class Node:
 
         """
         if "/" not in name_or_path:
-            if self.is_directory and self.children is not None:
-                return self.children.get(name_or_path, None)
+            children: dict[str, Node] | None = self.children
+            if self.is_directory and children is not None:
+                return children.get(name_or_path, None)
             return None
 
         parts: list[str] = name_or_path.split("/")
@@ -125,34 +277,35 @@ class Node:
                 if current_node.name == part:
                     return current_node
                 return None
+            children = current_node.children
             child_node: Node | None = (
-                current_node.children.get(part, None)
-                if current_node.children is not None
-                else None
+                children.get(part, None) if children is not None else None
             )
             if child_node is None:
                 return child_node
             current_node = child_node
         return current_node
 
+    @cached_property
+    def natural_sort_key(self) -> NaturalKey:
+        """Get the natural sort key, computed on first use."""
+        return natural_key(self.name)
+
+    @cached_property
+    def extension_sort_key(self) -> tuple[str, str]:
+        """Get the extension sort key, computed on first use."""
+        return extension_key(self.name)
+
+    @cached_property
+    def collation_key(self) -> str:
+        """Get the locale collation key, computed on first use.
+
+        The key follows the LC_COLLATE locale in effect when it is first
+        requested.
+        """
+        return locale.strxfrm(self.name)
+
     @property
     def human_readable_size(self) -> str:
         """Get human readable size."""
-        units: list[str] = [
-            "K",
-            "M",
-            "G",
-            "T",
-            "P",
-            "E",
-            "Z",
-        ]
-        if self.size < BYTE_LENGTH:
-            return str(self.size)
-
-        size_: float = self.size
-        for unit in units:
-            size_ /= BYTE_LENGTH
-            if size_ < BYTE_LENGTH:
-                return f"{round(size_, 1)}{unit}"
-        return f"{self.size}B"
+        return format_size(self.size)
@@ -0,0 +1,145 @@
+"""Cursor-based pagination of directory listings."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+from typing import TYPE_CHECKING, cast
+
+from src.core.sorting import from_json
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable
+
+    from src.core.node import Node
+    from src.core.sorting import SortKey
+
+type SortPosition = tuple[SortKey, str]
+
+MAX_CACHED_LISTINGS: int = 64
+
+
+def encode_cursor(sort_order: str, position: SortPosition) -> str:
+    """Encode a sort position as an opaque cursor.
+
+    Parameters
+    ----------
+    sort_order : str
+        The sort order the position belongs to, e.g. 'name'.
+    position : SortPosition
+        The sort key and name of the last node of a page.
+
+    Returns
+    -------
+    str
+        The URL-safe cursor.
+
+    """
+    return base64.urlsafe_b64encode(
+        json.dumps([sort_order, *position]).encode(),
+    ).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str, SortPosition]:
+    """Decode a cursor created by `encode_cursor`.
+
+    Parameters
+    ----------
+    cursor : str
+        The cursor.
+
+    Returns
+    -------
+    tuple[str, SortPosition]
+        The sort order, and the sort key and name the cursor points after.
+
+    Raises
+    ------
+    ValueError
+        If the cursor is malformed.
+
+    """
+    error_message: str = f"Invalid cursor: {cursor}"
+    try:
+        sort_order, sort_key, name = json.loads(
+            base64.urlsafe_b64decode(cursor.encode()),
+        )
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as error:
+        raise ValueError(error_message) from error
+    if (
+        isinstance(sort_order, str)
+        and isinstance(sort_key, int | str | list)
+        and isinstance(name, str)
+    ):
+        return sort_order, (cast("SortKey", from_json(sort_key)), name)
+    raise ValueError(error_message)
+
+
+class SortedListing:
+    """Nodes of a directory in ascending (sort key, name) order.
+
+    Parameters
+    ----------
+    nodes : list[Node]
+        The nodes to list.
+    sort_key : Callable[[Node], SortKey]
+        The primary sort key; ties are broken by name.
+
+    """
+
+    def __init__(
+        self,
+        nodes: list[Node],
+        sort_key: Callable[[Node], SortKey],
+    ) -> None:
+        """Sort the nodes once."""
+        # Two stable sorts are cheaper than one sort on (key, name) tuples.
+        self.nodes: list[Node] = sorted(nodes, key=attrgetter("name"))
+        self.nodes.sort(key=sort_key)
+        self.positions: list[SortPosition] = [
+            (sort_key(node), node.name) for node in self.nodes
+        ]
+
+    def page(
+        self,
+        after: SortPosition | None,
+        page_size: int,
+        *,
+        reverse: bool,
+    ) -> tuple[list[Node], SortPosition | None]:
+        """Return the page following a position.
+
+        Parameters
+        ----------
+        after : SortPosition | None
+            The position to continue after, None for the first page.
+        page_size : int
+            The maximum number of nodes in the page.
+        reverse : bool
+            Whether the listing is in descending order.
+
+        Returns
+        -------
+        tuple[list[Node], SortPosition | None]
+            The nodes of the page and the position to continue after, None
+            if this is the last page.
+
+        """
+        if reverse:
+            end: int = (
+                len(self.nodes) if after is None else bisect_left(self.positions, after)
+            )
+            start: int = max(end - page_size, 0)
+            page: list[Node] = self.nodes[start:end][::-1]
+            has_more: bool = start > 0
+        else:
+            start = 0 if after is None else bisect_right(self.positions, after)
+            end = min(start + page_size, len(self.nodes))
+            page = self.nodes[start:end]
+            has_more = end < len(self.nodes)
+        if not has_more:
+            return page, None
+        return page, self.positions[start if reverse else end - 1]
@@ -0,0 +1,245 @@
+"""Copy-on-write editing of published trees."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from src.core.gc_tuning import weaken_parent_links
+from src.core.mount import MountNode
+
+if TYPE_CHECKING:  # pragma: no cover
+    from src.core.node import Node
+
+
+class SnapshotWriter:
+    """Builds a new version of a tree without modifying the published one.
+
+    The nodes of a published tree are never modified, so it can be read
+    without locking. Before a node is modified, the writer copies it and
+    every ancestor up to the root, and installs each copy in its copied
+    parent. Everything else is shared with the published version. Nodes
+    already copied by this writer are modified in place, so a batch of
+    edits copies each directory once. `publish` moves the shared nodes
+    under the copies, which is the one change seen by older versions: the
+    parent links of their shared nodes lead to the new version. Nodes
+    behind a mount point cannot be edited, since the contents of a mount
+    point are owned by its shard cache.
+
+    Parameters
+    ----------
+    root : Node
+        The root of the published version to start from.
+    weak_parent_links : bool, optional
+        Whether added nodes hold their parent through a weak reference, by
+        default False.
+
+    Attributes
+    ----------
+    root : Node
+        The root of the new version, the published root until the first
+        modification.
+    copies : int
+        The number of nodes copied so far.
+
+    """
+
+    def __init__(self, root: Node, *, weak_parent_links: bool = False) -> None:
+        """Start a new version from a published root."""
+        self.root: Node = root
+        self.weak_parent_links: bool = weak_parent_links
+        self.copies: int = 0
+        # Nodes copied by this writer, by id; they are not published yet.
+        self.__private: dict[int, Node] = {}
+
+    @property
+    def changed(self) -> bool:
+        """Whether the new version differs from the published one."""
+        return bool(self.__private)
+
+    def writable_root(self) -> Node:
+        """Return the private copy of the root, copying it if needed.
+
+        Returns
+        -------
+        Node
+            The root of the new version.
+
+        """
+        if id(self.root) not in self.__private:
+            self.root = self.__copy(self.root, None)
+        return self.root
+
+    def writable_child(self, directory: Node, name: str) -> Node | None:
+        """Return the private copy of a child of a private directory.
+
+        Parameters
+        ----------
+        directory : Node
+            A directory returned by this writer.
+        name : str
+            The name of the child.
+
+        Returns
+        -------
+        Node | None
+            The copy installed in `directory`, None if there is no such
+            child.
+
+        """
+        children: dict[str, Node] | None = directory.children
+        child: Node | None = None if children is None else children.get(name)
+        if children is None or child is None or id(child) in self.__private:
+            return child
+        copied: Node = self.__copy(child, directory)
+        # Same content and hash, so the digest of the directory is unchanged.
+        children[name] = copied
+        return copied
+
+    def writable(self, name_or_path_to_node: str | None) -> Node:
+        """Return the private copy of a node, copying the path leading to it.
+
+        Parameters
+        ----------
+        name_or_path_to_node : str | None
+            The path to the node relative to the root, None for the root.
+
+        Returns
+        -------
+        Node
+            The node in the new version.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the path does not exist.
+        ValueError
+            If the path goes through a mount point.
+
+        """
+        self.__check_path(name_or_path_to_node)
+        node: Node | None = self.writable_root()
+        for part in (name_or_path_to_node or "").split("/"):
+            if node is None or part in {"", "."}:
+                continue
+            node = self.writable_child(node, part)
+        if node is None:
+            error_message: str = (
+                f"cannot access {name_or_path_to_node}: No such file or directory"
+            )
+            raise FileNotFoundError(error_message)
+        return node
+
+    def add_child(self, name_or_path_to_node: str | None, node: Node) -> None:
+        """Add a node to a directory of the new version.
+
+        Parameters
+        ----------
+        name_or_path_to_node : str | None
+            The path to the directory, None for the root.
+        node : Node
+            The node to add, not part of any published version. Its depth
+            and relative path, and those of the nodes below it, are set to
+            match its place.
+
+        """
+        directory: Node = self.writable(name_or_path_to_node)
+        node.parent_node = directory
+        node.update_location()
+        if self.weak_parent_links:
+            weaken_parent_links(node)
+        directory.add_child(node)
+
+    def update_metadata(
+        self,
+        name_or_path_to_node: str | None,
+        *,
+        size: int,
+        time_modified_int: int,
+        permissions: str,
+    ) -> None:
+        """Replace the metadata of a node of the new version.
+
+        Parameters
+        ----------
+        name_or_path_to_node : str | None
+            The path to the node, None for the root.
+        size : int
+            The size of the node in bytes.
+        time_modified_int : int
+            The time the node was last modified in seconds from epoch.
+        permissions : str
+            The permissions of the node.
+
+        """
+        self.writable(name_or_path_to_node).update_metadata(
+            size=size,
+            time_modified_int=time_modified_int,
+            permissions=permissions,
+        )
+
+    def publish(self) -> Node:
+        """Move the shared nodes under their copied parents.
+
+        The children of a copied directory that were not copied themselves
+        still point to the directory of the previous version. They are
+        relinked to the copy, so that their parents stay reachable when
+        parent links are weak, and so that the previous version is no
+        longer referenced from the new one and can be freed once its
+        readers are done. Copying them instead would not help, since their
+        own children would still lead to the previous version.
+
+        This modifies the previous version: its readers going up from a
+        shared node through `parent_node` reach the directories of the new
+        version, which have the same paths but may hold other children.
+        A version is only consistent when navigated down from its root.
+
+        Returns
+        -------
+        Node
+            The root of the new version, to be published.
+
+        """
+        for copied in self.__private.values():
+            for child in (copied.children or {}).values():
+                child.relink_parent(copied)
+        return self.root
+
+    def __check_path(self, name_or_path_to_node: str | None) -> None:
+        """Check that a path can be edited before copying anything.
+
+        Parameters
+        ----------
+        name_or_path_to_node : str | None
+            The path to the node relative to the root, None for the root.
+
+        Raises
+        ------
+        ValueError
+            If the path goes through a mount point or ends at one.
+
+        """
+        node: Node | None = self.root
+        # Stops at the first mount point, without loading it.
+        for part in (name_or_path_to_node or "").split("/"):
+            if node is None or isinstance(node, MountNode):
+                break
+            if part not in {"", "."}:
+                children: dict[str, Node] | None = node.children
+                node = None if children is None else children.get(part)
+        if isinstance(node, MountNode):
+            error_message: str = (
+                f"Cannot edit {name_or_path_to_node}: "
+                f"{node.relative_path} is a mount point"
+            )
+            raise ValueError(error_message)  # noqa: TRY004
+
+    def __copy(self, node: Node, parent_node: Node | None) -> Node:
+        """Copy a published node and mark the copy as private."""
+        if isinstance(node, MountNode):
+            # The shard cache would reload the contents of the copy.
+            error_message: str = f"Cannot copy mount point {node.relative_path}"
+            raise TypeError(error_message)
+        copied: Node = node.clone(parent_node)
+        self.__private[id(copied)] = copied
+        self.copies += 1
+        return copied
@@ -0,0 +1,93 @@
+"""Sort keys for directory listings."""
+
+from __future__ import annotations
+
+import re
+from operator import attrgetter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable
+
+    from src.core.node import Node
+
+DIGITS: re.Pattern[str] = re.compile(r"(\d+)")
+
+type NaturalKey = tuple[tuple[str | int, ...], str]
+type SortKey = int | str | tuple[object, ...]
+
+# Expensive keys are cached properties of Node, computed once per node.
+SORT_KEYS: dict[str, Callable[[Node], SortKey]] = {
+    "name": attrgetter("name"),
+    "time": attrgetter("time_modified_int"),
+    "size": attrgetter("size"),
+    "extension": attrgetter("extension_sort_key"),
+    "natural": attrgetter("natural_sort_key"),
+    "locale": attrgetter("collation_key"),
+}
+SORT_ORDERS: tuple[str, ...] = tuple(SORT_KEYS)
+
+
+def natural_key(name: str) -> NaturalKey:
+    """Return a key ordering embedded numbers by value.
+
+    The name is split into alternating text and digit runs, so that
+    'file2' sorts before 'file10'. The name itself breaks ties such as
+    'file01' and 'file1'.
+
+    Parameters
+    ----------
+    name : str
+        The name to build the key for.
+
+    Returns
+    -------
+    NaturalKey
+        The text and numeric runs, followed by the name.
+
+    """
+    parts: list[str] = DIGITS.split(name)
+    return (
+        tuple(int(part) if index % 2 else part for index, part in enumerate(parts)),
+        name,
+    )
+
+
+def extension_key(name: str) -> tuple[str, str]:
+    """Return a key ordering names by extension, then by name.
+
+    The leading dot of a hidden file does not start an extension, and names
+    without an extension sort first.
+
+    Parameters
+    ----------
+    name : str
+        The name to build the key for.
+
+    Returns
+    -------
+    tuple[str, str]
+        The extension and the name.
+
+    """
+    stem, dot, extension = name.lstrip(".").rpartition(".")
+    return (extension if dot and stem else "", name)
+
+
+def from_json(value: object) -> object:
+    """Turn the lists of a JSON-decoded sort key back into tuples.
+
+    Parameters
+    ----------
+    value : object
+        The decoded value.
+
+    Returns
+    -------
+    object
+        The value with every list replaced by a tuple.
+
+    """
+    if isinstance(value, list):
+        return tuple(from_json(item) for item in value)
+    return value
@@ -0,0 +1,289 @@
+"""Aggregate statistics of a tree."""
+
+from __future__ import annotations
+
+import heapq
+import multiprocessing
+import threading
+from typing import TYPE_CHECKING
+
+from src.core.export import iter_subtree
+from src.core.formatting import format_size, format_time
+from src.core.sorting import extension_key
+
+if TYPE_CHECKING:  # pragma: no cover
+    from src.core.node import Node
+
+TOP_ENTRIES: int = 5
+NO_EXTENSION: str = "(none)"
+FORK_START_METHOD: str = "fork"
+MIN_PARALLEL_SUBTREES: int = 2
+
+# Subtrees of the walk a worker process belongs to. Only set in worker
+# processes, by the initializer of their pool.
+_worker_subtrees: list[Node] = []
+
+
+class TreeStats:
+    """Statistics accumulated over the entries of a tree.
+
+    Every entry is visited once by `add`, and partial statistics of
+    disjoint subtrees are combined with `merge`.
+
+    Attributes
+    ----------
+    files : int
+        The number of files.
+    directories : int
+        The number of directories.
+    hidden : int
+        The number of entries whose name starts with '.'.
+    total_size : int
+        The total size of the files in bytes.
+    extensions : dict[str, list[int]]
+        The file count and bytes per extension.
+    size_histogram : dict[int, int]
+        The file count per power-of-two size bucket, keyed by the bit length
+        of the size.
+    oldest : list[tuple[int, str]]
+        Heap of the oldest files, as negated (time, path) pairs.
+    newest : list[tuple[int, str]]
+        Heap of the newest files, as (time, path) pairs.
+    deepest : list[tuple[int, str]]
+        Heap of the deepest entries, as (depth, path) pairs.
+
+    """
+
+    def __init__(self) -> None:
+        """Initialise empty statistics."""
+        self.files: int = 0
+        self.directories: int = 0
+        self.hidden: int = 0
+        self.total_size: int = 0
+        self.extensions: dict[str, list[int]] = {}
+        self.size_histogram: dict[int, int] = {}
+        self.oldest: list[tuple[int, str]] = []
+        self.newest: list[tuple[int, str]] = []
+        self.deepest: list[tuple[int, str]] = []
+
+    @property
+    def entries(self) -> int:
+        """Return the number of files and directories."""
+        return self.files + self.directories
+
+    def add(self, node: Node) -> None:
+        """Account for one entry.
+
+        Parameters
+        ----------
+        node : Node
+            The entry.
+
+        """
+        if node.is_hidden:
+            self.hidden += 1
+        push_bounded(self.deepest, (node.depth, node.relative_path))
+        if node.is_directory:
+            self.directories += 1
+            return
+        self.files += 1
+        self.total_size += node.size
+        extension: str = extension_key(node.name)[0] or NO_EXTENSION
+        totals: list[int] | None = self.extensions.get(extension)
+        if totals is None:
+            self.extensions[extension] = [1, node.size]
+        else:
+            totals[0] += 1
+            totals[1] += node.size
+        bucket: int = node.size.bit_length()
+        self.size_histogram[bucket] = self.size_histogram.get(bucket, 0) + 1
+        push_bounded(self.oldest, (-node.time_modified_int, node.relative_path))
+        push_bounded(self.newest, (node.time_modified_int, node.relative_path))
+
+    def merge(self, other: TreeStats) -> None:
+        """Add the statistics of a disjoint subtree.
+
+        Parameters
+        ----------
+        other : TreeStats
+            The statistics to add.
+
+        """
+        self.files += other.files
+        self.directories += other.directories
+        self.hidden += other.hidden
+        self.total_size += other.total_size
+        for extension, (count, size) in other.extensions.items():
+            totals: list[int] = self.extensions.setdefault(extension, [0, 0])
+            totals[0] += count
+            totals[1] += size
+        for bucket, count in other.size_histogram.items():
+            self.size_histogram[bucket] = self.size_histogram.get(bucket, 0) + count
+        for heap, other_heap in (
+            (self.oldest, other.oldest),
+            (self.newest, other.newest),
+            (self.deepest, other.deepest),
+        ):
+            for item in other_heap:
+                push_bounded(heap, item)
+
+    def report(self) -> str:
+        """Render the statistics as a plain-text report.
+
+        Returns
+        -------
+        str
+            The report, one section per statistic.
+
+        """
+        hidden_ratio: float = self.hidden / self.entries if self.entries else 0.0
+        lines: list[str] = [
+            f"entries\t{self.entries}",
+            f"files\t{self.files}",
+            f"directories\t{self.directories}",
+            f"bytes\t{self.total_size}",
+            f"hidden\t{self.hidden}\t{hidden_ratio:.1%}",
+            "",
+            "by extension\tfiles\tbytes",
+        ]
+        lines.extend(
+            f"{extension}\t{count}\t{size}"
+            for extension, (count, size) in sorted(
+                self.extensions.items(),
+                key=lambda item: (-item[1][1], item[0]),
+            )
+        )
+        lines.extend(["", "size histogram\tfiles"])
+        lines.extend(
+            f"{bucket_label(bucket)}\t{self.size_histogram[bucket]}"
+            for bucket in sorted(self.size_histogram)
+        )
+        lines.extend(["", "oldest files"])
+        lines.extend(
+            f"{format_time(-time_modified_int)}\t{path}"
+            for time_modified_int, path in sorted(self.oldest, reverse=True)
+        )
+        lines.extend(["", "newest files"])
+        lines.extend(
+            f"{format_time(time_modified_int)}\t{path}"
+            for time_modified_int, path in sorted(self.newest, reverse=True)
+        )
+        lines.extend(["", "deepest paths"])
+        lines.extend(
+            f"{depth}\t{path}" for depth, path in sorted(self.deepest, reverse=True)
+        )
+        return "\n".join(lines)
+
+
+def push_bounded(heap: list[tuple[int, str]], item: tuple[int, str]) -> None:
+    """Keep the `TOP_ENTRIES` largest items in a min-heap.
+
+    Parameters
+    ----------
+    heap : list[tuple[int, str]]
+        The heap.
+    item : tuple[int, str]
+        The candidate item.
+
+    """
+    if len(heap) < TOP_ENTRIES:
+        heapq.heappush(heap, item)
+    elif item > heap[0]:
+        heapq.heapreplace(heap, item)
+
+
+def bucket_label(bucket: int) -> str:
+    """Return the size range of a histogram bucket, e.g. '1K-2K'."""
+    if bucket == 0:
+        return "0"
+    return f"{format_size(1 << (bucket - 1))}-{format_size(1 << bucket)}"
+
+
+def collect_stats(node: Node) -> TreeStats:
+    """Compute the statistics of the entries below a node in one walk.
+
+    Parameters
+    ----------
+    node : Node
+        The node to start from; a file only counts itself.
+
+    Returns
+    -------
+    TreeStats
+        The statistics.
+
+    """
+    stats = TreeStats()
+    for child in iter_subtree(node):
+        stats.add(child)
+    return stats
+
+
+def collect_stats_parallel(node: Node, workers: int) -> TreeStats:
+    """Compute the statistics below a node with a pool of worker processes.
+
+    Every top-level subtree is walked by a worker, and the partial results
+    are merged. The workers are forked so that they share the loaded tree
+    instead of receiving a copy. The subtrees are handed to each pool
+    through its initializer, so that calls from several threads would not
+    share any state.
+
+    Forking a process that runs other threads may deadlock the child, so
+    the pool is only created while the calling thread is the only one;
+    otherwise, or where forking is not available, the walk runs in this
+    process. Workers started from a fork server would not share the tree,
+    and sending them the entries of a subtree costs more than walking it.
+
+    Parameters
+    ----------
+    node : Node
+        The node to start from.
+    workers : int
+        The maximum number of worker processes.
+
+    Returns
+    -------
+    TreeStats
+        The statistics.
+
+    """
+    subtrees: list[Node] = [
+        child
+        for child in (node.children or {}).values()
+        if child.is_directory and child.children
+    ]
+    if (
+        workers < MIN_PARALLEL_SUBTREES
+        or len(subtrees) < MIN_PARALLEL_SUBTREES
+        or FORK_START_METHOD not in multiprocessing.get_all_start_methods()
+        or threading.active_count() > 1
+    ):
+        return collect_stats(node)
+
+    stats = TreeStats()
+    for child in (node.children or {}).values():
+        stats.add(child)
+    context = multiprocessing.get_context(FORK_START_METHOD)
+    # Forked workers inherit the initializer arguments instead of receiving
+    # a pickled copy.
+    with context.Pool(
+        processes=min(workers, len(subtrees)),
+        initializer=_set_worker_subtrees,
+        initargs=(subtrees,),
+    ) as pool:
+        for partial in pool.imap_unordered(
+            _collect_worker_subtree,
+            range(len(subtrees)),
+        ):
+            stats.merge(partial)
+    return stats
+
+
+def _set_worker_subtrees(subtrees: list[Node]) -> None:
+    """Store the subtrees of the walk in a new worker process."""
+    _worker_subtrees[:] = subtrees
+
+
+def _collect_worker_subtree(index: int) -> TreeStats:
+    """Collect the statistics of a subtree inherited from the parent."""
+    return collect_stats(_worker_subtrees[index])
@@ -0,0 +1,287 @@
+"""Incremental parsing of nested structure files."""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import IO, TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable, Iterator
+
+ENTER_DIRECTORY: str = "enter"
+LEAF_ENTRY: str = "leaf"
+EXIT_DIRECTORY: str = "exit"
+CONTENTS_KEY: str = "contents"
+# The most characters that may follow the digits of a complete number, as
+# in '1e+'.
+NUMBER_SUFFIX_LENGTH: int = 2
+CHUNK_LENGTH: int = 1 << 16
+LOOKAHEAD_LENGTH: int = 1 << 16
+WHITESPACE_CHARACTERS: str = " \t\n\r"
+WHITESPACE: re.Pattern[str] = re.compile(f"[{WHITESPACE_CHARACTERS}]*")
+
+
+class StructureReader:
+    """Tokenizer over a structure file, holding a bounded window of it.
+
+    The file is decoded chunk by chunk, and the consumed text is dropped
+    whenever more is read, so only the entry being read and a lookahead of
+    `LOOKAHEAD_LENGTH` characters are held. Values are decoded by the C
+    scanner of the `json` module.
+
+    Parameters
+    ----------
+    json_file : IO[bytes]
+        The structure file, e.g. from `open_structure_file`.
+
+    Attributes
+    ----------
+    text : str
+        The decoded window of the file.
+    position : int
+        The position of the next character to read in `text`.
+    at_end : bool
+        Whether the whole file has been read into `text`.
+
+    """
+
+    def __init__(self, json_file: IO[bytes]) -> None:
+        """Initialise a reader at the start of the file."""
+        self.json_file: IO[bytes] = json_file
+        # Like `json.loads`, accept a leading byte order mark.
+        self.decoder: codecs.IncrementalDecoder = codecs.getincrementaldecoder(
+            "utf-8-sig",
+        )()
+        self.text: str = ""
+        self.position: int = 0
+        self.at_end: bool = False
+        # The number of characters dropped from the start of `text`.
+        self.__dropped: int = 0
+        self.__scan_once: Callable[[str, int], tuple[object, int]] = (
+            json.JSONDecoder().scan_once
+        )
+
+    def fill(self, length: int) -> None:
+        """Read until `length` characters follow the position or the file ends.
+
+        Parameters
+        ----------
+        length : int
+            The number of characters wanted after the position.
+
+        """
+        while len(self.text) - self.position < length and not self.at_end:
+            chunk: bytes = self.json_file.read(CHUNK_LENGTH)
+            self.at_end = not chunk
+            self.__dropped += self.position
+            self.text = self.text[self.position :] + self.decoder.decode(
+                chunk,
+                final=self.at_end,
+            )
+            self.position = 0
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, '' at the end."""
+        while True:
+            if (
+                self.position < len(self.text)
+                and self.text[self.position] not in WHITESPACE_CHARACTERS
+            ):
+                return self.text[self.position]
+            self.position = WHITESPACE.match(self.text, self.position).end()
+            if self.position < len(self.text):
+                return self.text[self.position]
+            if self.at_end:
+                return ""
+            self.fill(1)
+
+    def expect(self, character: str) -> None:
+        """Skip whitespace and consume `character`.
+
+        Parameters
+        ----------
+        character : str
+            The expected character.
+
+        Raises
+        ------
+        ValueError
+            If the next character is a different one.
+
+        """
+        if self.peek() != character:
+            error_message: str = f"Expecting {character!r}"
+            raise self.error(error_message)
+        self.position += 1
+
+    def read_value(self) -> object:
+        """Read a complete JSON value.
+
+        Returns
+        -------
+        object
+            The decoded value.
+
+        Raises
+        ------
+        ValueError
+            If no valid value follows.
+
+        """
+        self.peek()
+        length: int = LOOKAHEAD_LENGTH
+        while True:
+            self.fill(length)
+            try:
+                value, end = self.__scan_once(self.text, self.position)
+            except (StopIteration, ValueError):
+                if self.at_end:
+                    error_message: str = "Expecting value"
+                    raise self.error(error_message) from None
+            else:
+                # A number read up to the end of the window may go on.
+                if self.at_end or len(self.text) - end > NUMBER_SUFFIX_LENGTH:
+                    self.position = end
+                    return value
+            length = 2 * max(length, len(self.text) - self.position)
+
+    def read_entry(self) -> tuple[dict, bool]:
+        """Read an entry, stopping at the start of its contents if any.
+
+        Entries without nested values are decoded in one call, the others
+        field by field. The fields
+        of a directory must come before its contents.
+
+        Returns
+        -------
+        tuple[dict, bool]
+            The fields of the entry, and whether the reader is now inside
+            its contents array.
+
+        Raises
+        ------
+        ValueError
+            If the next value is not a valid entry.
+
+        """
+        if self.peek() != "{":
+            error_message: str = "Expecting an entry"
+            raise self.error(error_message)
+        self.fill(LOOKAHEAD_LENGTH)
+        text: str = self.text
+        start: int = self.position
+        # An entry without brackets up to its first closing brace is decoded
+        # whole, unless that brace turns out to be inside a string.
+        close: int = text.find("}", start)
+        if (
+            close != -1
+            and text.find("{", start + 1, close) == -1
+            and text.find("[", start + 1, close) == -1
+        ):
+            try:
+                entry, end = self.__scan_once(text, start)
+            except (StopIteration, ValueError):
+                pass
+            else:
+                if end == close + 1:
+                    self.position = end
+                    return entry, False
+        self.position += 1
+        entry = {}
+        while self.peek() != "}":
+            if entry:
+                self.expect(",")
+            key: object = self.read_value()
+            if not isinstance(key, str):
+                error_message: str = "Expecting property name"
+                raise self.error(error_message)
+            self.expect(":")
+            if key == CONTENTS_KEY:
+                self.expect("[")
+                return entry, True
+            entry[key] = self.read_value()
+        self.position += 1
+        return entry, False
+
+    def error(self, message: str) -> ValueError:
+        """Build the error for invalid input at the position.
+
+        Parameters
+        ----------
+        message : str
+            What was expected.
+
+        Returns
+        -------
+        ValueError
+            The error, locating the position by its character offset.
+
+        """
+        return ValueError(
+            f"{message}: character {self.__dropped + self.position}",
+        )
+
+
+def iter_structure_events(json_file: IO[bytes]) -> Iterator[tuple[str, dict]]:
+    """Iterate over the entries of a structure file as it is parsed.
+
+    Each directory is reported when its contents start, with the fields
+    read so far, and again once its contents end, so the nesting is given
+    by the events rather than by a parsed document. Memory use grows with
+    the depth of the tree and the size of an entry, not with the size of
+    the file. The fields of a directory must come before its contents,
+    which is the order the structure files are written in.
+
+    Parameters
+    ----------
+    json_file : IO[bytes]
+        The structure file, e.g. from `open_structure_file`.
+
+    Yields
+    ------
+    tuple[str, dict]
+        ENTER_DIRECTORY and the fields of a directory, LEAF_ENTRY and an
+        entry without contents, or EXIT_DIRECTORY and the fields of the
+        directory whose contents ended, in document order.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a valid structure file, or a directory has fields
+        after its contents.
+
+    """
+    reader = StructureReader(json_file)
+    entry, is_directory = reader.read_entry()
+    if not is_directory:
+        yield LEAF_ENTRY, entry
+    else:
+        yield ENTER_DIRECTORY, entry
+        directories: list[dict] = [entry]
+        is_first: bool = True
+        while directories:
+            character: str = reader.peek()
+            if character == "]":
+                reader.position += 1
+                reader.expect("}")
+                yield EXIT_DIRECTORY, directories.pop()
+                is_first = False
+                continue
+            if not is_first:
+                if character != ",":
+                    error_message: str = "Expecting ',' or ']'"
+                    raise reader.error(error_message)
+                reader.position += 1
+            entry, is_directory = reader.read_entry()
+            if is_directory:
+                yield ENTER_DIRECTORY, entry
+                directories.append(entry)
+                is_first = True
+            else:
+                yield LEAF_ENTRY, entry
+                is_first = False
+    if reader.peek():
+        error_message = "Extra data"
+        raise reader.error(error_message)
@@ -0,0 +1,78 @@
+"""Streaming `tree`-style rendering."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: no cover
+    from collections.abc import Callable, Iterator
+
+    from src.core.node import Node
+
+BRANCH: str = "├── "
+LAST_BRANCH: str = "└── "
+PIPE: str = "│   "
+SPACE: str = "    "
+
+
+def render_tree(
+    node: Node,
+    list_children: Callable[[Node], list[Node]],
+    *,
+    root_name: str,
+    max_depth: int | None = None,
+) -> Iterator[str]:
+    """Render the tree below a node one line at a time.
+
+    Only the listings of the directories on the current path are held, each
+    shrinking as its entries are rendered, so memory use is proportional to
+    the depth of the tree and the size of those listings, not to the size
+    of the tree.
+
+    Parameters
+    ----------
+    node : Node
+        The node to start from.
+    list_children : Callable[[Node], list[Node]]
+        Return the entries of a directory to render, in order.
+    root_name : str
+        The name printed for `node`.
+    max_depth : int | None, optional
+        The deepest level rendered, 1 for the entries of `node` only, by
+        default None for no limit.
+
+    Yields
+    ------
+    str
+        The lines, followed by an empty line and the directory and file
+        counts.
+
+    """
+    yield root_name
+    directories: int = 0
+    files: int = 0
+    # Listings are reversed, so that the next entry is popped off the end.
+    stack: list[tuple[list[Node], str]] = []
+    if node.is_directory:
+        stack.append((list_children(node)[::-1], ""))
+    while stack:
+        siblings, prefix = stack[-1]
+        if not siblings:
+            stack.pop()
+            continue
+        child: Node = siblings.pop()
+        is_last: bool = not siblings
+        yield f"{prefix}{LAST_BRANCH if is_last else BRANCH}{child.name}"
+        if not child.is_directory:
+            files += 1
+            continue
+        directories += 1
+        if max_depth is None or len(stack) < max_depth:
+            stack.append(
+                (list_children(child)[::-1], prefix + (SPACE if is_last else PIPE)),
+            )
+    yield ""
+    yield (
+        f"{directories} {'directory' if directories == 1 else 'directories'}, "
+        f"{files} {'file' if files == 1 else 'files'}"
+    )
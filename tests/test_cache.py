@@ -0,0 +1,87 @@
+"""Unit tests for revision-checked caches and memoised listings."""
+
+from src.core import FileSystem
+from src.core.cache import RevisionCache
+from src.core.node import Node
+
+
+def ls(file_system: FileSystem, path: str = ".", **options) -> str:
+    """List a path with default options."""
+    defaults = {
+        "include_all_details": False,
+        "show_hidden_files": False,
+        "sort_in_reverse": False,
+        "sort_by_last_modified_time": False,
+        "display_sizes_in_human_readable_format": False,
+        "filter_by_type": None,
+    }
+    return file_system.ls(name_or_path_to_node=path, **{**defaults, **options})
+
+
+def test_revision_cache_hits_and_evictions() -> None:
+    """Test the counters of the cache."""
+    cache: RevisionCache[str] = RevisionCache(max_entries=1)
+    assert cache.get("a", 0, lambda: "first") == "first"
+    assert cache.get("a", 0, lambda: "second") == "first"
+    assert cache.get("b", 0, lambda: "b") == "b"
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 2, "evictions": 1, "invalidations": 0}
+
+
+def test_revision_cache_discard() -> None:
+    """Test dropping the entries matching a predicate."""
+    cache: RevisionCache[str] = RevisionCache(max_entries=4)
+    for key in "abc":
+        cache.get(key, 0, lambda key=key: key)
+    cache.discard(lambda key: key != "b")
+    assert list(cache.entries) == ["b"]
+
+
+def test_revision_cache_invalidation() -> None:
+    """Test that a new revision recomputes the value."""
+    cache: RevisionCache[str] = RevisionCache(max_entries=4)
+    cache.get("a", 0, lambda: "old")
+    assert cache.get("a", 1, lambda: "new") == "new"
+    assert cache.invalidations == 1
+
+
+def test_ls_is_memoised() -> None:
+    """Test that repeated listings are served from the cache."""
+    file_system = FileSystem("structure.json")
+    first = ls(file_system, "parser", include_all_details=True)
+    assert ls(file_system, "parser", include_all_details=True) == first
+    assert file_system.result_cache.hits == 1
+    assert file_system.result_cache.misses == 1
+
+
+def test_ls_keys_are_normalised() -> None:
+    """Test that options without effect share one cache entry."""
+    file_system = FileSystem("structure.json")
+    ls(file_system, "parser")
+    ls(file_system, "parser", display_sizes_in_human_readable_format=True, filter_by_type="folder")
+    ls(file_system, "main.go", sort_in_reverse=True)
+    ls(file_system, "main.go", sort_by_last_modified_time=True)
+    assert file_system.result_cache.hits == 2
+
+
+def test_add_child_invalidates_only_its_directory() -> None:
+    """Test that a mutation only invalidates listings of that directory."""
+    file_system = FileSystem("structure.json")
+    ls(file_system, ".")
+    ls(file_system, "parser")
+    parser = file_system.fetch_node("parser")
+    assert parser is not None
+    parser.add_child(Node(name="lexer.go", size=1, time_modified_int=0, permissions="-", parent_node=parser))
+    assert ls(file_system, "parser") == "go.mod\tlexer.go\tparser.go\tparser_test.go"
+    ls(file_system, ".")
+    assert file_system.result_cache.invalidations == 1
+    assert file_system.result_cache.hits == 1
+
+
+def test_file_listing_invalidated_by_metadata_update() -> None:
+    """Test that listing a file reflects updates of its metadata."""
+    file_system = FileSystem("structure.json")
+    assert ls(file_system, "main.go", include_all_details=True) == "-rw-r--r-- 74 Nov 14 08:27 ./main.go"
+    node = file_system.fetch_node("main.go")
+    assert node is not None
+    node.update_metadata(size=80, time_modified_int=node.time_modified_int, permissions=node.permissions)
+    assert ls(file_system, "main.go", include_all_details=True) == "-rw-r--r-- 80 Nov 14 08:27 ./main.go"
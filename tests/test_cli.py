@@ -1,7 +1,10 @@
 """Unit tests for command-line interface."""
 
+import json
 import pytest
 import sys
+import tracemalloc
+from pathlib import Path
 from src.cli.main import create_argument_parser, execute_parser
 
 def test_default_behavior(monkeypatch, capsys) -> None:
@@ -57,7 +60,7 @@ def test_long_listing_format(monkeypatch, capsys) -> None:
     execute_parser()
     captured = capsys.readouterr()
     assert captured.err == ""
-    assert captured.out == "drwxr-xr-x\t1071\tNov 14 05:57\tLICENSE\ndrwxr-xr-x\t83\tNov 14 05:57\tREADME.md\n-rw-r--r--\t4096\tNov 14 10:28\tast\ndrwxr-xr-x\t60\tNov 14 08:21\tgo.mod\ndrwxr-xr-x\t4096\tNov 14 09:51\tlexer\n-rw-r--r--\t74\tNov 14 08:27\tmain.go\ndrwxr-xr-x\t4096\tNov 17 07:21\tparser\n-rw-r--r--\t4096\tNov 14 09:27\ttoken\n"
+    assert captured.out == "drwxr-xr-x 1071 Nov 14 05:57 LICENSE\ndrwxr-xr-x   83 Nov 14 05:57 README.md\n-rw-r--r-- 4096 Nov 14 10:28 ast\ndrwxr-xr-x   60 Nov 14 08:21 go.mod\ndrwxr-xr-x 4096 Nov 14 09:51 lexer\n-rw-r--r--   74 Nov 14 08:27 main.go\ndrwxr-xr-x 4096 Nov 17 07:21 parser\n-rw-r--r-- 4096 Nov 14 09:27 token\n"
 
 def test_reverse_order(monkeypatch, capsys) -> None:
     """Test running the command: python -m pyls -r."""
@@ -120,7 +123,7 @@ def test_multiple_arguments_1(monkeypatch, capsys) -> None:
     execute_parser()
     captured = capsys.readouterr()
     assert captured.err == ""
-    assert captured.out == "drwxr-xr-x\t4096\tNov 17 07:21\tparser\n-rw-r--r--\t4096\tNov 14 10:28\tast\ndrwxr-xr-x\t4096\tNov 14 09:51\tlexer\n-rw-r--r--\t4096\tNov 14 09:27\ttoken\n-rw-r--r--\t74\tNov 14 08:27\tmain.go\ndrwxr-xr-x\t60\tNov 14 08:21\tgo.mod\ndrwxr-xr-x\t1071\tNov 14 05:57\tLICENSE\ndrwxr-xr-x\t83\tNov 14 05:57\tREADME.md\n"
+    assert captured.out == "drwxr-xr-x 4096 Nov 17 07:21 parser\n-rw-r--r-- 4096 Nov 14 10:28 ast\ndrwxr-xr-x 4096 Nov 14 09:51 lexer\n-rw-r--r-- 4096 Nov 14 09:27 token\n-rw-r--r--   74 Nov 14 08:27 main.go\ndrwxr-xr-x   60 Nov 14 08:21 go.mod\ndrwxr-xr-x 1071 Nov 14 05:57 LICENSE\ndrwxr-xr-x   83 Nov 14 05:57 README.md\n"
 
 def test_multiple_arguments_2(monkeypatch, capsys) -> None:
     """Test running the command: python -m pyls -l -r -t parser."""
@@ -133,7 +136,7 @@ def test_multiple_arguments_2(monkeypatch, capsys) -> None:
     execute_parser()
     captured = capsys.readouterr()
     assert captured.err == ""
-    assert captured.out == "drwxr-xr-x\t1342\tNov 17 07:21\tparser_test.go\n-rw-r--r--\t1622\tNov 17 06:35\tparser.go\ndrwxr-xr-x\t533\tNov 14 10:33\tgo.mod\n"
+    assert captured.out == "drwxr-xr-x 1342 Nov 17 07:21 parser_test.go\n-rw-r--r-- 1622 Nov 17 06:35 parser.go\ndrwxr-xr-x  533 Nov 14 10:33 go.mod\n"
 
 def test_multiple_arguments_3(monkeypatch, capsys) -> None:
     """Test running the command: python -m pyls -l parser -r -t."""
@@ -146,7 +149,7 @@ def test_multiple_arguments_3(monkeypatch, capsys) -> None:
     execute_parser()
     captured = capsys.readouterr()
     assert captured.err == ""
-    assert captured.out == "drwxr-xr-x\t1342\tNov 17 07:21\tparser_test.go\n-rw-r--r--\t1622\tNov 17 06:35\tparser.go\ndrwxr-xr-x\t533\tNov 14 10:33\tgo.mod\n"
+    assert captured.out == "drwxr-xr-x 1342 Nov 17 07:21 parser_test.go\n-rw-r--r-- 1622 Nov 17 06:35 parser.go\ndrwxr-xr-x  533 Nov 14 10:33 go.mod\n"
 
 def test_help(monkeypatch, capsys) -> None:
     """Test running the command: python -m pyls --help."""
@@ -157,4 +160,223 @@ def test_help(monkeypatch, capsys) -> None:
 
     captured = capsys.readouterr()
     assert captured.err == ""
-    assert captured.out == "usage: pyls [OPTION]... [PATH]...\n\npyls: Python implementation of 'ls'.        \n\nList information about the PATHs (the current directory by default).\n        \n\npositional arguments:\n  path                  path to list\n\noptions:\n  -A                    do not ignore entries starting with .\n  -l                    use a long listing format\n  -r                    reverse order while sorting\n  -t                    sort by time, newest first\n  -h                    with -l, print sizes like 1K 234M 2G etc.\n  --filter [{dir,file}]\n                        filter results by type: 'dir' or 'file'\n  --help                Show this help message and exit\n\nGPLv3, Pratheesh Prakash\n"
\ No newline at end of file
+    assert captured.out == "usage: pyls [OPTION]... [PATH]...\n\npyls: Python implementation of 'ls'.        \n\nList information about the PATHs (the current directory by default).\n        \n\npositional arguments:\n  path                  path to list\n\noptions:\n  -A                    do not ignore entries starting with .\n  -l                    use a long listing format\n  -C                    list entries by columns fitting the terminal width\n  --format {json,ndjson}\n                        print the listed entries as 'json' or 'ndjson', overriding -l\n  -r                    reverse order while sorting\n  -t                    sort by time, newest first\n  --sort WORD           sort by WORD instead of name, overriding -t;\n                        WORD is one of name, time, size, extension, natural, locale\n  -h                    with -l, print sizes like 1K 234M 2G etc.\n  --filter [{dir,file}]\n                        filter results by type: 'dir' or 'file'\n  --export {ndjson,csv}\n                        stream every entry below PATH as 'ndjson' or 'csv'\n  --output FILE         with --export, write to FILE instead of stdout\n  --page-size N         list at most N entries and print a cursor for the next page\n  --after CURSOR        with --page-size, continue after the given cursor\n  --diff OLD NEW        list what changed below PATH between two structure files\n  --stats-report        print counts, sizes, ages and depths of every entry below PATH\n  --jobs N              with --stats-report, walk the top-level subtrees in N processes\n  --watch [SECONDS]     keep listing PATH, checking structure.json every SECONDS (1)\n                        and printing the listing again when it changes\n  --index DATABASE      read the tree from an index built with --build-index\n  --build-index DATABASE\n                        import structure.json into an SQLite index and exit\n  --complete PARTIAL_PATH\n                        print the paths starting with PARTIAL_PATH, one per line,\n                        for shell completion\n  --tree                print every entry below PATH as an indented tree,\n                        applying -A, -r, -t, --sort and --filter to each directory\n  -L LEVEL              with --tree, descend at most LEVEL directories deep\n  --memory-report       print the memory held by the loaded tree below PATH,\n                        by category and node type\n  --dupes               print groups of files of the same size below PATH,\n                        the most wasted bytes first; -h applies to the sizes\n  --by-name             with --dupes, group files by name and size\n  --help                Show this help message and exit\n\nGPLv3, Pratheesh Prakash\n"
+
+def test_export_to_file(monkeypatch, capsys, tmp_path) -> None:
+    """Test running the command: python -m pyls --export csv --output FILE lexer."""
+    output = tmp_path / "lexer.csv"
+    monkeypatch.setattr(sys, "argv", ["pyls", "--export", "csv", "--output", str(output), "lexer"])
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert output.read_text().splitlines()[1] == "./lexer/lexer_test.go,file,1729,1699955126,drwxr-xr-x,2"
+
+def test_export_invalid_path(monkeypatch, capsys) -> None:
+    """Test running the command: python -m pyls --export ndjson invalid."""
+    monkeypatch.setattr(sys, "argv", ["pyls", "--export", "ndjson", "invalid"])
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == "error: cannot access invalid: No such file or directory\n"
+
+def test_page_size(monkeypatch, capsys) -> None:
+    """Test running the command: python -m pyls --page-size 5, then the next page."""
+    monkeypatch.setattr(sys, "argv", ["pyls", "--page-size", "5"])
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == "LICENSE\tREADME.md\tast\tgo.mod\tlexer\n"
+    assert captured.err.startswith("next page: --after ")
+    cursor = captured.err.split()[-1]
+    monkeypatch.setattr(sys, "argv", ["pyls", "--page-size", "5", "--after", cursor])
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == "main.go\tparser\ttoken\n"
+    assert captured.err == ""
+
+def test_after_requires_page_size(monkeypatch, capsys) -> None:
+    """Test running the command: python -m pyls --after CURSOR."""
+    monkeypatch.setattr(sys, "argv", ["pyls", "--after", "abc"])
+    with pytest.raises(SystemExit):
+        create_argument_parser()
+    assert "--after requires --page-size" in capsys.readouterr().err
+
+def test_invalid_page_size(monkeypatch, capsys) -> None:
+    """Test running the command: python -m pyls --page-size 0."""
+    monkeypatch.setattr(sys, "argv", ["pyls", "--page-size", "0"])
+    with pytest.raises(SystemExit):
+        create_argument_parser()
+    assert "invalid positive integer" in capsys.readouterr().err
+
+def test_diff(monkeypatch, capsys) -> None:
+    """Test running the command: python -m pyls --diff structure.json structure.json."""
+    monkeypatch.setattr(sys, "argv", ["pyls", "--diff", "structure.json", "structure.json"])
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert captured.err == ""
+
+def test_sort_by_extension(monkeypatch, capsys) -> None:
+    """Test running the command: python -m pyls --sort extension."""
+    monkeypatch.setattr(sys, "argv", ["pyls", "--sort", "extension"])
+    args = create_argument_parser()
+    assert args.sort_by == "extension"
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == "LICENSE\tast\tlexer\tparser\ttoken\tmain.go\tREADME.md\tgo.mod\n"
+
+
+def test_stats_report(monkeypatch, capsys) -> None:
+    """Test running the command: python -m pyls --stats-report parser."""
+    monkeypatch.setattr(sys, "argv", ["pyls", "--stats-report", "parser"])
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out.startswith("entries\t3\nfiles\t3\ndirectories\t0\n")
+    assert "\nnewest files\nNov 17 07:21\t./parser/parser_test.go\n" in captured.out
+
+
+def test_stats_report_missing_path(monkeypatch, capsys) -> None:
+    """Test running the command: python -m pyls --stats-report missing."""
+    monkeypatch.setattr(sys, "argv", ["pyls", "--stats-report", "missing"])
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == "error: cannot access missing: No such file or directory\n"
+
+
+def test_watch(monkeypatch, capsys, tmp_path) -> None:
+    """Test running the command: python -m pyls --watch 0.5 lexer."""
+    structure = tmp_path / "structure.json"
+    structure.write_text(Path("structure.json").read_text())
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["pyls", "--watch", "0.5", "lexer"])
+    edits = [
+        # Outside the listed directory: nothing is printed.
+        lambda text: text.replace("parser_test.go", "parser_spec.go"),
+        # Inside it: the listing is printed again.
+        lambda text: text.replace("lexer_test.go", "lexer_spec.go"),
+    ]
+
+    def sleep(seconds: float) -> None:
+        assert seconds == 0.5
+        if not edits:
+            raise KeyboardInterrupt
+        structure.write_text(edits.pop(0)(structure.read_text()))
+
+    monkeypatch.setattr("time.sleep", sleep)
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == "go.mod\tlexer.go\tlexer_test.go\ngo.mod\tlexer.go\tlexer_spec.go\n"
+
+
+def test_watch_partially_written_file(monkeypatch, capsys, tmp_path) -> None:
+    """Test that --watch keeps the old tree while the file is half written."""
+    structure = tmp_path / "structure.json"
+    text = Path("structure.json").read_text()
+    structure.write_text(text)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["pyls", "--watch", "0.5", "lexer"])
+    edits = [
+        text[: len(text) // 2],
+        text[: len(text) // 2],
+        text.replace("lexer_test.go", "lexer_spec.go"),
+    ]
+
+    def sleep(seconds: float) -> None:
+        if not edits:
+            raise KeyboardInterrupt
+        structure.write_text(edits.pop(0))
+
+    monkeypatch.setattr("time.sleep", sleep)
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == "go.mod\tlexer.go\tlexer_test.go\ngo.mod\tlexer.go\tlexer_spec.go\n"
+    assert captured.err.count("error: ") == 1
+
+
+def test_watch_invalid_interval(monkeypatch, capsys) -> None:
+    """Test running the command: python -m pyls --watch 0."""
+    monkeypatch.setattr(sys, "argv", ["pyls", "--watch", "0"])
+    with pytest.raises(SystemExit):
+        create_argument_parser()
+    captured = capsys.readouterr()
+    assert "invalid positive number: '0'" in captured.err
+
+
+def test_build_index(monkeypatch, capsys, tmp_path) -> None:
+    """Test running the command: python -m pyls --build-index DATABASE, then --index."""
+    database = tmp_path / "structure.sqlite"
+    monkeypatch.setattr(sys, "argv", ["pyls", "--build-index", str(database)])
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == f"indexed 20 entries into {database}\n"
+    monkeypatch.setattr(sys, "argv", ["pyls", "--index", str(database), "-t", "parser"])
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == "go.mod\tparser.go\tparser_test.go\n"
+
+
+def test_complete(monkeypatch, capsys) -> None:
+    """Test running the command: python -m pyls --complete parser/pa."""
+    monkeypatch.setattr(sys, "argv", ["pyls", "--complete", "parser/pa"])
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == "parser/parser.go\nparser/parser_test.go\n"
+
+
+def test_columns(monkeypatch, capsys) -> None:
+    """Test running the command: python -m pyls -C -A."""
+    monkeypatch.setenv("COLUMNS", "30")
+    monkeypatch.setattr(sys, "argv", ["pyls", "-C", "-A"])
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == ".gitignore  ast     main.go\nLICENSE     go.mod  parser\nREADME.md   lexer   token\n"
+
+
+def test_format_ndjson(monkeypatch, capsys) -> None:
+    """Test running the command: python -m pyls --format ndjson -l --filter dir."""
+    monkeypatch.setattr(sys, "argv", ["pyls", "--format", "ndjson", "-l", "--filter", "dir"])
+    execute_parser()
+    captured = capsys.readouterr()
+    records = [json.loads(line) for line in captured.out.splitlines()]
+    assert [record["relative_path"] for record in records] == ["./ast", "./lexer", "./parser", "./token"]
+    assert {record["type"] for record in records} == {"dir"}
+
+
+def test_tree(monkeypatch, capsys) -> None:
+    """Test running the command: python -m pyls --tree -L 1 --filter dir -A."""
+    monkeypatch.setattr(sys, "argv", ["pyls", "--tree", "-L", "1", "--filter", "dir", "-A"])
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == ".\n├── ast\n├── lexer\n├── parser\n└── token\n\n4 directories, 0 files\n"
+
+
+def test_tree_missing_path(monkeypatch, capsys) -> None:
+    """Test running the command: python -m pyls --tree missing."""
+    monkeypatch.setattr(sys, "argv", ["pyls", "--tree", "missing"])
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == "error: cannot access missing: No such file or directory\n"
+
+
+def test_dupes(monkeypatch, capsys, tmp_path: Path) -> None:
+    """Test running the command: python -m pyls --index structure.json --dupes --by-name."""
+    data = json.loads(Path("structure.json").read_text())
+    copies = {"name": "copies", "size": 4096, "time_modified": 1699941437, "permissions": "drwxr-xr-x"}
+    copies["contents"] = [entry for entry in data["contents"] if entry["name"] in {"LICENSE", "go.mod"}]
+    data["contents"].append(copies)
+    json_path = tmp_path / "structure.json"
+    json_path.write_text(json.dumps(data))
+    monkeypatch.setattr(sys, "argv", ["pyls", "--index", str(json_path), "--dupes", "--by-name"])
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out == "1071\t1071\t2\n./LICENSE\n./copies/LICENSE\n\n60\t60\t2\n./copies/go.mod\n./go.mod\n"
+
+
+def test_memory_report(monkeypatch, capsys) -> None:
+    """Test running the command: python -m pyls --memory-report parser."""
+    monkeypatch.setattr(sys, "argv", ["pyls", "--memory-report", "parser"])
+    execute_parser()
+    captured = capsys.readouterr()
+    assert captured.out.startswith("nodes\t4\nbytes\t")
+    assert "\ntraced bytes\t" in captured.out
+    assert "\nNode dir\t1\t" in captured.out
+    assert "\nNode file\t3\t" in captured.out
+    assert not tracemalloc.is_tracing()
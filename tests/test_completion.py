@@ -0,0 +1,82 @@
+"""Unit tests for path completion."""
+
+from pathlib import Path
+
+import pytest
+
+from src.core import FileSystem
+from src.core.completion import NameIndex, prefix_bound
+from src.core.index import build_index
+from src.core.node import Node
+
+PARTIAL_PATHS: list[str] = ["", "p", "parser/", "parser/pa", ".", "token/t", "x", "nope/", "LICENSE/"]
+
+
+@pytest.fixture
+def file_system() -> FileSystem:
+    """Return the sample file system."""
+    return FileSystem("structure.json")
+
+
+def test_prefix_bound() -> None:
+    """Test the exclusive upper bound of a prefix."""
+    assert prefix_bound("pars") == "part"
+    assert prefix_bound("a\U0010ffff") == "b"
+    assert prefix_bound("") is None
+    assert prefix_bound("\U0010ffff") is None
+
+
+def test_name_index_matches() -> None:
+    """Test that exactly the names with the prefix are matched, in order."""
+    names = ["b", "ab", "a", "abc", "b\U0010ffff", "ac", "B"]
+    index = NameIndex(Node(name=name, size=0, time_modified_int=0, permissions="") for name in names)
+    for prefix in ["", "a", "ab", "abc", "abcd", "b", "B", "c"]:
+        assert [node.name for node in index.matches(prefix)] == sorted(
+            name for name in names if name.startswith(prefix)
+        )
+
+
+def test_complete(file_system: FileSystem) -> None:
+    """Test the completions of the sample tree."""
+    assert file_system.complete("") == [
+        "LICENSE",
+        "README.md",
+        "ast/",
+        "go.mod",
+        "lexer/",
+        "main.go",
+        "parser/",
+        "token/",
+    ]
+    assert file_system.complete("parser/pa") == ["parser/parser.go", "parser/parser_test.go"]
+    assert file_system.complete(".") == [".gitignore"]
+    assert ".gitignore" in file_system.complete("", show_hidden_files=True)
+    assert file_system.complete("nope/") == []
+    assert file_system.complete("LICENSE/") == []
+
+
+def test_complete_follows_changes(file_system: FileSystem) -> None:
+    """Test that the name index of a directory is rebuilt when it changes."""
+    assert file_system.complete("parser/pa") == ["parser/parser.go", "parser/parser_test.go"]
+    parser = file_system.fetch_node("parser")
+    parser.add_child(
+        Node(name="parse.go", size=0, time_modified_int=0, permissions="-rw-r--r--", parent_node=parser),
+    )
+    assert file_system.complete("parser/pa") == [
+        "parser/parse.go",
+        "parser/parser.go",
+        "parser/parser_test.go",
+    ]
+
+
+@pytest.mark.parametrize("partial_path", PARTIAL_PATHS)
+def test_index_matches_memory(file_system: FileSystem, tmp_path: Path, partial_path: str) -> None:
+    """Test that the SQLite index completes like the in-memory tree."""
+    database_path = tmp_path / "structure.sqlite"
+    build_index(Path("structure.json"), database_path)
+    indexed = FileSystem(str(database_path))
+    for show_hidden_files in (False, True):
+        assert indexed.complete(partial_path, show_hidden_files=show_hidden_files) == file_system.complete(
+            partial_path,
+            show_hidden_files=show_hidden_files,
+        )
@@ -0,0 +1,95 @@
+"""Unit tests for snapshot diffs."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from src.core import FileSystem
+from src.core.diff import DiffEntry, diff_trees
+from src.core.index import build_index
+
+
+@pytest.fixture
+def new_structure(tmp_path: Path) -> Path:
+    """Fixture for a changed copy of structure.json."""
+    data = json.loads(Path("structure.json").read_text())
+    contents = {entry["name"]: entry for entry in data["contents"]}
+    contents["parser"]["contents"][1]["size"] = 1700
+    contents["lexer"]["contents"].append(
+        {"name": "token.go", "size": 100, "time_modified": 1700205662, "permissions": "-rw-r--r--"},
+    )
+    data["contents"].remove(contents["main.go"])
+    path = tmp_path / "structure.json"
+    path.write_text(json.dumps(data))
+    return path
+
+
+def test_diff_identical() -> None:
+    """Test that identical trees have no differences."""
+    assert list(FileSystem("structure.json").diff(FileSystem("structure.json"))) == []
+
+
+def test_diff(new_structure: Path) -> None:
+    """Test added, removed and modified entries with directory totals."""
+    entries = list(FileSystem("structure.json").diff(FileSystem(str(new_structure))))
+    assert entries == [
+        DiffEntry("added", "./lexer/token.go", 100),
+        DiffEntry("total", "./lexer", 100),
+        DiffEntry("removed", "./main.go", -74),
+        DiffEntry("modified", "./parser/parser.go", 78),
+        DiffEntry("total", "./parser", 78),
+        DiffEntry("total", ".", 104),
+    ]
+    assert str(entries[2]) == "removed\t-74\t./main.go"
+
+
+def test_diff_below_path(new_structure: Path) -> None:
+    """Test restricting the diff to a subtree."""
+    entries = list(FileSystem("structure.json").diff(FileSystem(str(new_structure)), "lexer"))
+    assert entries == [
+        DiffEntry("added", "./lexer/token.go", 100),
+        DiffEntry("total", "./lexer", 100),
+    ]
+
+
+def test_diff_indexes(new_structure: Path, tmp_path: Path) -> None:
+    """Test that diffs between indexes print the paths of the entries."""
+    old_index = tmp_path / "old.sqlite"
+    new_index = tmp_path / "new.sqlite"
+    build_index(Path("structure.json"), old_index)
+    build_index(new_structure, new_index)
+    lines = [str(entry) for entry in FileSystem(str(old_index)).diff(FileSystem(str(new_index)))]
+    assert lines == [
+        "added\t+100\t./lexer/token.go",
+        "total\t+100\t./lexer",
+        "removed\t-74\t./main.go",
+        "modified\t+78\t./parser/parser.go",
+        "total\t+78\t./parser",
+        "total\t+104\t.",
+    ]
+    lines = [str(entry) for entry in FileSystem(str(old_index)).diff(FileSystem(str(new_index)), "lexer")]
+    assert lines == ["added\t+100\t./lexer/token.go", "total\t+100\t./lexer"]
+
+
+def test_diff_missing_path() -> None:
+    """Test a path that exists in only one of the trees."""
+    file_system = FileSystem("structure.json")
+    node = file_system.fetch_node("parser")
+    assert list(diff_trees(None, node)) == [DiffEntry("added", "./parser", 4096 + 1342 + 1622 + 533)]
+    assert list(diff_trees(node, None)) == [DiffEntry("removed", "./parser", -(4096 + 1342 + 1622 + 533))]
+    assert list(diff_trees(None, None)) == []
+
+
+def test_diff_file_replaced_by_directory(tmp_path: Path) -> None:
+    """Test an entry that changes from a file to a directory."""
+    data = json.loads(Path("structure.json").read_text())
+    main = next(entry for entry in data["contents"] if entry["name"] == "main.go")
+    main["contents"] = []
+    path = tmp_path / "structure.json"
+    path.write_text(json.dumps(data))
+    entries = list(FileSystem("structure.json").diff(FileSystem(str(path))))
+    assert entries[:2] == [
+        DiffEntry("removed", "./main.go", -74),
+        DiffEntry("added", "./main.go", 74),
+    ]
@@ -0,0 +1,123 @@
+"""Unit tests for duplicate detection."""
+
+import json
+import weakref
+from pathlib import Path
+
+import pytest
+
+from src.core import FileSystem
+from src.core.dupes import DuplicateGroup, DuplicateIndex, render_duplicates
+from src.core.node import Node
+
+
+def entry(name: str, size: int, contents: list[dict] | None = None) -> dict:
+    """Return a structure entry, a directory if it has contents."""
+    data: dict = {"name": name, "size": size, "time_modified": 1699941437, "permissions": "-rw-r--r--"}
+    if contents is not None:
+        data["contents"] = contents
+    return data
+
+
+@pytest.fixture
+def file_system(tmp_path: Path) -> FileSystem:
+    """Return a file system with copies spread over two directories."""
+    json_path = tmp_path / "structure.json"
+    json_path.write_text(
+        json.dumps(
+            entry(
+                ".",
+                4096,
+                [
+                    entry("a", 4096, [entry("big.iso", 5000), entry("notes.txt", 10), entry("empty", 0)]),
+                    entry(
+                        "b",
+                        4096,
+                        [
+                            entry("big.iso", 5000),
+                            entry("copy.iso", 5000),
+                            entry("notes.txt", 10),
+                            entry("empty", 0),
+                            entry("unique", 7),
+                        ],
+                    ),
+                ],
+            ),
+        ),
+    )
+    return FileSystem(str(json_path))
+
+
+def paths(group: DuplicateGroup) -> list[str]:
+    """Return the paths of the files of a group."""
+    return [node.relative_path for node in group.nodes]
+
+
+def test_duplicates_by_size(file_system: FileSystem) -> None:
+    """Test that groups are ordered by wasted bytes and skip empty files."""
+    groups = list(file_system.duplicates(None))
+    assert [paths(group) for group in groups] == [
+        ["./a/big.iso", "./b/big.iso", "./b/copy.iso"],
+        ["./a/notes.txt", "./b/notes.txt"],
+    ]
+    assert [group.wasted_bytes for group in groups] == [10000, 10]
+    assert groups[0].name is None
+
+
+def test_duplicates_by_name(file_system: FileSystem) -> None:
+    """Test that matching names splits the groups of the same size."""
+    groups = list(file_system.duplicates(None, match_names=True))
+    assert [(group.name, paths(group)) for group in groups] == [
+        ("big.iso", ["./a/big.iso", "./b/big.iso"]),
+        ("notes.txt", ["./a/notes.txt", "./b/notes.txt"]),
+    ]
+
+
+def test_duplicates_below_path(file_system: FileSystem) -> None:
+    """Test searching a subtree and a missing path."""
+    assert [paths(group) for group in file_system.duplicates("b")] == [["./b/big.iso", "./b/copy.iso"]]
+    assert list(file_system.duplicates("b/unique")) == []
+    with pytest.raises(FileNotFoundError, match="cannot access missing"):
+        file_system.duplicates("missing")
+
+
+def test_unique_sizes_allocate_no_group() -> None:
+    """Test that only repeated sizes are kept as groups."""
+    index = DuplicateIndex()
+    index.update(
+        Node(name=f"file{size}", size=size, time_modified_int=0, permissions="-rw-r--r--")
+        for size in (1, 2, 3, 2, 4, 2)
+    )
+    assert index.files == 6
+    assert list(index.groups) == [2]
+    assert [node.name for node in index.groups[2]] == ["file2"] * 3
+
+
+def test_unique_files_dropped_before_groups_are_read() -> None:
+    """Test that the files seen once are not held while reading the groups."""
+    nodes = [Node(name=f"file{size}", size=size, time_modified_int=0, permissions="-rw-r--r--") for size in (1, 2, 2)]
+    unique = weakref.ref(nodes[0])
+    index = DuplicateIndex()
+    index.update(nodes)
+    del nodes
+    groups = index.iter_groups()
+    assert unique() is None
+    assert [group.size for group in groups] == [2]
+    with pytest.raises(ValueError, match="Cannot add files"):
+        index.add(Node(name="late", size=3, time_modified_int=0, permissions="-rw-r--r--"))
+
+
+def test_render_duplicates() -> None:
+    """Test the text rendering of groups."""
+    nodes = [Node(name=name, size=2048, time_modified_int=0, permissions="-rw-r--r--") for name in "ab"]
+    groups = [DuplicateGroup(size=2048, name=None, nodes=nodes), DuplicateGroup(size=5, name="c", nodes=nodes)]
+    assert list(render_duplicates(groups, display_sizes_in_human_readable_format=True)) == [
+        "2.0K\t2.0K\t2",
+        "./a",
+        "./b",
+        "",
+        "5\t5\t2",
+        "./a",
+        "./b",
+    ]
+    assert list(render_duplicates([])) == []
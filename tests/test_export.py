@@ -0,0 +1,106 @@
+"""Unit tests for the streaming export."""
+
+import csv
+import io
+import json
+
+import pytest
+
+from src.core import FileSystem
+from src.core.export import export_tree, iter_subtree, json_record, render_records
+
+
+def test_iter_subtree_visits_every_node() -> None:
+    """Test that the traversal is a depth-first pre-order walk."""
+    file_system = FileSystem("structure.json")
+    paths = [node.relative_path for node in iter_subtree(file_system.root)]
+    assert len(paths) == 19
+    assert paths.index("./ast") + 1 == paths.index("./ast/go.mod")
+    assert paths[-1] == "./token/go.mod"
+
+
+def test_iter_subtree_file() -> None:
+    """Test that a file yields only itself."""
+    file_system = FileSystem("structure.json")
+    node = file_system.fetch_node("main.go")
+    assert node is not None
+    assert list(iter_subtree(node)) == [node]
+
+
+def test_export_ndjson() -> None:
+    """Test exporting a directory as NDJSON."""
+    file_system = FileSystem("structure.json")
+    output = io.StringIO()
+    count = file_system.export(
+        name_or_path_to_node="parser",
+        output=output,
+        export_format="ndjson",
+    )
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert count == 3
+    assert records[0] == {
+        "relative_path": "./parser/parser_test.go",
+        "type": "file",
+        "size": 1342,
+        "mtime": 1700205662,
+        "permissions": "drwxr-xr-x",
+        "depth": 2,
+    }
+
+
+def test_export_csv() -> None:
+    """Test exporting the whole tree as CSV."""
+    file_system = FileSystem("structure.json")
+    output = io.StringIO()
+    count = export_tree(file_system.root, output, "csv")
+    rows = list(csv.reader(io.StringIO(output.getvalue())))
+    assert count == 19
+    assert rows[0] == ["relative_path", "type", "size", "mtime", "permissions", "depth"]
+    assert rows[4] == ["./ast", "dir", "4096", "1699957739", "-rw-r--r--", "1"]
+
+
+def test_export_invalid_format() -> None:
+    """Test that an unknown format is rejected."""
+    file_system = FileSystem("structure.json")
+    with pytest.raises(ValueError):
+        export_tree(file_system.root, io.StringIO(), "xml")
+
+
+def test_export_invalid_path() -> None:
+    """Test exporting a missing path."""
+    file_system = FileSystem("structure.json")
+    with pytest.raises(FileNotFoundError):
+        file_system.export(
+            name_or_path_to_node="invalid/path",
+            output=io.StringIO(),
+            export_format="csv",
+        )
+
+
+def test_json_record_round_trips() -> None:
+    """Test that a record is valid JSON with every export field."""
+    file_system = FileSystem("structure.json")
+    node = file_system.fetch_node("parser/go.mod")
+    assert node is not None
+    assert json.loads(json_record(node)) == {
+        "relative_path": "./parser/go.mod",
+        "type": "file",
+        "size": 533,
+        "mtime": 1699958000,
+        "permissions": "drwxr-xr-x",
+        "depth": 2,
+    }
+
+
+def test_render_records() -> None:
+    """Test serialising listed nodes as JSON and NDJSON."""
+    file_system = FileSystem("structure.json")
+    nodes = file_system.get_child_nodes(file_system.fetch_node("parser"))
+    records = json.loads(render_records(nodes, "json"))
+    assert [record["relative_path"] for record in records] == [node.relative_path for node in nodes]
+    lines = render_records(nodes, "ndjson").splitlines()
+    assert [json.loads(line) for line in lines] == records
+    assert json.loads(render_records([], "json")) == []
+    assert render_records([], "ndjson") == ""
+    with pytest.raises(ValueError, match="Unsupported output format"):
+        render_records(nodes, "csv")
@@ -1,5 +1,10 @@
 """Unit tests for FileSystem class."""
 
+import gc
+import json
+import os
+import tempfile
+
 import pytest
 from pathlib import Path
 from src.core import FileSystem
@@ -29,7 +34,50 @@ def test_file_system_ls() -> None:
         name_or_path_to_node="parser",
     )
     assert isinstance(contents, str)
-    assert contents == "drwxr-xr-x\t1.3K\tNov 17 07:21\tparser_test.go\n-rw-r--r--\t1.6K\tNov 17 06:35\tparser.go\ndrwxr-xr-x\t533\tNov 14 10:33\tgo.mod"
+    assert contents == "drwxr-xr-x 1.3K Nov 17 07:21 parser_test.go\n-rw-r--r-- 1.6K Nov 17 06:35 parser.go\ndrwxr-xr-x  533 Nov 14 10:33 go.mod"
+
+def test_file_system_ls_columns() -> None:
+    file_system = FileSystem("structure.json")
+    options = {
+        "include_all_details": False,
+        "show_hidden_files": True,
+        "sort_in_reverse": False,
+        "sort_by_last_modified_time": False,
+        "display_sizes_in_human_readable_format": False,
+        "filter_by_type": None,
+        "name_or_path_to_node": None,
+    }
+    assert file_system.ls(**options, width=30) == (
+        ".gitignore  ast     main.go\nLICENSE     go.mod  parser\nREADME.md   lexer   token"
+    )
+    assert file_system.ls(**options).startswith(".gitignore\tLICENSE\t")
+    # Columns do not apply to the long format.
+    assert file_system.ls(**{**options, "include_all_details": True}, width=30) == file_system.ls(
+        **{**options, "include_all_details": True},
+    )
+
+def test_file_system_ls_output_format() -> None:
+    file_system = FileSystem("structure.json")
+    options = {
+        "include_all_details": True,
+        "show_hidden_files": False,
+        "sort_in_reverse": True,
+        "sort_by_last_modified_time": True,
+        "display_sizes_in_human_readable_format": True,
+        "filter_by_type": None,
+        "name_or_path_to_node": "parser",
+    }
+    records = json.loads(file_system.ls(**options, output_format="json", width=30))
+    assert [record["relative_path"] for record in records] == [
+        "./parser/parser_test.go",
+        "./parser/parser.go",
+        "./parser/go.mod",
+    ]
+    assert records[2]["size"] == 533
+    lines = file_system.ls(**options, output_format="ndjson").splitlines()
+    assert [json.loads(line) for line in lines] == records
+    single = file_system.ls(**{**options, "name_or_path_to_node": "parser/go.mod"}, output_format="ndjson")
+    assert json.loads(single) == records[2]
 
 def test_file_system_fetch_node() -> None:
     file_system = FileSystem("structure.json")
@@ -100,4 +148,229 @@ def test_file_system_filter_nodes_robustness() -> None:
     nodes = list(file_system.root.children.values())
     filtered: list[Node] = file_system.filter_nodes(nodes=nodes, filter_by="folder")
     assert isinstance(filtered, list)
-    assert nodes == filtered
\ No newline at end of file
+    assert nodes == filtered
+
+NDJSON_RECORDS = """\
+{"path": ".", "size": 4096, "time_modified": 1699957865, "permissions": "drwxr-xr-x", "type": "dir"}
+{"path": "README.md", "size": 83, "time_modified": 1699941437, "permissions": "-rw-r--r--"}
+{"path": "src/core/node.py", "size": 1622, "time_modified": 1700202950, "permissions": "-rw-r--r--"}
+
+{"path": "src", "size": 4096, "time_modified": 1700205662, "permissions": "drwxr-xr-x", "type": "dir"}
+{"path": "./docs", "size": 4096, "time_modified": 1700205662, "permissions": "drwxr-xr-x", "type": "dir"}
+{"path": "README.md", "size": 90, "time_modified": 1699941437, "permissions": "-rw-r--r--"}
+"""
+
+
+def test_file_system_ndjson(tmp_path: Path) -> None:
+    file_path = tmp_path / "structure.ndjson"
+    file_path.write_text(NDJSON_RECORDS)
+    file_system = FileSystem(str(file_path))
+    assert file_system.json_data is None
+    assert file_system.root.time_modified_int == 1699957865
+    node = file_system.fetch_node("src/core/node.py")
+    assert node is not None
+    assert node.relative_path == "./src/core/node.py"
+    core = file_system.fetch_node("src/core")
+    assert core is not None
+    assert core.is_directory
+    assert core.permissions == "drwxr-xr-x"
+    src = file_system.fetch_node("src")
+    assert src is not None
+    assert src.time_modified_int == 1700205662
+    readme = file_system.fetch_node("README.md")
+    assert readme is not None
+    assert readme.size == 90
+    contents = file_system.ls(
+        include_all_details=False,
+        show_hidden_files=False,
+        sort_in_reverse=False,
+        sort_by_last_modified_time=False,
+        display_sizes_in_human_readable_format=False,
+        filter_by_type="dir",
+        name_or_path_to_node=".",
+    )
+    assert contents == "docs\tsrc"
+
+
+def test_file_system_ndjson_file_becomes_directory(tmp_path: Path) -> None:
+    file_path = tmp_path / "structure.jsonl"
+    file_path.write_text(
+        '{"path": "a", "size": 1, "time_modified": 0, "permissions": "-"}\n'
+        '{"path": "a/b", "size": 2, "time_modified": 0, "permissions": "-"}\n',
+    )
+    file_system = FileSystem(str(file_path))
+    node = file_system.fetch_node("a")
+    assert node is not None
+    assert node.is_directory
+    assert node.size == 1
+    assert file_system.fetch_node("a/b") is not None
+
+
+def test_file_system_reload_unchanged(tmp_path: Path) -> None:
+    file_path = tmp_path / "structure.ndjson"
+    file_path.write_text(NDJSON_RECORDS)
+    file_system = FileSystem(str(file_path))
+    assert not file_system.reload()
+
+
+def test_file_system_reload_appended_records(tmp_path: Path) -> None:
+    file_path = tmp_path / "structure.ndjson"
+    file_path.write_text(NDJSON_RECORDS)
+    file_system = FileSystem(str(file_path))
+    root = file_system.root
+    docs = file_system.fetch_node("docs")
+    src_hash = file_system.content_hash("src")
+    with file_path.open(mode="a") as ndjson_file:
+        ndjson_file.write(
+            '{"path": "docs/index.md", "size": 12, "time_modified": 0, "permissions": "-"}\n'
+            '{"path": "docs/partial.md", "size": 1',
+        )
+    src = file_system.fetch_node("src")
+    assert file_system.reload()
+    # A new version is published, sharing the unchanged directories.
+    assert file_system.root is not root
+    assert file_system.fetch_node("docs") is not docs
+    assert file_system.fetch_node("src") is src
+    assert root.get_child("docs/index.md") is None
+    assert file_system.fetch_node("docs/index.md") is not None
+    assert file_system.fetch_node("docs/partial.md") is None
+    assert file_system.content_hash("src") == src_hash
+    with file_path.open(mode="a") as ndjson_file:
+        ndjson_file.write(', "time_modified": 0, "permissions": "-"}\n')
+    assert file_system.reload()
+    assert file_system.fetch_node("docs/partial.md") is not None
+
+
+def test_file_system_reload_rewritten_file(tmp_path: Path) -> None:
+    file_path = tmp_path / "structure.ndjson"
+    file_path.write_text(NDJSON_RECORDS)
+    file_system = FileSystem(str(file_path))
+    root = file_system.root
+    file_path.write_text(
+        '{"path": "new.txt", "size": 1, "time_modified": 0, "permissions": "-"}\n'
+        + NDJSON_RECORDS,
+    )
+    assert file_system.reload()
+    assert file_system.root is not root
+    assert file_system.fetch_node("new.txt") is not None
+    assert file_system.result_cache.stats()["entries"] == 0
+
+
+def test_file_system_reload_rewritten_same_size(tmp_path: Path) -> None:
+    file_path = tmp_path / "structure.ndjson"
+    file_path.write_text(NDJSON_RECORDS)
+    file_system = FileSystem(str(file_path))
+    stat = file_path.stat()
+    file_path.write_text(NDJSON_RECORDS.replace('"size": 1622', '"size": 9999'))
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert file_system.reload()
+    assert file_system.fetch_node("src/core/node.py").size == 9999
+    assert not file_system.reload()
+
+
+def test_file_system_reload_rewritten_with_same_tail(tmp_path: Path) -> None:
+    file_path = tmp_path / "structure.ndjson"
+    file_path.write_text(NDJSON_RECORDS)
+    file_system = FileSystem(str(file_path))
+    # The bytes before the old end are unchanged, but the start is not.
+    file_path.write_text(
+        NDJSON_RECORDS.replace('"size": 1622', '"size": 9999')
+        + '{"path": "new.txt", "size": 1, "time_modified": 0, "permissions": "-"}\n',
+    )
+    assert file_system.reload()
+    assert file_system.fetch_node("src/core/node.py").size == 9999
+    assert file_system.fetch_node("new.txt") is not None
+
+
+def test_file_system_reload_replaced_file(tmp_path: Path) -> None:
+    file_path = tmp_path / "structure.ndjson"
+    file_path.write_text(NDJSON_RECORDS)
+    file_system = FileSystem(str(file_path))
+    marker = file_system.record_marker
+    replacement = tmp_path / "structure.ndjson.new"
+    replacement.write_text(NDJSON_RECORDS + '{"path": "new.txt", "size": 1, "time_modified": 0, "permissions": "-"}\n')
+    replacement.replace(file_path)
+    assert file_system.reload()
+    assert file_system.fetch_node("new.txt") is not None
+    assert file_system.record_marker != marker
+
+
+def test_file_system_load_partial_record(tmp_path: Path) -> None:
+    file_path = tmp_path / "structure.ndjson"
+    file_path.write_text(NDJSON_RECORDS + '{"path": "docs/partial.md", "size": 1')
+    file_system = FileSystem(str(file_path))
+    assert file_system.fetch_node("docs/partial.md") is None
+    assert file_system.record_offset == len(NDJSON_RECORDS)
+    # Bytes without a newline are not a complete record: the file is reloaded.
+    with file_path.open(mode="a") as ndjson_file:
+        ndjson_file.write(', "time_modified": 0')
+    assert file_system.reload()
+    assert file_system.fetch_node("docs/partial.md") is None
+    src = file_system.fetch_node("src")
+    with file_path.open(mode="a") as ndjson_file:
+        ndjson_file.write(', "permissions": "-"}\n')
+    assert file_system.reload()
+    assert file_system.fetch_node("docs/partial.md") is not None
+    assert file_system.fetch_node("src") is src
+
+
+def test_file_system_load_record_without_newline(tmp_path: Path) -> None:
+    file_path = tmp_path / "structure.ndjson"
+    file_path.write_text(NDJSON_RECORDS + '{"path": "docs/last.md", "size": 1, "time_modified": 0, "permissions": "-"}')
+    file_system = FileSystem(str(file_path))
+    assert file_system.fetch_node("docs/last.md") is not None
+    with file_path.open(mode="a") as ndjson_file:
+        ndjson_file.write('\n{"path": "docs/next.md", "size": 1, "time_modified": 0, "permissions": "-"}\n')
+    assert file_system.reload()
+    assert file_system.fetch_node("docs/next.md") is not None
+
+
+def test_file_system_reload_json(tmp_path: Path) -> None:
+    file_path = tmp_path / "structure.json"
+    file_path.write_text(Path("structure.json").read_text())
+    file_system = FileSystem(str(file_path))
+    lexer_hash = file_system.content_hash("lexer")
+    file_path.write_text(file_path.read_text().replace("parser_test.go", "parser_spec.go"))
+    assert file_system.reload()
+    assert file_system.fetch_node("parser/parser_spec.go") is not None
+    assert file_system.content_hash("lexer") == lexer_hash
+
+
+def test_file_system_reload_partially_written_file(tmp_path: Path) -> None:
+    file_path = tmp_path / "structure.json"
+    text = Path("structure.json").read_text()
+    file_path.write_text(text)
+    file_system = FileSystem(str(file_path), freeze_after_build=True)
+    root = file_system.root
+    signature = file_system.loaded_signature
+    assert file_system.complete("lexer/l") == ["lexer/lexer.go", "lexer/lexer_test.go"]
+    file_path.write_text(text[: len(text) // 2])
+    with pytest.raises(ValueError, match="Expecting"):
+        file_system.reload()
+    assert file_system.root is root
+    assert file_system.loaded_signature == signature
+    assert file_system.json_data is not None
+    assert file_system.completion_cache.stats()["entries"] == 1
+    assert file_system.fetch_node("lexer/lexer.go") is not None
+    file_path.write_text(text.replace("parser_test.go", "parser_spec.go"))
+    assert file_system.reload()
+    assert file_system.fetch_node("parser/parser_spec.go") is not None
+    gc.unfreeze()
+
+
+def test_file_system_reload_partially_written_file_with_budget(tmp_path: Path) -> None:
+    file_path = tmp_path / "structure.json"
+    text = Path("structure.json").read_text()
+    file_path.write_text(text)
+    file_system = FileSystem(str(file_path), max_resident_nodes=4)
+    spill_directory = file_system.spill_directory
+    spill_directories = set(Path(tempfile.gettempdir()).glob("pyls-spill-*"))
+    assert file_system.fetch_node("parser/parser.go") is not None
+    file_path.write_text(text[: len(text) // 2])
+    with pytest.raises(ValueError, match="character"):
+        file_system.reload()
+    assert file_system.spill_directory is spill_directory
+    assert file_system.shard_cache.stats()["resident_shards"] == 1
+    assert set(Path(tempfile.gettempdir()).glob("pyls-spill-*")) == spill_directories
+    assert file_system.fetch_node("parser/parser.go") is not None
+
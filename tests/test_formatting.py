@@ -0,0 +1,131 @@
+"""Unit tests for formatting helpers."""
+
+from datetime import UTC, datetime
+
+import pytest
+
+from src.core.formatting import (
+    MAX_CACHED_DAYS,
+    format_day,
+    format_size,
+    format_time,
+    render_columns,
+    render_long_format,
+)
+from src.core.node import Node
+
+
+@pytest.mark.parametrize(
+        "size,expected",
+        [
+            ((0), "0"),
+            ((1023), "1023"),
+            ((1024), "1.0K"),
+            ((1342), "1.3K"),
+            ((1024 * 1024 - 1), "1024.0K"),
+            ((5 * 1024 * 1024), "5.0M"),
+            ((1024 * 1024 + 52429), "1.1M"),
+            ((1024 ** 8), f"{1024 ** 8}B"),
+    ],
+    )
+def test_format_size(size: int, expected: str) -> None:
+    """Test format_size matches the 'ls -h' style."""
+    assert format_size(size) == expected
+
+
+def test_format_time_same_minute() -> None:
+    """Test times within the same minute format to the same value."""
+    assert format_time(1699941437) == "Nov 14 05:57"
+    assert format_time(1699941420) == "Nov 14 05:57"
+    assert format_time(1699941480) == "Nov 14 05:58"
+
+
+@pytest.mark.parametrize("time_modified_int", [0, 59, 3599, 86399, 86400, 1699941437, -1, -86401])
+def test_format_time_matches_strftime(time_modified_int: int) -> None:
+    """Test that times formatted per day match a full strftime."""
+    expected = datetime.fromtimestamp(time_modified_int, tz=UTC).strftime("%b %d %H:%M")
+    assert format_time(time_modified_int) == expected
+
+
+def test_format_time_is_not_shared() -> None:
+    """Test that each call returns its own string, to be kept by one node."""
+    assert format_time(1699941437) is not format_time(1699941437)
+
+
+def test_format_time_cache_is_bounded() -> None:
+    """Test that formatted dates are cached for a bounded number of days."""
+    format_day.cache_clear()
+    for day in range(MAX_CACHED_DAYS + 10):
+        format_time(day * 86400)
+    info = format_day.cache_info()
+    assert info.maxsize == MAX_CACHED_DAYS
+    assert info.currsize == MAX_CACHED_DAYS
+    assert format_time(0) == "Jan 01 00:00"
+
+
+def test_render_long_format_aligns_columns() -> None:
+    """Test that the size column is right aligned."""
+    nodes = [
+        Node(name="big", size=123456, time_modified_int=1699941437, permissions="-rw-r--r--"),
+        Node(name="small", size=7, time_modified_int=1699941437, permissions="-rw-r--r--"),
+    ]
+    output = render_long_format(
+        nodes,
+        display_sizes_in_human_readable_format=False,
+        use_relative_path=False,
+    )
+    assert output == (
+        "-rw-r--r-- 123456 Nov 14 05:57 big\n"
+        "-rw-r--r--      7 Nov 14 05:57 small"
+    )
+
+
+def test_render_long_format_pads_permissions() -> None:
+    """Test that permissions of different widths are left aligned."""
+    nodes = [
+        Node(name="acl", size=1, time_modified_int=1699941437, permissions="-rw-r--r--+"),
+        Node(name="plain", size=1, time_modified_int=1699941437, permissions="-rw-r--r--"),
+    ]
+    output = render_long_format(
+        nodes,
+        display_sizes_in_human_readable_format=False,
+        use_relative_path=True,
+    )
+    assert output == (
+        "-rw-r--r--+ 1 Nov 14 05:57 ./acl\n"
+        "-rw-r--r--  1 Nov 14 05:57 ./plain"
+    )
+
+
+def test_render_long_format_empty() -> None:
+    """Test rendering an empty listing."""
+    assert render_long_format(
+        [],
+        display_sizes_in_human_readable_format=True,
+        use_relative_path=False,
+    ) == ""
+
+
+def test_render_columns_fills_down_then_across() -> None:
+    """Test that names are laid out down the columns, then across."""
+    names = ["alpha", "beta", "gamma", "delta", "epsilon"]
+    assert render_columns(names, 20) == "alpha  delta\nbeta   epsilon\ngamma"
+    assert render_columns(names, 80) == "alpha  beta  gamma  delta  epsilon"
+
+
+def test_render_columns_stays_narrower_than_width() -> None:
+    """Test that lines stay narrower than the width and keep the listing order."""
+    names = [f"{'n' * (index % 13)}{index}" for index in range(100)]
+    lines = render_columns(names, 60).splitlines()
+    assert max(map(len, lines)) < 60
+    rows = len(lines)
+    cells = [line.split() for line in lines]
+    assert [cells[index % rows][index // rows] for index in range(100)] == names
+    assert len(render_columns(names, 120).splitlines()) < rows
+
+
+def test_render_columns_wide_name() -> None:
+    """Test that a name wider than the terminal gets a column of its own."""
+    assert render_columns(["x" * 100, "y"], 80) == f"{'x' * 100}\ny"
+    assert render_columns(["only"], 1) == "only"
+    assert render_columns([], 80) == ""
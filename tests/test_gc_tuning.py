@@ -0,0 +1,114 @@
+"""Unit tests for the garbage collector tuning."""
+
+import gc
+import weakref
+
+import pytest
+
+from src.core import FileSystem
+from src.core.gc_tuning import (
+    paused_collection,
+    release_subtree,
+    weaken_parent_links,
+)
+
+LS_OPTIONS: dict[str, bool | None] = {
+    "include_all_details": True,
+    "show_hidden_files": True,
+    "sort_in_reverse": False,
+    "sort_by_last_modified_time": False,
+    "display_sizes_in_human_readable_format": False,
+    "filter_by_type": None,
+}
+
+
+@pytest.fixture
+def file_system() -> FileSystem:
+    """Return the sample file system with weak parent links."""
+    return FileSystem("structure.json", weak_parent_links=True)
+
+
+def test_paused_collection_restores_state() -> None:
+    """Test that the collector is paused and then left as it was."""
+    assert gc.isenabled()
+    with paused_collection():
+        assert not gc.isenabled()
+    assert gc.isenabled()
+    gc.disable()
+    try:
+        with paused_collection():
+            assert not gc.isenabled()
+        assert not gc.isenabled()
+    finally:
+        gc.enable()
+
+
+def test_weak_links_keep_parents(file_system: FileSystem) -> None:
+    """Test that weak parent links still lead back to the root."""
+    node = file_system.fetch_node("parser/parser.go")
+    assert node.parent_node is file_system.root.children["parser"]
+    assert node.parent_node.parent_node is file_system.root
+    assert node.relative_path == "./parser/parser.go"
+
+
+def test_weak_links_listing_matches() -> None:
+    """Test that the listings do not depend on the kind of parent links."""
+    strong = FileSystem("structure.json")
+    weak = FileSystem("structure.json", weak_parent_links=True)
+    for path in (None, "parser", "parser/parser.go", ".."):
+        assert weak.ls(name_or_path_to_node=path, **LS_OPTIONS) == strong.ls(
+            name_or_path_to_node=path,
+            **LS_OPTIONS,
+        )
+
+
+def test_weak_links_free_without_collector() -> None:
+    """Test that a tree without cycles is freed by reference counting."""
+    root = FileSystem("structure.json").root
+    weaken_parent_links(root)
+    # Frees the file system, which keeps the root alive until collected.
+    gc.collect()
+    reference = weakref.ref(root)
+    with paused_collection():
+        del root
+        assert reference() is None
+
+
+def test_strong_links_need_collector() -> None:
+    """Test that a tree with strong parent links is only freed by a collection."""
+    root = FileSystem("structure.json").root
+    gc.collect()
+    reference = weakref.ref(root)
+    with paused_collection():
+        del root
+        assert reference() is not None
+    gc.collect()
+    assert reference() is None
+
+
+def test_freeze_after_build(file_system: FileSystem) -> None:
+    """Test that a frozen tree is unfrozen on a full reload."""
+    frozen = FileSystem("structure.json", freeze_after_build=True)
+    try:
+        assert gc.get_freeze_count() > 0
+        frozen.loaded_signature = (0, 0)
+        assert frozen.reload()
+        assert frozen.ls(name_or_path_to_node=None, **LS_OPTIONS) == file_system.ls(
+            name_or_path_to_node=None,
+            **LS_OPTIONS,
+        )
+    finally:
+        gc.unfreeze()
+
+
+def test_release_subtree_frees_without_collection() -> None:
+    """Test that a released subtree is freed by reference counting alone."""
+    root = FileSystem("structure.json").root
+    assert root.children is not None
+    parser = root.children.pop("parser")
+    assert parser.children is not None
+    leaf = weakref.ref(next(iter(parser.children.values())))
+    with paused_collection():
+        release_subtree(parser)
+        del parser
+        assert leaf() is None
@@ -0,0 +1,144 @@
+"""Unit tests for the SQLite index."""
+
+import itertools
+import json
+from pathlib import Path
+
+import pytest
+
+from src.core import FileSystem
+from src.core.index import IndexedNode, SQLiteIndex, build_index, is_index_path
+
+
+@pytest.fixture
+def index_path(tmp_path: Path) -> Path:
+    """Fixture for an index of the sample structure."""
+    database_path = tmp_path / "structure.sqlite"
+    assert build_index(Path("structure.json"), database_path) == 20
+    return database_path
+
+
+def test_is_index_path() -> None:
+    """Test the recognised suffixes."""
+    assert is_index_path(Path("tree.sqlite"))
+    assert is_index_path(Path("tree.db"))
+    assert not is_index_path(Path("structure.json"))
+
+
+def test_fetch_node(index_path: Path) -> None:
+    """Test looking nodes up by path."""
+    file_system = FileSystem(str(index_path))
+    assert file_system.json_data is None
+    node = file_system.fetch_node("parser/parser.go")
+    assert isinstance(node, IndexedNode)
+    assert (node.size, node.relative_path, node.depth) == (1622, "./parser/parser.go", 2)
+    assert file_system.fetch_node("parser/missing.go") is None
+    assert file_system.fetch_node("parser/parser.go/x") is None
+    assert file_system.fetch_node("parser") == file_system.fetch_node("parser")
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        dict(zip(("include_all_details", "show_hidden_files", "sort_in_reverse", "sort_by_last_modified_time", "filter_by_type", "sort_by"), values))
+        for values in itertools.product([False, True], [False, True], [False, True], [False, True], [None, "dir", "file"], [None, "size"])
+    ],
+)
+@pytest.mark.parametrize("path", [".", "parser", "lexer/lexer.go", "missing"])
+def test_ls_matches_memory(index_path: Path, options: dict, path: str) -> None:
+    """Test that listings from the index match the in-memory tree."""
+    memory = FileSystem("structure.json")
+    index = FileSystem(str(index_path))
+    arguments = {"display_sizes_in_human_readable_format": False, "name_or_path_to_node": path, **options}
+    assert index.ls(**arguments) == memory.ls(**arguments)
+
+
+@pytest.mark.parametrize("sort_in_reverse", [False, True])
+@pytest.mark.parametrize("sort_by_last_modified_time", [False, True])
+def test_pages_match_memory(index_path: Path, sort_in_reverse: bool, sort_by_last_modified_time: bool) -> None:
+    """Test that keyset pages from the index match the in-memory pages."""
+    pages = {}
+    for file_system in (FileSystem("structure.json"), FileSystem(str(index_path))):
+        cursor = None
+        pages[file_system] = []
+        while True:
+            page, cursor = file_system.ls_page(
+                name_or_path_to_node=".",
+                page_size=3,
+                after=cursor,
+                include_all_details=False,
+                show_hidden_files=True,
+                sort_in_reverse=sort_in_reverse,
+                sort_by_last_modified_time=sort_by_last_modified_time,
+                display_sizes_in_human_readable_format=False,
+                filter_by_type=None,
+            )
+            pages[file_system].append(page)
+            if cursor is None:
+                break
+    memory_pages, index_pages = pages.values()
+    assert len(index_pages) == 3
+    assert index_pages == memory_pages
+
+
+def test_walks_query_children(index_path: Path) -> None:
+    """Test that whole-tree walks work on top of the index."""
+    memory = FileSystem("structure.json")
+    index = FileSystem(str(index_path))
+    assert index.stats_report(".").report() == memory.stats_report(".").report()
+    assert [str(entry) for entry in index.diff(memory)] == []
+
+
+def test_missing_index(tmp_path: Path) -> None:
+    """Test that a missing index raises FileNotFoundError."""
+    with pytest.raises(FileNotFoundError):
+        FileSystem(str(tmp_path / "missing.sqlite"))
+
+
+def test_build_index_streams_shards(monkeypatch, tmp_path: Path) -> None:
+    """Test importing shards inline without parsing whole documents."""
+    fields = {"size": 1, "time_modified": 0, "permissions": "-"}
+    (tmp_path / "shards").mkdir()
+    (tmp_path / "structure.json").write_text(
+        json.dumps(
+            {
+                "name": "root",
+                **fields,
+                "contents": [
+                    {"name": "build", **fields, "$ref": "shards/build.json"},
+                    {"name": "z", **fields},
+                ],
+            },
+        ),
+    )
+    (tmp_path / "shards" / "build.json").write_text(
+        json.dumps(
+            {
+                "name": "build",
+                **fields,
+                "contents": [
+                    {"name": "cache", **fields, "$ref": "cache.json"},
+                    {"name": "main.o", **fields},
+                ],
+            },
+        ),
+    )
+    (tmp_path / "shards" / "cache.json").write_text(
+        json.dumps({"name": "cache", **fields, "contents": [{"name": "a", **fields}]}),
+    )
+
+    def load(*_) -> None:
+        raise AssertionError
+
+    monkeypatch.setattr(json, "load", load)
+    database_path = tmp_path / "structure.sqlite"
+    assert build_index(tmp_path / "structure.json", database_path) == 6
+    index = SQLiteIndex(database_path)
+    node = index.fetch_node("build/cache/a")
+    assert node is not None
+    assert node.relative_path == "./build/cache/a"
+    build = index.fetch_node("build")
+    assert build is not None
+    assert build.children is not None
+    assert list(build.children) == ["cache", "main.o"]
+    index.close()
@@ -0,0 +1,60 @@
+"""Unit tests for structure file readers."""
+
+import bz2
+import gzip
+import lzma
+from pathlib import Path
+
+import pytest
+
+from src.core import FileSystem
+from src.core.loaders import open_structure_file
+
+STRUCTURE = Path("structure.json").read_bytes()
+
+
+@pytest.mark.parametrize(
+    "suffix,compress",
+    [
+        ("json", lambda data: data),
+        ("json.gz", gzip.compress),
+        ("json.xz", lzma.compress),
+        ("json.bz2", bz2.compress),
+    ],
+)
+def test_open_structure_file(tmp_path: Path, suffix: str, compress) -> None:
+    """Test that compressed files are transparently decompressed."""
+    path = tmp_path / f"structure.{suffix}"
+    path.write_bytes(compress(STRUCTURE))
+    with open_structure_file(path) as structure_file:
+        assert structure_file.read() == STRUCTURE
+
+
+def test_compression_detected_by_magic_bytes(tmp_path: Path) -> None:
+    """Test that detection does not depend on the file extension."""
+    path = tmp_path / "structure.json"
+    path.write_bytes(gzip.compress(STRUCTURE))
+    file_system = FileSystem(str(path))
+    node = file_system.fetch_node("parser/parser.go")
+    assert node is not None
+    assert node.size == 1622
+
+
+def test_compressed_shard(tmp_path: Path) -> None:
+    """Test that `$ref` shards may be compressed as well."""
+    (tmp_path / "structure.json").write_text(
+        '{"name": "root", "size": 1, "time_modified": 0, "permissions": "-",'
+        ' "contents": [{"name": "sub", "size": 1, "time_modified": 0,'
+        ' "permissions": "-", "$ref": "sub.json.xz"}]}',
+    )
+    (tmp_path / "sub.json.xz").write_bytes(
+        lzma.compress(
+            b'{"name": "sub", "size": 1, "time_modified": 0, "permissions": "-",'
+            b' "contents": [{"name": "a", "size": 7, "time_modified": 0,'
+            b' "permissions": "-"}]}',
+        ),
+    )
+    file_system = FileSystem(str(tmp_path / "structure.json"))
+    node = file_system.fetch_node("sub/a")
+    assert node is not None
+    assert node.size == 7
@@ -0,0 +1,107 @@
+"""Unit tests for the memory report."""
+
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from src.core import FileSystem
+from src.core.memory import MEMORY_CATEGORIES, MemoryReport, sizeof
+
+
+@pytest.fixture
+def file_system() -> FileSystem:
+    """Return the sample file system."""
+    return FileSystem("structure.json")
+
+
+def entry(name: str, contents: list[dict] | None = None) -> dict:
+    """Return a structure entry, a directory if it has contents."""
+    data: dict = {"name": name, "size": 1, "time_modified": 1699941437, "permissions": "-rw-r--r--"}
+    if contents is not None:
+        data["contents"] = contents
+    return data
+
+
+def test_memory_report(file_system: FileSystem) -> None:
+    """Test the counts and breakdowns of the sample tree."""
+    report = file_system.memory_report(None)
+    assert report.nodes == 20
+    assert set(report.categories) == set(MEMORY_CATEGORIES)
+    assert all(size > 0 for size in report.categories.values())
+    assert report.node_types["Node dir"][0] == 5
+    assert report.node_types["Node file"][0] == 15
+    assert sum(size for _, size in report.node_types.values()) == report.total_bytes
+    assert report.bytes_per_node == report.total_bytes / 20
+    assert report.traced_bytes is None
+    assert file_system.memory_report("parser/parser.go").nodes == 1
+
+
+def test_memory_report_traced() -> None:
+    """Test that the figures of tracemalloc are included while it is tracing."""
+    tracemalloc.start()
+    try:
+        report = FileSystem("structure.json").memory_report(None)
+    finally:
+        tracemalloc.stop()
+    assert report.traced_bytes is not None
+    assert report.traced_peak_bytes >= report.traced_bytes > 0
+    assert "\ntraced bytes\t" in report.report()
+
+
+def test_memory_report_missing_path(file_system: FileSystem) -> None:
+    """Test measuring a path that does not exist."""
+    with pytest.raises(FileNotFoundError, match="cannot access missing"):
+        file_system.memory_report("missing")
+
+
+def test_memory_report_does_not_load(tmp_path: Path) -> None:
+    """Test that spilled directories are measured only once loaded."""
+    json_path = tmp_path / "structure.json"
+    json_path.write_text(
+        json.dumps(entry("root", [entry(name, [entry(str(index)) for index in range(4)]) for name in "abc"])),
+    )
+    file_system = FileSystem(str(json_path), max_resident_nodes=16)
+    assert file_system.memory_report(None).nodes == 4
+    assert file_system.shard_cache.stats()["loads"] == 0
+    assert file_system.fetch_node("a/1") is not None
+    report = file_system.memory_report(None)
+    assert report.nodes == 8
+    assert report.node_types["SpilledNode dir"][0] == 3
+
+
+def test_sizeof_counts_shared_objects_once() -> None:
+    """Test that objects shared between nodes are counted once."""
+    seen: set[int] = set()
+    shared = ("shared", 1)
+    assert sizeof(shared, seen) > 0
+    assert sizeof(shared, seen) == 0
+    assert sizeof(["shared"], seen) == sys.getsizeof(["shared"])
+
+
+def test_empty_report() -> None:
+    """Test the report of an empty measurement."""
+    report = MemoryReport()
+    assert report.bytes_per_node == 0.0
+    assert report.report().startswith("nodes\t0\nbytes\t0\n")
+
+
+def test_memory_report_does_not_grow_nodes(tmp_path: Path) -> None:
+    """Test that measuring nodes does not create their instance dictionaries."""
+    json_path = tmp_path / "structure.json"
+    json_path.write_text(json.dumps(entry("root", [entry(str(index)) for index in range(1000)])))
+    file_system = FileSystem(str(json_path))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        report = file_system.memory_report(None)
+        del report
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert after - before < 1000
@@ -0,0 +1,96 @@
+"""Unit tests for Merkle hashes of subtrees."""
+
+import json
+from pathlib import Path
+
+from src.core import FileSystem
+from src.core.merkle import compute_subtree_hashes
+from src.core.node import Node
+
+
+def rehashed(node: Node) -> bytes | None:
+    """Return the hash of a node recomputed from scratch."""
+    compute_subtree_hashes(node)
+    return node.content_hash
+
+
+def test_every_node_is_hashed() -> None:
+    """Test that loading hashes the whole tree."""
+    file_system = FileSystem("structure.json")
+    assert file_system.root.content_hash is not None
+    node = file_system.fetch_node("parser/go.mod")
+    assert node is not None
+    assert node.content_hash is not None
+
+
+def test_hash_ignores_child_order(tmp_path: Path) -> None:
+    """Test that reordering entries does not change the hash."""
+    data = json.loads(Path("structure.json").read_text())
+    data["contents"].reverse()
+    path = tmp_path / "structure.json"
+    path.write_text(json.dumps(data))
+    assert FileSystem(str(path)).content_hash(".") == FileSystem("structure.json").content_hash(".")
+
+
+def test_add_child_updates_ancestors() -> None:
+    """Test that adding a child rehashes only its ancestors."""
+    file_system = FileSystem("structure.json")
+    root_hash = file_system.content_hash(".")
+    lexer_hash = file_system.content_hash("lexer")
+    parser_hash = file_system.content_hash("parser")
+    parser = file_system.fetch_node("parser")
+    assert parser is not None
+    parser.add_child(Node(name="ast.go", size=1, time_modified_int=0, permissions="-", parent_node=parser))
+    assert file_system.content_hash("parser") != parser_hash
+    assert file_system.content_hash(".") != root_hash
+    assert file_system.content_hash("lexer") == lexer_hash
+    assert file_system.root.content_hash == rehashed(file_system.root)
+
+
+def test_replacing_child_updates_hash() -> None:
+    """Test replacing a child with a node of the same name."""
+    file_system = FileSystem("structure.json")
+    root_hash = file_system.root.content_hash
+    main = file_system.fetch_node("main.go")
+    assert main is not None
+    file_system.root.add_child(Node(name="main.go", size=75, time_modified_int=0, permissions="-", parent_node=file_system.root))
+    assert file_system.root.content_hash != root_hash
+    assert file_system.root.content_hash == rehashed(file_system.root)
+    file_system.root.add_child(main)
+    assert file_system.root.content_hash == root_hash
+
+
+def test_update_metadata_updates_hash() -> None:
+    """Test that changing metadata deep in the tree reaches the root."""
+    file_system = FileSystem("structure.json")
+    root_hash = file_system.root.content_hash
+    node = file_system.fetch_node("token/token.go")
+    assert node is not None
+    node.update_metadata(size=911, time_modified_int=node.time_modified_int, permissions=node.permissions)
+    assert file_system.root.content_hash != root_hash
+    assert file_system.root.content_hash == rehashed(file_system.root)
+    node.update_metadata(size=910, time_modified_int=node.time_modified_int, permissions=node.permissions)
+    assert file_system.root.content_hash == root_hash
+
+
+def test_content_hash_of_missing_path() -> None:
+    """Test the hash of a path that does not exist."""
+    assert FileSystem("structure.json").content_hash("invalid/path") is None
+
+
+def test_mount_point_hash_does_not_load_shard(tmp_path: Path) -> None:
+    """Test that hashing covers the reference of a mount point."""
+    (tmp_path / "structure.json").write_text(
+        '{"name": "root", "size": 1, "time_modified": 0, "permissions": "-",'
+        ' "contents": [{"name": "sub", "size": 1, "time_modified": 0,'
+        ' "permissions": "-", "$ref": "sub.json"}]}',
+    )
+    (tmp_path / "sub.json").write_text(
+        '{"name": "sub", "size": 1, "time_modified": 0, "permissions": "-",'
+        ' "contents": [{"name": "a", "size": 7, "time_modified": 0, "permissions": "-"}]}',
+    )
+    file_system = FileSystem(str(tmp_path / "structure.json"))
+    root_hash = file_system.content_hash(".")
+    assert file_system.shard_cache.loads == 0
+    assert file_system.content_hash("sub/a") is not None
+    assert file_system.content_hash(".") == root_hash
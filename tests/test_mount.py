@@ -0,0 +1,304 @@
+"""Unit tests for sharded structure files."""
+
+import gc
+import json
+import weakref
+from pathlib import Path
+
+import pytest
+
+from src.core import FileSystem
+from src.core.mount import MountNode, SpilledNode
+from src.core.node import Node
+
+
+def write_json(path: Path, data: dict) -> None:
+    """Write JSON data to a path, creating parent directories."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data))
+
+
+def entry(name: str, **extra) -> dict:
+    """Return a structure entry."""
+    return {
+        "name": name,
+        "size": 4096,
+        "time_modified": 1699941437,
+        "permissions": "drwxr-xr-x",
+        **extra,
+    }
+
+
+@pytest.fixture
+def sharded_structure(tmp_path: Path) -> Path:
+    """Fixture for a root structure with two shards, one of them nested."""
+    write_json(
+        tmp_path / "structure.json",
+        entry(
+            "root",
+            contents=[
+                entry("README.md"),
+                entry("build", **{"$ref": "shards/build.json"}),
+                entry("dist", **{"$ref": "shards/dist.json"}),
+            ],
+        ),
+    )
+    write_json(
+        tmp_path / "shards" / "build.json",
+        entry(
+            "build",
+            contents=[
+                entry("main.o"),
+                entry("cache", **{"$ref": "cache.json"}),
+            ],
+        ),
+    )
+    write_json(tmp_path / "shards" / "cache.json", entry("cache", contents=[entry("a")]))
+    write_json(tmp_path / "shards" / "dist.json", entry("dist", contents=[entry("app")]))
+    return tmp_path / "structure.json"
+
+
+def test_mount_points_are_not_loaded_eagerly(sharded_structure: Path) -> None:
+    """Test that shards are only loaded when traversed."""
+    file_system = FileSystem(str(sharded_structure))
+    assert file_system.root.children is not None
+    build = file_system.root.children["build"]
+    assert isinstance(build, MountNode)
+    assert not build.is_mounted
+    assert file_system.shard_cache.loads == 0
+
+
+def test_fetch_node_mounts_nested_shards(sharded_structure: Path) -> None:
+    """Test traversing into nested shards with relative references."""
+    file_system = FileSystem(str(sharded_structure))
+    node = file_system.fetch_node("build/cache/a")
+    assert node is not None
+    assert node.relative_path == "./build/cache/a"
+    assert file_system.shard_cache.loads == 2
+
+
+def test_ls_on_mount_point(sharded_structure: Path) -> None:
+    """Test listing the contents of a mount point."""
+    file_system = FileSystem(str(sharded_structure))
+    contents = file_system.ls(
+        include_all_details=False,
+        show_hidden_files=False,
+        sort_in_reverse=False,
+        sort_by_last_modified_time=False,
+        display_sizes_in_human_readable_format=False,
+        filter_by_type=None,
+        name_or_path_to_node="build",
+    )
+    assert contents == "cache\tmain.o"
+
+
+def test_lru_bound_unmounts_least_recently_used(sharded_structure: Path) -> None:
+    """Test that the least recently used shard is unmounted."""
+    file_system = FileSystem(str(sharded_structure), max_resident_shards=1)
+    assert file_system.fetch_node("build/main.o") is not None
+    assert file_system.fetch_node("dist/app") is not None
+    assert file_system.root.children is not None
+    assert not file_system.root.children["build"].is_mounted
+    assert file_system.root.children["dist"].is_mounted
+    assert file_system.shard_cache.evictions == 1
+    assert file_system.fetch_node("build/main.o") is not None
+    assert file_system.shard_cache.loads == 3
+
+
+def test_loading_a_shard_is_not_counted_as_hits(sharded_structure: Path) -> None:
+    """Test that only traversals of mounted shards count as hits."""
+    file_system = FileSystem(str(sharded_structure))
+    assert file_system.fetch_node("build/cache/a") is not None
+    assert file_system.shard_cache.stats()["hits"] == 0
+    assert file_system.fetch_node("build/main.o") is not None
+    assert file_system.shard_cache.stats()["hits"] == 1
+    assert file_system.shard_cache.loads == 2
+
+
+def test_children_survive_concurrent_eviction(monkeypatch, sharded_structure: Path) -> None:
+    """Test that children read while mounted are returned despite an eviction."""
+    file_system = FileSystem(str(sharded_structure), max_resident_shards=1)
+    shard_cache = file_system.shard_cache
+    touch = shard_cache.touch
+
+    def touch_then_evict(mount_node: MountNode):
+        children = touch(mount_node)
+        # Another thread evicting the shard right after it was touched.
+        shard_cache.evict(mount_node)
+        return children
+
+    build = file_system.root.children["build"]
+    assert build.children is not None
+    monkeypatch.setattr(shard_cache, "touch", touch_then_evict)
+    children = build.children
+    assert children is not None
+    assert "main.o" in children
+    assert not build.is_mounted
+
+
+def test_missing_shard(sharded_structure: Path) -> None:
+    """Test that a missing shard raises and can be retried."""
+    (sharded_structure.parent / "shards" / "dist.json").unlink()
+    file_system = FileSystem(str(sharded_structure))
+    with pytest.raises(FileNotFoundError):
+        file_system.fetch_node("dist/app")
+    assert not file_system.shard_cache.resident
+
+
+@pytest.fixture
+def nested_structure(tmp_path: Path) -> Path:
+    """Fixture for a structure with three directories of four files each."""
+    write_json(
+        tmp_path / "structure.json",
+        entry(
+            "root",
+            contents=[
+                entry(
+                    "a",
+                    contents=[entry("b", contents=[entry("x"), entry("y")]), entry("z")],
+                ),
+                entry("c", contents=[entry(name) for name in "1234"]),
+                entry("d", contents=[entry(name) for name in "1234"]),
+            ],
+        ),
+    )
+    return tmp_path / "structure.json"
+
+
+def test_node_budget_spills_directories(nested_structure: Path) -> None:
+    """Test that directories are spilled while building a budgeted tree."""
+    whole = FileSystem(str(nested_structure))
+    file_system = FileSystem(str(nested_structure), max_resident_nodes=16)
+    assert file_system.json_data is None
+    assert file_system.root.children is not None
+    for name in "acd":
+        node = file_system.root.children[name]
+        assert isinstance(node, SpilledNode)
+        assert not node.is_mounted
+    assert file_system.shard_cache.stats()["pinned_nodes"] == 4
+    assert file_system.content_hash(".") == whole.content_hash(".")
+    assert file_system.fetch_node("a/b/x") is not None
+    assert file_system.content_hash("a/b") == whole.content_hash("a/b")
+    assert list(file_system.diff(whole)) == []
+
+
+def test_node_budget_evicts_cold_directories(nested_structure: Path) -> None:
+    """Test that the least recently used directories are evicted."""
+    file_system = FileSystem(str(nested_structure), max_resident_nodes=10)
+    assert file_system.fetch_node("c/1") is not None
+    assert file_system.fetch_node("d/1") is not None
+    assert file_system.root.children is not None
+    assert not file_system.root.children["c"].is_mounted
+    assert file_system.root.children["d"].is_mounted
+    stats = file_system.shard_cache.stats()
+    assert stats["resident_nodes"] == 4
+    assert stats["loads"] == 2
+    assert stats["evictions"] == 1
+    assert file_system.fetch_node("d/2") is not None
+    assert file_system.shard_cache.stats()["hits"] > stats["hits"]
+
+
+def test_node_budget_evicts_nested_directories(nested_structure: Path) -> None:
+    """Test that evicting a directory also evicts those mounted below it."""
+    file_system = FileSystem(str(nested_structure), max_resident_nodes=11)
+    assert file_system.fetch_node("a/b/x") is not None
+    assert file_system.shard_cache.stats()["resident_shards"] == 2
+    assert file_system.fetch_node("c/1") is not None
+    stats = file_system.shard_cache.stats()
+    assert stats["resident_shards"] == 1
+    assert stats["resident_nodes"] == 4
+    assert stats["evictions"] == 2
+
+
+def test_node_budget_drops_cached_results(nested_structure: Path) -> None:
+    """Test that evicting a directory drops the results cached from it."""
+    file_system = FileSystem(str(nested_structure), max_resident_nodes=10)
+    options = {
+        "include_all_details": False,
+        "show_hidden_files": False,
+        "sort_in_reverse": False,
+        "sort_by_last_modified_time": False,
+        "display_sizes_in_human_readable_format": False,
+        "filter_by_type": None,
+    }
+    assert file_system.ls(name_or_path_to_node="c", **options) == "1\t2\t3\t4"
+    assert file_system.ls(name_or_path_to_node="c/1", **options) == "./c/1"
+    file_system.ls_page(name_or_path_to_node="c", page_size=2, after=None, **options)
+    assert file_system.complete("c/") == ["c/1", "c/2", "c/3", "c/4"]
+    evicted = weakref.ref(file_system.fetch_node("c/1"))
+    assert file_system.fetch_node("d/1") is not None
+    gc.collect()
+    assert evicted() is None
+    assert file_system.ls(name_or_path_to_node="c", **options) == "1\t2\t3\t4"
+
+
+def new_file(name: str) -> Node:
+    """Return a file node not attached to any tree."""
+    return Node(name=name, size=10, time_modified_int=1699941437, permissions="-rw-r--r--")
+
+
+def test_node_budget_writes_back_modified_directories(nested_structure: Path) -> None:
+    """Test that changes below a spilled directory are hashed and kept."""
+    whole = FileSystem(str(nested_structure))
+    file_system = FileSystem(str(nested_structure), max_resident_nodes=11)
+    for tree in (whole, file_system):
+        tree.fetch_node("a").add_child(new_file("new"))
+        tree.fetch_node("a/b/x").update_metadata(
+            size=1,
+            time_modified_int=0,
+            permissions="-rw-------",
+        )
+    assert file_system.content_hash(".") == whole.content_hash(".")
+    assert file_system.fetch_node("c/1") is not None
+    assert file_system.fetch_node("d/1") is not None
+    assert file_system.root.children is not None
+    assert not file_system.root.children["a"].is_mounted
+    assert file_system.shard_cache.stats()["evictions"] >= 2
+    assert file_system.fetch_node("a/new") is not None
+    assert file_system.fetch_node("a/b/x").size == 1
+    assert file_system.content_hash(".") == whole.content_hash(".")
+    assert list(file_system.diff(whole)) == []
+
+
+def test_modified_shards_are_pinned(sharded_structure: Path) -> None:
+    """Test that a modified shard is kept mounted instead of unmounted."""
+    file_system = FileSystem(str(sharded_structure), max_resident_shards=1)
+    file_system.fetch_node("build").add_child(new_file("new"))
+    assert file_system.fetch_node("dist/app") is not None
+    build = file_system.root.children["build"]
+    assert build.is_mounted
+    assert build in file_system.shard_cache.pinned
+    assert file_system.fetch_node("build/new") is not None
+    assert file_system.shard_cache.loads == 2
+
+
+def test_node_budget_spills_mount_points(tmp_path: Path) -> None:
+    """Test that shards below a spilled directory keep their location."""
+    write_json(
+        tmp_path / "structure.json",
+        entry(
+            "root",
+            contents=[
+                entry("outer", contents=[entry("build", **{"$ref": "shards/build.json"})]),
+            ],
+        ),
+    )
+    write_json(tmp_path / "shards" / "build.json", entry("build", contents=[entry("main.o")]))
+    file_system = FileSystem(str(tmp_path / "structure.json"), max_resident_nodes=16)
+    assert file_system.root.children is not None
+    assert isinstance(file_system.root.children["outer"], SpilledNode)
+    assert file_system.fetch_node("outer/build/main.o") is not None
+
+
+def test_node_budget_reads_the_file_as_a_stream(monkeypatch, nested_structure: Path) -> None:
+    """Test that a budgeted load does not parse the whole document at once."""
+
+    def load(*_) -> None:
+        raise AssertionError
+
+    monkeypatch.setattr(json, "load", load)
+    file_system = FileSystem(str(nested_structure), max_resident_nodes=16)
+    assert file_system.shard_cache.stats()["pinned_nodes"] == 4
+    # Spill files hold a share of the budget each and are loaded whole.
+    monkeypatch.undo()
+    assert file_system.fetch_node("a/b/x") is not None
@@ -273,4 +273,12 @@ def test_node_get_child_invalid_path(node_2) -> None:
 def test_node_human_readable_size_large(size: int, expected: str) -> None:
     """Test human_readable_size property of Node class with large size."""
     node = Node(name="name", size=size, is_directory=False, permissions="drwxr-xr-x", time_modified_int=0,)
-    assert node.human_readable_size == expected
\ No newline at end of file
+    assert node.human_readable_size == expected
+
+def test_update_metadata(node_1: Node) -> None:
+    """Test update_metadata method of Node class."""
+    node_1.update_metadata(size=2048, time_modified_int=1700205662, permissions="-rw-------")
+    assert node_1.size == 2048
+    assert node_1.human_readable_size == "2.0K"
+    assert node_1.time_modified == "Nov 17 07:21"
+    assert node_1.permissions == "-rw-------"
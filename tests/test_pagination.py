@@ -0,0 +1,125 @@
+"""Unit tests for cursor-based pagination."""
+
+import pytest
+
+from src.core import FileSystem
+from src.core.node import Node
+from src.core.pagination import decode_cursor, encode_cursor
+
+
+def page(file_system: FileSystem, after=None, **options) -> tuple[str, str | None]:
+    """Return a page of the root directory."""
+    defaults = {
+        "include_all_details": False,
+        "show_hidden_files": False,
+        "sort_in_reverse": False,
+        "sort_by_last_modified_time": False,
+        "display_sizes_in_human_readable_format": False,
+        "filter_by_type": None,
+        "name_or_path_to_node": ".",
+        "page_size": 3,
+    }
+    return file_system.ls_page(after=after, **{**defaults, **options})
+
+
+def collect(file_system: FileSystem, **options) -> list[str]:
+    """Walk every page and return the listed names."""
+    names: list[str] = []
+    cursor = None
+    while True:
+        results, cursor = page(file_system, after=cursor, **options)
+        names.extend(results.split("\t"))
+        if cursor is None:
+            return names
+
+
+def test_cursor_round_trip() -> None:
+    """Test that cursors decode to the encoded position."""
+    assert decode_cursor(encode_cursor("time", (1699941437, "LICENSE"))) == ("time", (1699941437, "LICENSE"))
+    assert decode_cursor(encode_cursor("natural", ((("f", 2, ""), "f2"), "f2"))) == (
+        "natural",
+        ((("f", 2, ""), "f2"), "f2"),
+    )
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", encode_cursor("name", ("a", "b"))[:-4], "WzFd"])
+def test_invalid_cursor(cursor: str) -> None:
+    """Test that malformed cursors are rejected."""
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_first_page() -> None:
+    """Test that the first page holds the first entries."""
+    file_system = FileSystem("structure.json")
+    results, cursor = page(file_system)
+    assert results == "LICENSE\tREADME.md\tast"
+    assert cursor is not None
+
+
+def test_pages_match_ls() -> None:
+    """Test that walking the pages lists the same entries as ls."""
+    file_system = FileSystem("structure.json")
+    assert collect(file_system) == "LICENSE\tREADME.md\tast\tgo.mod\tlexer\tmain.go\tparser\ttoken".split("\t")
+    assert collect(file_system, sort_in_reverse=True, show_hidden_files=True) == (
+        "token\tparser\tmain.go\tlexer\tgo.mod\tast\tREADME.md\tLICENSE\t.gitignore".split("\t")
+    )
+
+
+def test_pages_by_time_break_ties_by_name() -> None:
+    """Test sorting by time, with ties ordered by name."""
+    file_system = FileSystem("structure.json")
+    assert collect(file_system, sort_by_last_modified_time=True, sort_in_reverse=True) == [
+        "parser", "ast", "lexer", "token", "main.go", "go.mod", "README.md", "LICENSE",
+    ]
+
+
+def test_sorted_order_is_cached() -> None:
+    """Test that later pages reuse the cached sorted order."""
+    file_system = FileSystem("structure.json")
+    _, cursor = page(file_system)
+    page(file_system, after=cursor)
+    assert file_system.listing_cache.misses == 1
+    assert file_system.listing_cache.hits == 1
+
+
+def test_cache_rebuilt_after_add_child() -> None:
+    """Test that adding a child invalidates the cached order."""
+    file_system = FileSystem("structure.json")
+    _, cursor = page(file_system)
+    file_system.root.add_child(
+        Node(name="b.txt", size=1, time_modified_int=0, permissions="-", parent_node=file_system.root),
+    )
+    results, _ = page(file_system, after=cursor)
+    assert results == "b.txt\tgo.mod\tlexer"
+
+
+def test_cursor_type_mismatch() -> None:
+    """Test that a name cursor cannot be used when sorting by time."""
+    file_system = FileSystem("structure.json")
+    _, cursor = page(file_system)
+    with pytest.raises(ValueError):
+        page(file_system, after=cursor, sort_by_last_modified_time=True)
+
+
+def test_page_of_file() -> None:
+    """Test paging a single file."""
+    file_system = FileSystem("structure.json")
+    assert page(file_system, name_or_path_to_node="main.go") == ("./main.go", None)
+
+
+
+def test_pages_in_natural_order() -> None:
+    """Test paging with a tuple-valued sort key."""
+    file_system = FileSystem("structure.json")
+    assert collect(file_system, sort_by="natural", sort_in_reverse=True) == [
+        "token", "parser", "main.go", "lexer", "go.mod", "ast", "README.md", "LICENSE",
+    ]
+
+
+def test_cursor_from_other_sort_order() -> None:
+    """Test that a cursor cannot be reused with another sort order."""
+    file_system = FileSystem("structure.json")
+    _, cursor = page(file_system)
+    with pytest.raises(ValueError):
+        page(file_system, after=cursor, sort_by="size")
@@ -0,0 +1,216 @@
+"""Unit tests for copy-on-write snapshots."""
+
+import gc
+import io
+import json
+import threading
+import weakref
+from pathlib import Path
+
+import pytest
+
+from src.core import FileSystem
+from src.core.export import export_tree
+from src.core.index import build_index
+from src.core.node import Node
+
+LS_OPTIONS: dict[str, bool | None] = {
+    "include_all_details": False,
+    "show_hidden_files": False,
+    "sort_in_reverse": False,
+    "sort_by_last_modified_time": False,
+    "display_sizes_in_human_readable_format": False,
+    "filter_by_type": None,
+}
+
+
+@pytest.fixture
+def file_system() -> FileSystem:
+    """Return the sample file system."""
+    return FileSystem("structure.json")
+
+
+def new_file(name: str) -> Node:
+    """Return a file node that is not part of any tree yet."""
+    return Node(name=name, size=1, time_modified_int=1700000000, permissions="-rw-r--r--")
+
+
+def test_edit_copies_the_path_only(file_system: FileSystem) -> None:
+    """Test that an edit copies the path to the node and shares the rest."""
+    old_root = file_system.snapshot()
+    old_parser = old_root.children["parser"]
+    old_hash = old_root.content_hash
+    with file_system.edit() as writer:
+        writer.add_child("parser", new_file("lexer.go"))
+        writer.add_child("parser", new_file("ast.go"))
+    assert writer.copies == 2
+    new_root = file_system.snapshot()
+    assert new_root is not old_root
+    assert new_root.children["parser"] is not old_parser
+    assert new_root.children["parser"].parent_node is new_root
+    for name in ("lexer", "token", "LICENSE"):
+        assert new_root.children[name] is old_root.children[name]
+    assert new_root.children["parser"].children["parser.go"] is old_parser.children["parser.go"]
+    # The published version is untouched.
+    assert "lexer.go" not in old_parser.children
+    assert old_root.content_hash == old_hash
+    assert new_root.content_hash != old_hash
+    assert file_system.ls(name_or_path_to_node="parser", **LS_OPTIONS) == (
+        "ast.go\tgo.mod\tlexer.go\tparser.go\tparser_test.go"
+    )
+
+
+def test_edit_update_metadata(file_system: FileSystem) -> None:
+    """Test that metadata updates are isolated from the published version."""
+    old_node = file_system.fetch_node("lexer/lexer.go")
+    with file_system.edit() as writer:
+        writer.update_metadata("lexer/lexer.go", size=1, time_modified_int=0, permissions="-r--r--r--")
+    assert writer.copies == 3
+    assert old_node.size != 1
+    assert file_system.fetch_node("lexer/lexer.go").size == 1
+    assert file_system.fetch_node("lexer").content_hash != old_node.parent_node.content_hash
+    assert file_system.fetch_node("parser") is old_node.parent_node.parent_node.children["parser"]
+
+
+def test_edit_matches_rebuilt_hash(file_system: FileSystem, tmp_path: Path) -> None:
+    """Test that the hashes of an edited version match those of a fresh load."""
+    data = json.loads(Path("structure.json").read_text())
+    parser = next(entry for entry in data["contents"] if entry["name"] == "parser")
+    parser["contents"].append(
+        {"name": "lexer.go", "size": 1, "time_modified": 1700000000, "permissions": "-rw-r--r--"},
+    )
+    json_path = tmp_path / "structure.json"
+    json_path.write_text(json.dumps(data))
+    with file_system.edit() as writer:
+        writer.add_child("parser", new_file("lexer.go"))
+    assert file_system.content_hash(".") == FileSystem(str(json_path)).content_hash(".")
+
+
+def test_edit_failure_publishes_nothing(file_system: FileSystem) -> None:
+    """Test that a failed edit leaves the current version in place."""
+    root = file_system.snapshot()
+    with pytest.raises(FileNotFoundError, match="cannot access missing"), file_system.edit() as writer:
+        writer.add_child("parser", new_file("lexer.go"))
+        writer.add_child("missing", new_file("lexer.go"))
+    assert file_system.snapshot() is root
+    assert file_system.fetch_node("parser/lexer.go") is None
+
+
+def test_edit_without_changes(file_system: FileSystem) -> None:
+    """Test that an edit without modifications publishes nothing."""
+    root = file_system.snapshot()
+    with file_system.edit() as writer:
+        assert not writer.changed
+    assert file_system.snapshot() is root
+
+
+def test_edit_keeps_weak_parent_links() -> None:
+    """Test that copies and added nodes keep weak parent links."""
+    file_system = FileSystem("structure.json", weak_parent_links=True)
+    added = new_file("lexer.go")
+    with file_system.edit() as writer:
+        writer.add_child("parser", added)
+    parser = file_system.fetch_node("parser")
+    assert added.parent_node is parser
+    assert parser.parent_node is file_system.root
+    assert "_parent_link" in vars(added)
+    assert not isinstance(vars(added)["_parent_link"], Node)
+    assert not isinstance(vars(parser)["_parent_link"], Node)
+
+
+def test_edit_sets_location_of_added_nodes(file_system: FileSystem) -> None:
+    """Test that added subtrees get the depth and path of their place."""
+    directory = Node(name="n", size=1, time_modified_int=1700000000, permissions="drwxr-xr-x", is_directory=True)
+    directory.add_child(Node(name="x", size=1, time_modified_int=1700000000, permissions="-rw-r--r--", parent_node=directory))
+    with file_system.edit() as writer:
+        writer.add_child("parser", directory)
+        writer.add_child("parser", new_file("m"))
+    assert (directory.depth, directory.relative_path) == (2, "./parser/n")
+    assert file_system.ls(name_or_path_to_node="parser/m", **LS_OPTIONS) == "./parser/m"
+    node = file_system.fetch_node("parser/n/x")
+    assert (node.depth, node.relative_path) == (3, "./parser/n/x")
+    output = io.StringIO()
+    export_tree(file_system.fetch_node("parser/n"), output, "ndjson")
+    assert json.loads(output.getvalue())["depth"] == 3
+
+
+@pytest.mark.parametrize("weak_parent_links", [False, True])
+def test_edit_frees_previous_versions(weak_parent_links: bool) -> None:
+    """Test that superseded versions are not kept alive by shared nodes."""
+    file_system = FileSystem("structure.json", weak_parent_links=weak_parent_links)
+    roots = []
+    for index in range(50):
+        roots.append(weakref.ref(file_system.snapshot()))
+        with file_system.edit() as writer:
+            writer.add_child("parser", new_file(f"file{index}.go"))
+    gc.collect()
+    assert [root() for root in roots] == [None] * 50
+    lexer = file_system.fetch_node("lexer")
+    assert lexer.parent_node is file_system.root
+    assert file_system.fetch_node("lexer/lexer.go").parent_node is lexer
+
+
+def test_edit_weak_parent_links_after_free() -> None:
+    """Test that shared nodes keep their parents once older versions are freed."""
+    file_system = FileSystem("structure.json", weak_parent_links=True)
+    with file_system.edit() as writer:
+        writer.add_child("parser", new_file("ast.go"))
+    gc.collect()
+    with file_system.edit() as writer:
+        writer.update_metadata("lexer/lexer.go", size=1, time_modified_int=0, permissions="-r--r--r--")
+    assert file_system.fetch_node("lexer").content_hash != FileSystem("structure.json").fetch_node("lexer").content_hash
+    paths = {str(entry).split("\t")[-1] for entry in file_system.diff(FileSystem("structure.json"))}
+    assert {"./lexer", "./lexer/lexer.go", "./parser/ast.go"} <= paths
+
+
+def test_edit_index(tmp_path: Path) -> None:
+    """Test that an SQLite index cannot be edited."""
+    database_path = tmp_path / "structure.sqlite"
+    build_index(Path("structure.json"), database_path)
+    file_system = FileSystem(str(database_path))
+    with pytest.raises(ValueError, match="Cannot edit"), file_system.edit():
+        pass
+
+
+def test_concurrent_readers_see_whole_versions(file_system: FileSystem) -> None:
+    """Test that readers only ever see complete versions while a writer runs."""
+    original = {"go.mod", "parser.go", "parser_test.go"}
+    added = [f"file{index:03}.go" for index in range(200)]
+    errors: list[str] = []
+    done = threading.Event()
+
+    def read() -> None:
+        while not done.is_set():
+            names = set(file_system.ls(name_or_path_to_node="parser", **LS_OPTIONS).split("\t"))
+            count = len(names) - len(original)
+            if not original <= names or names - original != set(added[:count]):
+                errors.append(f"inconsistent listing: {sorted(names)}")
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for name in added:
+            with file_system.edit() as writer:
+                writer.add_child("parser", new_file(name))
+    finally:
+        done.set()
+        for reader in readers:
+            reader.join()
+    assert errors == []
+    assert len(file_system.fetch_node("parser").children) == len(original) + len(added)
+
+
+@pytest.mark.parametrize("path", ["parser", "parser/n", "./parser/n/x"])
+def test_edit_mount_point(tmp_path: Path, path: str) -> None:
+    """Test that paths behind a mount point are rejected before any copy."""
+    json_path = tmp_path / "structure.json"
+    json_path.write_text(Path("structure.json").read_text())
+    file_system = FileSystem(str(json_path), max_resident_nodes=4)
+    root = file_system.snapshot()
+    loads = file_system.shard_cache.loads
+    with pytest.raises(ValueError, match="./parser is a mount point"), file_system.edit() as writer:
+        writer.update_metadata(path, size=1, time_modified_int=0, permissions="-r--r--r--")
+    assert writer.copies == 0
+    assert file_system.snapshot() is root
+    assert file_system.shard_cache.loads == loads
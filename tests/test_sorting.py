@@ -0,0 +1,93 @@
+"""Unit tests for sort orders."""
+
+import pytest
+
+from src.core import FileSystem
+from src.core.node import Node
+from src.core.sorting import extension_key, natural_key
+
+
+def directory(*names: str) -> FileSystem:
+    """Return a file system whose root holds files with the given names."""
+    file_system = FileSystem("structure.json")
+    root = Node(name="root", size=4096, time_modified_int=0, permissions="drwxr-xr-x", is_directory=True)
+    for size, name in enumerate(names):
+        root.add_child(Node(name=name, size=size, time_modified_int=0, permissions="-", parent_node=root))
+    file_system.root = root
+    return file_system
+
+
+def ls(file_system: FileSystem, sort_by: str, *, reverse: bool = False) -> list[str]:
+    """List the root with a sort order."""
+    return file_system.ls(
+        include_all_details=False,
+        show_hidden_files=True,
+        sort_in_reverse=reverse,
+        sort_by_last_modified_time=False,
+        display_sizes_in_human_readable_format=False,
+        filter_by_type=None,
+        name_or_path_to_node=".",
+        sort_by=sort_by,
+    ).split("\t")
+
+
+def test_natural_key() -> None:
+    """Test that numbers are compared by value."""
+    names = ["file10", "file2", "file1", "file01", "file", "2file"]
+    assert sorted(names, key=natural_key) == ["2file", "file", "file01", "file1", "file2", "file10"]
+
+
+@pytest.mark.parametrize(
+    "name,expected",
+    [
+        ("main.go", ("go", "main.go")),
+        ("archive.tar.gz", ("gz", "archive.tar.gz")),
+        ("Makefile", ("", "Makefile")),
+        (".gitignore", ("", ".gitignore")),
+        (".config.json", ("json", ".config.json")),
+    ],
+)
+def test_extension_key(name: str, expected: tuple[str, str]) -> None:
+    """Test the extension of hidden and plain names."""
+    assert extension_key(name) == expected
+
+
+def test_sort_by_natural() -> None:
+    """Test listing in natural order."""
+    file_system = directory("file10", "file2", "file1")
+    assert ls(file_system, "name") == ["file1", "file10", "file2"]
+    assert ls(file_system, "natural") == ["file1", "file2", "file10"]
+
+
+def test_sort_by_size() -> None:
+    """Test listing by size, largest last unless reversed."""
+    file_system = directory("b", "c", "a")
+    assert ls(file_system, "size") == ["b", "c", "a"]
+    assert ls(file_system, "size", reverse=True) == ["a", "c", "b"]
+
+
+def test_sort_by_extension() -> None:
+    """Test listing by extension, then name."""
+    file_system = directory("b.py", "a.txt", "Makefile", "a.py")
+    assert ls(file_system, "extension") == ["Makefile", "a.py", "b.py", "a.txt"]
+
+
+def test_sort_by_locale() -> None:
+    """Test listing by locale collation key."""
+    file_system = directory("b", "A", "a")
+    assert ls(file_system, "locale") == ["A", "a", "b"]
+
+
+def test_sort_keys_are_cached_per_node() -> None:
+    """Test that expensive keys are computed once per node."""
+    node = Node(name="file10", size=0, time_modified_int=0, permissions="-")
+    assert "natural_sort_key" not in vars(node)
+    key = node.natural_sort_key
+    assert vars(node)["natural_sort_key"] is key
+    assert node.natural_sort_key is key
+
+
+def test_unsupported_sort_order() -> None:
+    """Test that an unknown sort order is rejected."""
+    with pytest.raises(ValueError):
+        FileSystem("structure.json").get_sort_key(sort_by_time=False, sort_by="random")
@@ -0,0 +1,126 @@
+"""Unit tests for tree statistics."""
+
+import json
+import multiprocessing
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.core import FileSystem
+from src.core.stats import TOP_ENTRIES, bucket_label, collect_stats
+
+
+@pytest.fixture
+def file_system() -> FileSystem:
+    """Return the sample file system."""
+    return FileSystem("structure.json")
+
+
+def test_counts(file_system: FileSystem) -> None:
+    """Test the entry counts of the sample tree."""
+    stats = file_system.stats_report(".")
+    assert (stats.files, stats.directories, stats.hidden) == (15, 4, 1)
+    assert stats.total_size == 20576
+    assert stats.extensions["go"] == [7, 9400]
+    assert stats.extensions["(none)"] == [2, 9982]
+    assert sum(stats.size_histogram.values()) == stats.files
+
+
+def test_top_entries(file_system: FileSystem) -> None:
+    """Test that only the oldest, newest and deepest entries are kept."""
+    stats = file_system.stats_report(".")
+    assert len(stats.newest) == len(stats.oldest) == len(stats.deepest) == TOP_ENTRIES
+    assert max(stats.newest)[1] == "./parser/parser_test.go"
+    assert {path for _, path in stats.deepest} <= {
+        child.relative_path for child in file_system.root.children["parser"].children.values()
+    } | {child.relative_path for child in file_system.root.children["token"].children.values()}
+
+
+def test_parallel_matches_serial(file_system: FileSystem) -> None:
+    """Test that merging the partial results of workers gives the same report."""
+    serial = file_system.stats_report(".", workers=1)
+    parallel = file_system.stats_report(".", workers=4)
+    assert parallel.report() == serial.report()
+
+
+def test_pool_only_without_other_threads(file_system: FileSystem, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that workers are only forked while no other thread runs."""
+    start_methods: list[str] = []
+    get_context = multiprocessing.get_context
+
+    def record_context(method: str) -> multiprocessing.context.BaseContext:
+        start_methods.append(method)
+        return get_context(method)
+
+    monkeypatch.setattr(multiprocessing, "get_context", record_context)
+    serial = file_system.stats_report(".", workers=1).report()
+    assert file_system.stats_report(".", workers=4).report() == serial
+    reports: list[str] = []
+    thread = threading.Thread(target=lambda: reports.append(file_system.stats_report(".", workers=4).report()))
+    thread.start()
+    thread.join()
+    assert reports == [serial]
+    assert start_methods == ["fork"]
+
+
+@pytest.mark.filterwarnings("error::DeprecationWarning")
+def test_parallel_calls_from_threads(tmp_path: Path) -> None:
+    """Test that walks started from several threads do not mix subtrees or fork."""
+
+    def entry(name: str, size: int, contents: list[dict] | None = None) -> dict:
+        data: dict = {"name": name, "size": size, "time_modified": 1699941437, "permissions": "-rw-r--r--"}
+        if contents is not None:
+            data["contents"] = contents
+        return data
+
+    tops = {
+        top: entry(top, 0, [entry(name, 0, [entry(f"{top}.{name}", size)]) for name in "xyz"])
+        for top, size in (("a", 1), ("b", 1000))
+    }
+    json_path = tmp_path / "structure.json"
+    json_path.write_text(json.dumps(entry(".", 0, list(tops.values()))))
+    file_system = FileSystem(str(json_path))
+    expected = {top: file_system.stats_report(top).report() for top in tops}
+    reports: dict[str, list[str]] = {top: [] for top in tops}
+
+    def walk(top: str) -> None:
+        for _ in range(5):
+            reports[top].append(file_system.stats_report(top, workers=2).report())
+
+    threads = [threading.Thread(target=walk, args=(top,)) for top in tops]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert reports == {top: [report] * 5 for top, report in expected.items()}
+
+
+def test_subtree(file_system: FileSystem) -> None:
+    """Test the statistics of a directory and of a file."""
+    assert file_system.stats_report("parser").files == 3
+    file_stats = file_system.stats_report("parser/parser.go")
+    assert (file_stats.files, file_stats.total_size) == (1, 1622)
+
+
+def test_merge(file_system: FileSystem) -> None:
+    """Test that merging adds up counts and extension totals."""
+    stats = collect_stats(file_system.root.children["parser"])
+    stats.merge(collect_stats(file_system.root.children["ast"]))
+    assert stats.files == 5
+    assert stats.extensions["mod"][0] == 2
+
+
+def test_missing_path(file_system: FileSystem) -> None:
+    """Test that a missing path raises FileNotFoundError."""
+    with pytest.raises(FileNotFoundError):
+        file_system.stats_report("missing")
+
+
+@pytest.mark.parametrize(
+    "bucket,expected",
+    [(0, "0"), (1, "1-2"), (11, "1.0K-2.0K")],
+)
+def test_bucket_label(bucket: int, expected: str) -> None:
+    """Test the labels of the size histogram."""
+    assert bucket_label(bucket) == expected
@@ -0,0 +1,95 @@
+"""Unit tests for the incremental structure file parser."""
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from src.core import streaming
+from src.core.streaming import (
+    ENTER_DIRECTORY,
+    EXIT_DIRECTORY,
+    LEAF_ENTRY,
+    iter_structure_events,
+)
+
+STRUCTURE = json.loads(Path("structure.json").read_text())
+
+
+def rebuild(data: bytes) -> dict:
+    """Rebuild a parsed document from its events."""
+    root: dict = {}
+    stack: list[dict] = []
+    for event, entry in iter_structure_events(io.BytesIO(data)):
+        if event == EXIT_DIRECTORY:
+            stack.pop()
+            continue
+        node = dict(entry)
+        if event == ENTER_DIRECTORY:
+            node["contents"] = []
+        if stack:
+            stack[-1]["contents"].append(node)
+        else:
+            root = node
+        if event == ENTER_DIRECTORY:
+            stack.append(node)
+    return root
+
+
+@pytest.mark.parametrize("indent", [None, 4])
+def test_events_rebuild_the_document(indent: int | None) -> None:
+    """Test that the events describe the whole document, in order."""
+    data = json.dumps(STRUCTURE, indent=indent).encode()
+    assert rebuild(data) == STRUCTURE
+    assert rebuild(b"\xef\xbb\xbf" + data) == STRUCTURE
+
+
+def test_events_across_small_chunks(monkeypatch) -> None:
+    """Test values split between chunks, including numbers and characters."""
+    monkeypatch.setattr(streaming, "CHUNK_LENGTH", 3)
+    monkeypatch.setattr(streaming, "LOOKAHEAD_LENGTH", 5)
+    document = {
+        "name": 'a{["}é',
+        "size": 12345678901234567890,
+        "extra": {"n": [1, 2]},
+        "contents": [
+            {"name": "]}", "size": 1.5e3},
+            {"name": "d", "contents": []},
+            {"name": "e", "x": [{"a": 1}]},
+        ],
+    }
+    assert rebuild(json.dumps(document, ensure_ascii=False).encode()) == document
+
+
+def test_event_order() -> None:
+    """Test that directories are entered before their entries are read."""
+    data = b'{"name": "a", "contents": [{"name": "b", "contents": []}, {"name": "c"}]}'
+    events = [
+        (event, entry["name"]) for event, entry in iter_structure_events(io.BytesIO(data))
+    ]
+    assert events == [
+        (ENTER_DIRECTORY, "a"),
+        (ENTER_DIRECTORY, "b"),
+        (EXIT_DIRECTORY, "b"),
+        (LEAF_ENTRY, "c"),
+        (EXIT_DIRECTORY, "a"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b'{"contents": [{"a": 1}], "name": "a"}',
+        b'{"a": 1} x',
+        b'{"contents": [{"a": 1} {"b": 2}]}',
+        b'{"contents": [',
+        b"[1]",
+        b'{"a": 1,}',
+        b"",
+    ],
+)
+def test_invalid_documents(data: bytes) -> None:
+    """Test that invalid documents and fields after contents are rejected."""
+    with pytest.raises(ValueError, match="character"):
+        list(iter_structure_events(io.BytesIO(data)))
@@ -0,0 +1,107 @@
+"""Unit tests for the tree view."""
+
+import io
+import itertools
+from pathlib import Path
+
+import pytest
+
+from src.core import FileSystem
+from src.core.export import iter_subtree
+from src.core.index import build_index
+from src.core.node import Node
+from src.core.tree import render_tree
+
+
+@pytest.fixture
+def file_system() -> FileSystem:
+    """Return the sample file system."""
+    return FileSystem("structure.json")
+
+
+def render(file_system: FileSystem, **options: object) -> str:
+    """Return the tree view of the sample file system."""
+    output = io.StringIO()
+    file_system.tree(output=output, **options)
+    return output.getvalue()
+
+
+def test_tree(file_system: FileSystem) -> None:
+    """Test the full tree view of a directory and its counts."""
+    assert render(file_system, name_or_path_to_node="parser", sort_by_last_modified_time=True, sort_in_reverse=True) == (
+        "parser\n├── parser_test.go\n├── parser.go\n└── go.mod\n\n0 directories, 3 files\n"
+    )
+    lines = render(file_system, name_or_path_to_node=None, show_hidden_files=True).splitlines()
+    assert lines[0] == "."
+    assert lines[-1] == "4 directories, 15 files"
+    assert "│   └── go.mod" in lines
+    assert lines[-3] == "    └── token.go"
+
+
+def test_tree_levels_match_ls(file_system: FileSystem) -> None:
+    """Test that every level is listed in the order of `ls` with the same options."""
+    for show_hidden_files, sort_in_reverse, sort_by in itertools.product((False, True), (False, True), ("name", "size")):
+        options = {
+            "show_hidden_files": show_hidden_files,
+            "sort_in_reverse": sort_in_reverse,
+            "sort_by_last_modified_time": False,
+            "filter_by_type": None,
+        }
+        lines = render(file_system, name_or_path_to_node=None, max_depth=1, sort_by=sort_by, **options).splitlines()
+        listing = file_system.ls(
+            name_or_path_to_node=None,
+            include_all_details=False,
+            display_sizes_in_human_readable_format=False,
+            sort_by=sort_by,
+            **options,
+        )
+        assert [line[4:] for line in lines[1:-2]] == listing.split("\t")
+
+
+def test_tree_depth_limit(file_system: FileSystem) -> None:
+    """Test that directories below the depth limit are counted but not entered."""
+    assert render(file_system, name_or_path_to_node=None, max_depth=1).splitlines()[-1] == "4 directories, 4 files"
+
+
+def test_tree_missing_path(file_system: FileSystem) -> None:
+    """Test rendering a path that does not exist."""
+    with pytest.raises(FileNotFoundError, match="cannot access missing"):
+        render(file_system, name_or_path_to_node="missing")
+
+
+def test_tree_index_matches_memory(file_system: FileSystem, tmp_path: Path) -> None:
+    """Test that the SQLite index renders the same tree."""
+    database_path = tmp_path / "structure.sqlite"
+    build_index(Path("structure.json"), database_path)
+    indexed = FileSystem(str(database_path))
+    for options in ({}, {"sort_by_last_modified_time": True, "show_hidden_files": True}, {"filter_by_type": "dir"}):
+        assert render(indexed, name_or_path_to_node=None, **options) == render(
+            file_system,
+            name_or_path_to_node=None,
+            **options,
+        )
+
+
+def test_render_tree_streams() -> None:
+    """Test that each directory is listed only when the walk reaches it."""
+    root = Node(name="root", size=0, time_modified_int=0, permissions="", is_directory=True)
+    parent = root
+    for depth in range(50):
+        for index in range(3):
+            parent.add_child(Node(name=f"file{index}", size=0, time_modified_int=0, permissions="", parent_node=parent))
+        child = Node(name=f"dir{depth}", size=0, time_modified_int=0, permissions="", is_directory=True, parent_node=parent)
+        parent.add_child(child)
+        parent = child
+    held: list[int] = []
+
+    def list_children(node: Node) -> list[Node]:
+        held.append(node.depth)
+        return list(node.children.values())
+
+    lines = render_tree(root, list_children, root_name="root")
+    assert [next(lines), next(lines)] == ["root", "├── file0"]
+    assert held == [0]
+    lines = ["root", "├── file0", *lines]
+    assert len(lines) == sum(1 for _ in iter_subtree(root)) + 3
+    assert held == list(range(51))
+    assert lines[-1] == "50 directories, 150 files"